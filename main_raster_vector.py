@@ -1,9 +1,10 @@
 import os
 import numpy as np
-import geopandas as gpd
 import rasterio
 from rasterstats import zonal_stats
 import pandas as pd
+from src.lst_study.raster_store import read_band
+from src.lst_study.vector_store import LANDUSE_PATH, read_projected
 import matplotlib.pyplot as plt
 
 
@@ -11,11 +12,11 @@ def main():
     # ------------------------------
     # Input paths
     # ------------------------------
-    lu_path = "src/lst_study/Outputs/Data/land_use_polygon/amsterdam_landuse.shp"
+    lu_path = LANDUSE_PATH
     lst_tif = r"C:\Users\anupr\Downloads\Outputs\Outputs\Data\modis_image\modis_lst_mean_2025.tif"
 
     if not os.path.exists(lu_path):
-        raise FileNotFoundError(f"Missing landuse shapefile: {lu_path}")
+        raise FileNotFoundError(f"Missing landuse layer: {lu_path}")
     if not os.path.exists(lst_tif):
         raise FileNotFoundError(f"Missing LST raster: {lst_tif}")
 
@@ -23,9 +24,12 @@ def main():
     os.makedirs("Outputs/Tables", exist_ok=True)
 
     # ------------------------------
-    # Load vector
+    # Load vector in the raster CRS (reprojected once, then cached),
+    # only polygons within the raster extent
     # ------------------------------
-    gdf = gpd.read_file(lu_path)
+    with rasterio.open(lst_tif) as src:
+        raster_bounds, raster_crs = src.bounds, src.crs
+    gdf = read_projected(lu_path, raster_crs, bbox=raster_bounds, columns=["landuse"])
     gdf = gdf[~gdf["landuse"].isna()].copy()  # keep only polygons with landuse class
     print("Landuse polygons loaded:", gdf.shape)
     print("Vector CRS:", gdf.crs)
@@ -37,7 +41,7 @@ def main():
         raster_crs = src.crs
         transform = src.transform
         nodata = src.nodata
-        lst_arr = src.read(1).astype(np.float32)
+        lst_arr = read_band(src)
 
     print("Raster CRS:", raster_crs)
     print("Raster shape:", lst_arr.shape, "nodata:", nodata)
@@ -46,15 +50,6 @@ def main():
     if nodata is not None:
         lst_arr[lst_arr == nodata] = np.nan
 
-    # ------------------------------
-    # CRS alignment (vector -> raster CRS)
-    # ------------------------------
-    if gdf.crs != raster_crs:
-        gdf = gdf.to_crs(raster_crs)
-        print("Reprojected vector to raster CRS:", gdf.crs)
-    else:
-        print("Vector CRS already matches raster CRS")
-
     # ------------------------------
     # Zonal statistics (Raster–Vector integration)
     # mean LST for each polygon
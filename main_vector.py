@@ -1,20 +1,18 @@
 import os
-import geopandas as gpd
+from src.lst_study.vector_store import LANDUSE_PATH, read_projected
 import matplotlib.pyplot as plt
 
 
 def main():
-    lu_path = "src/lst_study/Outputs/Data/land_use_polygon/amsterdam_landuse.shp"
-    gdf = gpd.read_file(lu_path)
+    # Area must be in meters, not degrees: EPSG:28992 (Netherlands RD New)
+    # geometries, with area_m2 from an equal-area CRS, both cached after the
+    # first run
+    gdf = read_projected(LANDUSE_PATH, "EPSG:28992", columns=["landuse"])
 
     # Keep only rows that have a landuse value
     gdf = gdf[~gdf["landuse"].isna()].copy()
 
-    # IMPORTANT: area must be in meters, not degrees -> reproject to EPSG:28992 (Netherlands RD New)
-    gdf = gdf.to_crs(epsg=28992)
-
-    # Area in square meters and hectares
-    gdf["area_m2"] = gdf.geometry.area
+    # Area in hectares
     gdf["area_ha"] = gdf["area_m2"] / 10000.0
 
     # Total area per landuse class
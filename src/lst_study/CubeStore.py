@@ -0,0 +1,130 @@
+"""
+CubeStore.py
+------------
+Consolidated, chunked and compressed Zarr store for the MODIS LST time
+series.
+
+ingest_lst_cube() decodes the per-year GeoTIFFs once and appends them to
+a single (time, y, x) Zarr cube with CRS metadata; years already in the
+store are skipped, so new years can be added incrementally. The loaders
+open the store lazily, so a point or small-bbox time-series query only
+reads the chunks it touches instead of every GeoTIFF.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from .DataCube import list_lst_files, open_lst_cube, time_from_filename
+
+
+DEFAULT_STORE = "src/lst_study/Outputs/Data/modis_lst_cube.zarr"
+
+# One time step per chunk lets every year be appended on its own;
+# small spatial chunks keep point and bbox queries cheap
+STORE_CHUNKS = {"time": 1, "y": 256, "x": 256}
+
+
+def open_cube_store(store_path=DEFAULT_STORE) -> xr.DataArray:
+    """
+    Open the consolidated store lazily as a (time, y, x) DataArray with its CRS.
+    """
+    import rioxarray  # noqa: F401  (registers the .rio accessor)
+
+    ds = xr.open_zarr(store_path, consolidated=True)
+    cube = ds["lst"]
+    if "spatial_ref" in ds.coords:
+        cube = cube.rio.write_crs(ds["spatial_ref"].attrs.get("crs_wkt"))
+    return cube
+
+
+def _check_same_grid(existing: xr.DataArray, new: xr.DataArray):
+    for dim in ("y", "x"):
+        if existing.sizes[dim] != new.sizes[dim] or not np.allclose(existing[dim].values, new[dim].values):
+            raise ValueError(f"Cannot append: the {dim} coordinates differ from the store's grid")
+
+
+def _check_appends_in_order(existing: xr.DataArray, new: xr.DataArray):
+    # Zarr appends go to the end of the time axis, so an earlier year would
+    # leave the store unsorted and break time slicing
+    last = pd.Timestamp(existing["time"].values.max())
+    earlier = [t for t in pd.DatetimeIndex(new["time"].values) if t < last]
+    if earlier:
+        raise ValueError(
+            f"Cannot append {[str(t.date()) for t in earlier]}: earlier than the store's last time step "
+            f"{last.date()}; rebuild the store to insert them"
+        )
+
+
+def ingest_lst_cube(raster_folder, store_path=DEFAULT_STORE, pattern="modis_lst_mean_*.tif", nodata=None, chunks=None):
+    """
+    Append every GeoTIFF in `raster_folder` that is not yet in the store.
+    New time steps must come after the store's last one (ValueError
+    otherwise); to insert an earlier year, delete the store and ingest again.
+
+    Nodata pixels are stored as NaN. Returns the list of time stamps that
+    were added (empty when the store was already up to date).
+    """
+    chunks = STORE_CHUNKS if chunks is None else chunks
+    files = list_lst_files(raster_folder, pattern=pattern)
+
+    existing = None
+    if os.path.exists(store_path):
+        existing = open_cube_store(store_path)
+        present = set(pd.DatetimeIndex(existing["time"].values))
+        files = [f for f in files if time_from_filename(f) not in present]
+    if not files:
+        print("Cube store is up to date.")
+        return []
+
+    cube = open_lst_cube(files, chunks={"y": chunks["y"], "x": chunks["x"]}, nodata=nodata)
+    cube = cube.astype("float32").chunk(chunks)
+    crs = cube.rio.crs
+    if existing is not None:
+        _check_same_grid(existing, cube)
+        _check_appends_in_order(existing, cube)
+
+    ds = cube.to_dataset(name="lst")
+    if crs is not None:
+        ds = ds.rio.write_crs(crs)
+    # Replace the GeoTIFF attributes and encodings (nodata, scale/offset,
+    # block sizes) inherited from rioxarray: nodata is NaN in the store
+    ds["lst"].attrs = {"units": "degC", "long_name": "MODIS land surface temperature"}
+    ds["lst"].encoding = {}
+
+    if existing is None:
+        ds.to_zarr(store_path, mode="w", consolidated=True)
+    else:
+        ds.drop_vars("spatial_ref", errors="ignore").to_zarr(
+            store_path, mode="a", append_dim="time", consolidated=True
+        )
+
+    added = list(pd.DatetimeIndex(ds["time"].values))
+    print(f"Added {len(added)} time steps to {store_path}")
+    return added
+
+
+def point_timeseries(x, y, store_path=DEFAULT_STORE) -> pd.Series:
+    """
+    LST time series of the pixel nearest to (x, y), in the store's CRS.
+    Only the chunks containing that pixel are read.
+    """
+    cube = open_cube_store(store_path)
+    series = cube.sel(x=x, y=y, method="nearest").compute()
+    return series.to_series().rename("lst")
+
+
+def bbox_timeseries(xmin, ymin, xmax, ymax, store_path=DEFAULT_STORE, workers=None) -> pd.DataFrame:
+    """
+    Per-time-step statistics over a bounding box, in the store's CRS.
+    Only the chunks intersecting the box are read.
+    """
+    from .DataCube import lst_timeseries_stats
+
+    cube = open_cube_store(store_path)
+    # Rasters are north-up, so y decreases along the axis
+    y_slice = slice(ymax, ymin) if cube["y"][0] > cube["y"][-1] else slice(ymin, ymax)
+    subset = cube.sel(x=slice(xmin, xmax), y=y_slice)
+    return lst_timeseries_stats(subset, workers=workers)
@@ -0,0 +1,246 @@
+"""
+DataCube.py
+-----------
+Lazy, chunked (Dask) loading of the MODIS LST GeoTIFF stack as an
+xarray cube with a real datetime time axis.
+
+Nothing is read when the cube is opened: masking and reductions build a
+Dask graph that is evaluated chunk by chunk, so the stack never has to
+fit in memory (e.g. daily MOD11A1 over 20 years). lst_timeseries_stats
+computes all per-time-step statistics in a single pass over the chunks.
+"""
+
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+
+DEFAULT_CHUNKS = {"y": 512, "x": 512}
+
+# Date stamps in file names, most specific first:
+# 2020-06-01 / 20200601 / A2020153 (MODIS year + day of year) / 2020
+_DATE_PATTERNS = (
+    (re.compile(r"(\d{4})-(\d{2})-(\d{2})"), lambda m: pd.Timestamp(int(m[1]), int(m[2]), int(m[3]))),
+    (re.compile(r"(?<!\d)(\d{4})(\d{2})(\d{2})(?!\d)"), lambda m: pd.Timestamp(int(m[1]), int(m[2]), int(m[3]))),
+    (re.compile(r"A(\d{4})(\d{3})(?!\d)"), lambda m: pd.Timestamp(int(m[1]), 1, 1) + pd.Timedelta(days=int(m[2]) - 1)),
+    (re.compile(r"(?<!\d)(\d{4})(?!\d)"), lambda m: pd.Timestamp(int(m[1]), 1, 1)),
+)
+
+
+def time_from_filename(path) -> pd.Timestamp:
+    """
+    Parse the acquisition date from a raster file name,
+    e.g. modis_lst_mean_2025.tif -> 2025-01-01.
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    for pattern, to_timestamp in _DATE_PATTERNS:
+        match = pattern.search(name)
+        if match:
+            return to_timestamp(match)
+    raise ValueError(f"No date found in file name: {path}")
+
+
+def list_lst_files(raster_folder, pattern="modis_lst_mean_*.tif"):
+    """
+    Raster files in a folder, sorted by the date in their name.
+    """
+    files = glob.glob(os.path.join(raster_folder, pattern))
+    return sorted(files, key=time_from_filename)
+
+
+def _cached_layer(path, band, chunks):
+    # Coordinates and CRS from the file, values from the decoded .npy
+    # memmap of the raster cache, wrapped (not copied) as a Dask array
+    import dask.array as da
+    import rioxarray
+
+    from .raster_cache import cached_band
+
+    layer = rioxarray.open_rasterio(path).sel(band=band, drop=True)
+    data = da.from_array(cached_band(path, band), chunks=(chunks.get("y", -1), chunks.get("x", -1)))
+    attrs = {k: v for k, v in layer.attrs.items() if k not in ("scale_factor", "add_offset", "_FillValue")}
+    return layer.copy(data=data).assign_attrs(attrs)
+
+
+def open_lst_cube(files, chunks=None, band=1, nodata=None, mask_nodata=True, cached=False) -> xr.DataArray:
+    """
+    Open a list of single-band rasters as a lazy (time, y, x) DataArray.
+
+    Each file is opened with Dask chunks (`chunks`, default 512 x 512) and
+    nothing is read until the result is computed. Scaled integer layers
+    are decoded lazily to float32 with NaN for their nodata (see
+    raster_store.py). `nodata` is only needed for legacy float rasters
+    that store missing pixels as 0 °C without declaring it: those pixels
+    are masked lazily with `where`, which adds a step to the graph instead
+    of allocating a masked copy of the cube.
+
+    cached=True takes each layer from the raster cache (see
+    raster_cache.py): decoded once, then read as a memory map, so repeated
+    passes over the stack within and across runs skip decompression.
+    """
+    import rioxarray
+
+    from .raster_store import decode_dataarray
+
+    if isinstance(files, (str, os.PathLike)):
+        files = list_lst_files(files)
+    if not files:
+        raise FileNotFoundError("No raster files to open")
+
+    chunks = DEFAULT_CHUNKS if chunks is None else chunks
+    if cached:
+        layers = [_cached_layer(f, band, chunks) for f in files]
+    else:
+        layers = [
+            decode_dataarray(rioxarray.open_rasterio(f, chunks={"band": 1, **chunks}).sel(band=band, drop=True))
+            for f in files
+        ]
+    cube = xr.concat(layers, dim="time", coords="minimal", compat="override", join="override")
+    cube = cube.assign_coords(time=pd.DatetimeIndex([time_from_filename(f) for f in files]))
+    cube.name = "lst"
+
+    if mask_nodata and nodata is not None:
+        cube = cube.where(cube != nodata)
+    return cube
+
+
+# Fixed-bin histogram sketch used for streaming percentiles. 0.02 °C bins
+# match the MODIS LST scale factor, so estimates are exact to sensor precision.
+HIST_RANGE = (-60.0, 80.0)
+HIST_BIN = 0.02
+
+
+def _block_partials(block, nodata, edges):
+    """
+    Per-time-step partial statistics of one (time, y, x) block: count,
+    mean, sum of squared deviations from the mean (M2), min, max and
+    (optionally) a histogram.
+    """
+    block = np.asarray(block, dtype=np.float64)
+    valid = ~np.isnan(block)
+    if nodata is not None and not np.isnan(nodata):
+        valid &= block != nodata
+    count = valid.reshape(block.shape[0], -1).sum(axis=1).astype(np.int64)
+    flat = np.where(valid, block, 0.0).reshape(block.shape[0], -1)
+    mean = np.divide(flat.sum(axis=1), count, out=np.zeros(block.shape[0]), where=count > 0)
+    dev = np.where(valid.reshape(block.shape[0], -1), flat - mean[:, None], 0.0)
+
+    partials = {
+        "count": count,
+        "mean": mean,
+        "m2": np.einsum("ij,ij->i", dev, dev),
+        "min": np.where(valid, block, np.inf).reshape(block.shape[0], -1).min(axis=1),
+        "max": np.where(valid, block, -np.inf).reshape(block.shape[0], -1).max(axis=1),
+    }
+    if edges is not None:
+        partials["hist"] = np.stack([
+            np.histogram(np.clip(block[t][valid[t]], edges[0], edges[-1]), bins=edges)[0]
+            for t in range(block.shape[0])
+        ])
+    return partials
+
+
+def _merge_partials(parts, offsets, n_time, n_bins):
+    """
+    Combine block partials into per-time-step totals. Means and M2 are
+    merged with Chan et al.'s pairwise update, as in StreamingStats.
+    """
+    totals = {
+        "count": np.zeros(n_time, dtype=np.int64),
+        "mean": np.zeros(n_time),
+        "m2": np.zeros(n_time),
+        "min": np.full(n_time, np.inf),
+        "max": np.full(n_time, -np.inf),
+    }
+    if n_bins:
+        totals["hist"] = np.zeros((n_time, n_bins), dtype=np.int64)
+    for part, t0 in zip(parts, offsets):
+        t = slice(t0, t0 + part["count"].shape[0])
+        n_a, n_b = totals["count"][t], part["count"]
+        n = n_a + n_b
+        delta = part["mean"] - totals["mean"][t]
+        weight = np.divide(n_b, n, out=np.zeros(n.shape), where=n > 0)
+        totals["mean"][t] += delta * weight
+        totals["m2"][t] += part["m2"] + delta**2 * n_a * weight
+        totals["count"][t] = n
+        np.minimum(totals["min"][t], part["min"], out=totals["min"][t])
+        np.maximum(totals["max"][t], part["max"], out=totals["max"][t])
+        if n_bins:
+            totals["hist"][t] += part["hist"]
+    return totals
+
+
+def _hist_percentiles(hist, edges, q):
+    """
+    Percentile q (0-100) of every histogram row, interpolated within the bin.
+    """
+    cum = np.cumsum(hist, axis=1)
+    total = cum[:, -1]
+    out = np.full(hist.shape[0], np.nan)
+    for t in np.flatnonzero(total):
+        rank = q / 100.0 * total[t]
+        i = min(int(np.searchsorted(cum[t], rank, side="left")), hist.shape[1] - 1)
+        below = cum[t, i - 1] if i > 0 else 0
+        frac = (rank - below) / hist[t, i] if hist[t, i] else 0.0
+        out[t] = edges[i] + frac * (edges[i + 1] - edges[i])
+    return out
+
+
+def lst_timeseries_stats(
+    cube: xr.DataArray, nodata=None, percentiles=(), workers=None,
+    hist_range=HIST_RANGE, hist_bin=HIST_BIN,
+) -> pd.DataFrame:
+    """
+    Spatial statistics of every time step in one fused pass over the cube.
+
+    Each chunk is read once and reduced to count / mean / M2 / min / max (plus a fixed-bin histogram when `percentiles` are requested);
+    the partials are then merged. Pixels that are NaN or equal to `nodata`
+    are skipped while reducing, so no masked copy of the cube is made.
+    `workers` bounds the number of threads used for Dask-backed cubes.
+
+    Returns a DataFrame indexed by time with columns
+    count, mean, std, min, max and p<q> for each percentile.
+    """
+    import dask
+
+    n_time = cube.sizes["time"]
+    edges = None
+    if percentiles:
+        n_edges = int(round((hist_range[1] - hist_range[0]) / hist_bin)) + 1
+        edges = np.linspace(hist_range[0], hist_range[1], n_edges)
+    n_bins = 0 if edges is None else edges.shape[0] - 1
+
+    data = cube.transpose("time", ...).data
+    if hasattr(data, "to_delayed"):
+        blocks = data.to_delayed()
+        starts = np.concatenate([[0], np.cumsum(data.chunks[0])[:-1]])
+        offsets = [int(starts[index[0]]) for index in np.ndindex(blocks.shape)]
+        parts = dask.compute(
+            *[dask.delayed(_block_partials)(block, nodata, edges) for block in blocks.ravel()],
+            scheduler="threads", num_workers=workers,
+        )
+    else:
+        parts, offsets = [_block_partials(data, nodata, edges)], [0]
+
+    totals = _merge_partials(parts, offsets, n_time, n_bins)
+    count = totals["count"]
+    empty = count == 0
+    var = np.divide(totals["m2"], count, out=np.full(n_time, np.nan), where=~empty)
+
+    stats = pd.DataFrame(
+        {
+            "count": count,
+            "mean": np.where(empty, np.nan, totals["mean"]),
+            "std": np.sqrt(var),
+            "min": np.where(empty, np.nan, totals["min"]),
+            "max": np.where(empty, np.nan, totals["max"]),
+        },
+        index=pd.DatetimeIndex(cube["time"].values, name="time"),
+    )
+    for q in percentiles:
+        stats[f"p{q:g}"] = _hist_percentiles(totals["hist"], edges, q)
+    return stats
@@ -0,0 +1,212 @@
+"""
+HotspotIndex.py
+---------------
+Spatial queries over land-use polygons with their LST statistics.
+
+HotspotIndex builds a Shapely STRtree over the polygons once and keeps
+their attributes as plain NumPy columns. A query (points within a
+distance, bbox, polygon, k nearest) goes to the tree for the candidate
+polygons, then applies attribute filters to those candidates only, so
+batched queries never scan the whole GeoDataFrame. Results come back
+hottest first.
+
+    index = HotspotIndex(pipeline.landuse)
+    index.within_distance((121000, 487000), 500, top=10, geometry_crs="EPSG:28992")
+    index.in_polygon(district, where={"landuse": "industrial", "mean_lst": (30, None)})
+"""
+
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS, Transformer
+
+
+def _rank_within(groups):
+    """
+    Position of every element within its run of equal (sorted) group ids.
+    """
+    if not len(groups):
+        return np.empty(0, dtype=np.int64)
+    starts = np.r_[0, np.flatnonzero(np.diff(groups)) + 1]
+    return np.arange(len(groups)) - np.repeat(starts, np.diff(np.r_[starts, len(groups)]))
+
+
+class HotspotIndex:
+    """
+    STRtree + columnar attribute index over a polygon GeoDataFrame.
+
+    value: column used for ranking ("hottest first").
+    crs: CRS the index works in, so distances are in its units. Defaults
+    to the layer's CRS, or its UTM zone when that is geographic.
+
+    Filters (`where`) map a column to a value (equality), a list/set of
+    values (membership) or a (low, high) tuple (inclusive range, None for
+    an open end). NaN never passes a range.
+    """
+
+    def __init__(self, gdf, value="mean_lst", crs=None):
+        if crs is None and gdf.crs is not None and gdf.crs.is_geographic:
+            crs = gdf.estimate_utm_crs()
+        if crs is not None and gdf.crs is not None and not gdf.crs.equals(CRS.from_user_input(crs)):
+            gdf = gdf.to_crs(crs)
+
+        self.crs = gdf.crs
+        self.value = value
+        self.gdf = gdf
+        self.geometries = np.asarray(gdf.geometry.values, dtype=object)
+        self.tree = shapely.STRtree(self.geometries)
+        self.columns = {
+            column: gdf[column].to_numpy()
+            for column in gdf.columns
+            if column != gdf.geometry.name
+        }
+
+    def __len__(self):
+        return len(self.geometries)
+
+    # ------------------------------
+    # Helpers
+    # ------------------------------
+    def _as_geometries(self, geometries, geometry_crs):
+        if isinstance(geometries, tuple) and len(geometries) == 2 and np.isscalar(geometries[0]):
+            geometries = shapely.points(*geometries)
+        geometries = np.atleast_1d(np.asarray(geometries, dtype=object))
+        if geometry_crs is not None and self.crs is not None and not self.crs.equals(CRS.from_user_input(geometry_crs)):
+            transformer = Transformer.from_crs(geometry_crs, self.crs, always_xy=True)
+            geometries = shapely.transform(geometries, lambda xy: np.column_stack(transformer.transform(xy[:, 0], xy[:, 1])))
+        return geometries
+
+    def _passes(self, positions, where):
+        keep = np.ones(len(positions), dtype=bool)
+        for column, condition in (where or {}).items():
+            values = self.columns[column][positions]
+            if isinstance(condition, tuple):
+                low, high = condition
+                values = values.astype(float)
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values <= high
+                keep &= ~np.isnan(values)
+            elif isinstance(condition, (list, set, frozenset, np.ndarray)):
+                keep &= pd.Series(values).isin(list(condition)).to_numpy()
+            else:
+                keep &= values == condition
+        return keep
+
+    def _result(self, query, positions, distance=None, top=None):
+        """
+        Result rows ordered by query, then hottest first; at most `top` per query.
+        """
+        ranking = self.columns[self.value][positions].astype(float)
+        # NaN values sort last
+        order = np.lexsort((np.where(np.isnan(ranking), np.inf, -ranking), query))
+        query, positions = query[order], positions[order]
+        if distance is not None:
+            distance = distance[order]
+
+        if top is not None:
+            keep = _rank_within(query) < top
+            query, positions = query[keep], positions[keep]
+            if distance is not None:
+                distance = distance[keep]
+
+        result = self.gdf.iloc[positions].copy()
+        result.insert(0, "query", query)
+        if distance is not None:
+            result.insert(1, "distance", distance)
+        return result
+
+    # ------------------------------
+    # Queries
+    # ------------------------------
+    def query(self, geometries, predicate="intersects", distance=None, where=None, top=None, geometry_crs=None):
+        """
+        Polygons matching each query geometry under `predicate` (any Shapely
+        STRtree predicate; "dwithin" needs `distance`). Accepts one geometry,
+        an (x, y) tuple or an array of geometries; `query` in the result is
+        the position of the query geometry.
+        """
+        geometries = self._as_geometries(geometries, geometry_crs)
+        query, positions = self.tree.query(geometries, predicate=predicate, distance=distance)
+        keep = self._passes(positions, where)
+        query, positions = query[keep], positions[keep]
+
+        dist = None
+        if predicate == "dwithin":
+            dist = shapely.distance(geometries[query], self.geometries[positions])
+        return self._result(query, positions, distance=dist, top=top)
+
+    def within_distance(self, points, distance, where=None, top=None, geometry_crs=None):
+        """
+        Polygons within `distance` (index CRS units) of each point, hottest first.
+        """
+        return self.query(points, predicate="dwithin", distance=distance, where=where, top=top, geometry_crs=geometry_crs)
+
+    def in_bbox(self, bbox, where=None, top=None, geometry_crs=None):
+        """
+        Polygons intersecting (xmin, ymin, xmax, ymax), or each of an (n, 4) array of boxes.
+        """
+        boxes = shapely.box(*np.asarray(bbox, dtype=float).T)
+        return self.query(boxes, where=where, top=top, geometry_crs=geometry_crs)
+
+    def in_polygon(self, polygons, where=None, top=None, predicate="intersects", geometry_crs=None):
+        """
+        Polygons intersecting (or matching `predicate` with) each query polygon.
+        """
+        return self.query(polygons, predicate=predicate, where=where, top=top, geometry_crs=geometry_crs)
+
+    def nearest(self, points, k=1, where=None, max_distance=None, geometry_crs=None):
+        """
+        The k nearest polygons passing `where` to each point, nearest first.
+
+        Candidates are gathered with dwithin over a radius that doubles for
+        the points that still have fewer than k matches, so each round is
+        one bulk tree query.
+        """
+        points = self._as_geometries(points, geometry_crs)
+        query_out, positions_out, distance_out = [], [], []
+        # Without any non-empty geometry there are no bounds to grow the
+        # radius towards, and nothing to find
+        bounds = shapely.total_bounds(self.geometries) if len(self) else np.full(4, np.nan)
+        pending = np.arange(len(points)) if np.isfinite(bounds).all() else np.empty(0, dtype=np.int64)
+        if pending.size:
+            xmin, ymin, xmax, ymax = bounds
+            extent = max(xmax - xmin, ymax - ymin, 1e-9)
+            radius = extent * np.sqrt(k / len(self))
+            # Beyond this radius a point's circle covers every polygon
+            limit = shapely.distance(points, shapely.box(xmin, ymin, xmax, ymax)) + np.hypot(xmax - xmin, ymax - ymin)
+
+        while pending.size:
+            if max_distance is not None:
+                radius = min(radius, max_distance)
+            query, positions = self.tree.query(points[pending], predicate="dwithin", distance=radius)
+            keep = self._passes(positions, where)
+            query, positions = pending[query[keep]], positions[keep]
+            counts = np.bincount(query, minlength=len(points))[pending]
+
+            last_round = (radius >= limit[pending]) | (max_distance is not None and radius >= max_distance)
+            done = pending[(counts >= k) | last_round]
+            selected = np.isin(query, done)
+            if selected.any():
+                q, p = query[selected], positions[selected]
+                d = shapely.distance(points[q], self.geometries[p])
+                order = np.lexsort((d, q))
+                q, p, d = q[order], p[order], d[order]
+                take = _rank_within(q) < k
+                query_out.append(q[take])
+                positions_out.append(p[take])
+                distance_out.append(d[take])
+
+            pending = np.setdiff1d(pending, done)
+            radius *= 2
+
+        query = np.concatenate(query_out) if query_out else np.empty(0, dtype=np.int64)
+        positions = np.concatenate(positions_out) if positions_out else np.empty(0, dtype=np.int64)
+        distance = np.concatenate(distance_out) if distance_out else np.empty(0)
+        order = np.lexsort((distance, query))
+
+        result = self.gdf.iloc[positions[order]].copy()
+        result.insert(0, "query", query[order])
+        result.insert(1, "distance", distance[order])
+        return result
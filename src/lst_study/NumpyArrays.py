@@ -1,59 +1,105 @@
-
 import rasterio
 import numpy as np
-import geopandas as gpd
 from rasterio.features import geometry_mask
-import matplotlib.pyplot as plt
-import os
+from rasterio.warp import reproject, Resampling
+from rasterio.windows import Window
+from .raster_cache import cached_band
+from .raster_store import open_at_resolution
+from .Rendering import finish_figure
+from .StreamingStats import accumulate_arrays, render_density
+from .vector_store import BOUNDARY_PATH, DATA_DIR, read_projected
+
+
+def _aoi_window(src, bounds):
+    """
+    Smallest pixel window of `src` covering the AOI bounds, clipped to the raster.
+    """
+    inv = ~src.transform
+    xmin, ymin, xmax, ymax = bounds
+    cols, rows = zip(*(inv * (x, y) for x, y in [(xmin, ymax), (xmax, ymin)]))
+    row0, row1 = int(np.floor(min(rows))), int(np.ceil(max(rows)))
+    col0, col1 = int(np.floor(min(cols))), int(np.ceil(max(cols)))
+    row0, col0 = max(row0, 0), max(col0, 0)
+    row1, col1 = min(row1, src.height), min(col1, src.width)
+    return Window(col0, row0, max(col1 - col0, 0), max(row1 - row0, 0))
+
+
+def threshold_and_mask_modis(raster_path, aoi_shp, threshold=25, windowed=True, nodata=None):
+    """
+    Mask MODIS LST above `threshold`, nodata and outside the AOI.
+
+    windowed=True reads only the AOI's bounding window and rasterizes the
+    AOI for that window, so memory is proportional to the AOI, not to the
+    source tile. windowed=False returns the full raster extent. The band is
+    decoded to float32 °C once per run through the raster cache (see
+    raster_cache.py); the result is the only array allocated. Decoded
+    nodata is already NaN, so 0 °C is kept; `nodata` is only needed for
+    legacy float rasters that store missing pixels as 0 without declaring it.
+
+    Returns: (masked_array, transform, crs, aoi_gdf)
+    """
+    with rasterio.open(raster_path) as src:
+        crs = src.crs
+        mask_gdf = read_projected(aoi_shp, crs)
+
+        window = _aoi_window(src, mask_gdf.total_bounds) if windowed else None
+        transform = src.transform if window is None else src.window_transform(window)
+    # Read-only view of the decoded band
+    lst = cached_band(raster_path, window=window)
+
+    # True where the pixel must become NaN: outside the AOI, above the
+    # threshold or equal to an undeclared legacy `nodata`. Built in one
+    # boolean buffer, then applied in a single copy.
+    invalid = geometry_mask(
+        [geom for geom in mask_gdf.geometry],
+        transform=transform,
+        out_shape=lst.shape
+    )
+    invalid |= lst > threshold
+    if nodata is not None:
+        invalid |= lst == nodata
+    modis_data = np.where(invalid, np.float32(np.nan), lst)
+
+    return modis_data, transform, crs, mask_gdf
 
 
 def plot_threhold_and_masked_modis(
     raster_path="src/lst_study/Outputs/Data/modis_image/modis_lst_mean_2025.tif", 
-    aoi_shp="src/lst_study/Outputs/Data/ams_boundary/amsterdam_boundary.shp",
+    aoi_shp=BOUNDARY_PATH,
     threshold=25, 
     output_path="Outputs/Maps/Threshold.png", 
-    cmap="hot"
+    cmap="hot",
+    windowed=False
 ):
 
     # -------------------------
-    # Load raster
-    # -------------------------
-    with rasterio.open(raster_path) as src:
-        modis_data = src.read(1).astype(float)  # ensure float for NaN
-        transform = src.transform
-        crs=src.crs
-        height, width = src.height, src.width
-
-    # -------------------------
-    # Mask by threshold and nodata
+    # Load raster, mask by threshold, nodata and AOI
+    # (windowed=True reads only the AOI window, see threshold_and_mask_modis)
     # -------------------------
-    modis_masked = np.where(modis_data > threshold, np.nan, modis_data)
-    modis_masked = np.where(modis_masked == 0, np.nan, modis_masked)
-
-    # -------------------------
-    # Load AOI polygon
-    # -------------------------
-    mask_gdf = gpd.read_file(aoi_shp)
-    mask_gdf = mask_gdf.to_crs(crs)
-
-    # -------------------------
-    # Create AOI mask
-    # -------------------------
-    mask = geometry_mask(
-        [geom for geom in mask_gdf.geometry],
-        transform=transform,
-        invert=True,
-        out_shape=(height, width)
+    modis_masked_aoi, transform, crs, mask_gdf = threshold_and_mask_modis(
+        raster_path, aoi_shp, threshold=threshold, windowed=windowed
     )
-
-    # Apply AOI mask
-    modis_masked_aoi = np.where(mask, modis_masked, np.nan)
+    height, width = modis_masked_aoi.shape
     print("MODIS masked shape:", modis_masked_aoi.shape)
 
     # -------------------------
     # Plot raster + AOI shape
     # -------------------------
+    render_threshold_map(
+        modis_masked_aoi, transform, mask_gdf,
+        threshold=threshold, output_path=output_path, cmap=cmap
+    )
+
+    return modis_masked_aoi
 
+
+def render_threshold_map(modis_masked_aoi, transform, mask_gdf, threshold=25, output_path=None, cmap="hot"):
+    """
+    Map of the masked MODIS LST with the AOI outline.
+    """
+    import matplotlib.pyplot as plt
+
+    height, width = modis_masked_aoi.shape
     fig, ax = plt.subplots(figsize=(8,6))
     xmin, ymin = transform * (0, height)
     xmax, ymax = transform * (width, 0)
@@ -70,43 +116,44 @@ def plot_threhold_and_masked_modis(
     ax.set_title(f"MODIS LST (masked > {threshold}°C and clipped to AOI in Year 2025)")
     ax.axis("off")
 
-    # Save if requested
-    if output_path:
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
+    # Save if requested, show unless headless
+    finish_figure(fig, output_path)
 
-    plt.show()
 
-    return modis_masked_aoi
 
 
+def _lst_array(lst_path, nodata=None):
+    # Writable float32 °C copy of the decoded band (nodata already NaN)
+    lst = cached_band(lst_path)
+    if nodata is None:
+        return np.array(lst)
+    return np.where(lst == nodata, np.float32(np.nan), lst)
 
-import rasterio
-from rasterio.warp import reproject, Resampling
-import numpy as np
-import matplotlib.pyplot as plt
-
-def st_ndvi_plot(lst_path="src/lst_study/Outputs/Data/modis_image/modis_lst_mean_2025.tif",
-                 sentinel_path="src/lst_study/Outputs/Data/ndvi/sentinel2_mosaic.tif"):
 
+def lst_ndvi_arrays(lst_path="src/lst_study/Outputs/Data/modis_image/modis_lst_mean_2025.tif",
+                    sentinel_path="src/lst_study/Outputs/Data/ndvi/sentinel2_mosaic.tif",
+                    nodata=None):
+    """
+    MODIS LST and Sentinel-2 NDVI on the MODIS grid (NaN where missing).
+    `nodata` masks an undeclared legacy LST value, as in threshold_and_mask_modis.
+    Returns: (lst, ndvi) as float32 arrays
+    """
     # --- Load MODIS ---
     with rasterio.open(lst_path) as src_modis:
-        lst = src_modis.read(1).astype(float)
-        lst[lst == 0] = np.nan
         modis_meta = src_modis.meta.copy()
+    lst = _lst_array(lst_path, nodata)
 
     # --- Load Sentinel bands ---
     with rasterio.open(sentinel_path) as src_sen:
-        RED = src_sen.read(1).astype(float)
-        NIR = src_sen.read(2).astype(float)
+        RED = src_sen.read(1, out_dtype="float32")
+        NIR = src_sen.read(2, out_dtype="float32")
         RED[RED == 0] = np.nan
         NIR[NIR == 0] = np.nan
-        sen_meta = src_sen.meta.copy()
 
     # --- Resample Sentinel2 to MODIS resolution ---
-    shape = lst.shape  
-    RED_resampled = np.empty(shape, dtype=float)
-    NIR_resampled = np.empty(shape, dtype=float)
+    shape = lst.shape
+    RED_resampled = np.empty(shape, dtype=np.float32)
+    NIR_resampled = np.empty(shape, dtype=np.float32)
 
     reproject(
         source=RED,
@@ -131,41 +178,138 @@ def st_ndvi_plot(lst_path="src/lst_study/Outputs/Data/modis_image/modis_lst_mean
     # --- Calculate NDVI ---
     ndvi = (NIR_resampled - RED_resampled) / (NIR_resampled + RED_resampled + 1e-10)
 
-    # --- Flatten and remove NaNs ---
-    valid = ~np.isnan(lst) & ~np.isnan(ndvi)
-    lst_flat = lst[valid]
-    ndvi_flat = ndvi[valid]
-
-    # --- Correlation ---
-    corr = np.corrcoef(lst_flat, ndvi_flat)[0,1]
-    print(f"LST-NDVI correlation: {corr:.3f}")
-
-    # --- Scatter plot ---
-    plt.figure(figsize=(6,5))
-    plt.scatter(ndvi_flat, lst_flat, s=1, alpha=0.3, c=lst_flat, cmap="hot")
-    plt.xlabel("NDVI")
-    plt.ylabel("LST (°C)")
-    plt.title(f"LST vs NDVI (r={corr:.3f}) for Year 2025")
-    plt.colorbar(label="LST (°C)")
-    plt.savefig("Outputs/Maps/LSTandNDVI.png", dpi=300, bbox_inches='tight')
-    plt.show()
+    return lst, ndvi
+
+
+def _ndvi_from_bands(RED, NIR):
+    """
+    NDVI from float32 RED/NIR reflectances, NaN where either band is 0 (nodata).
+    """
+    invalid = (RED == 0) | (NIR == 0) | np.isnan(RED) | np.isnan(NIR)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ndvi = (NIR - RED) / (NIR + RED + np.float32(1e-10))
+    ndvi[invalid] = np.nan
+    return ndvi
+
+
+def lst_ndvi_arrays_streaming(lst_path="src/lst_study/Outputs/Data/modis_image/modis_lst_mean_2025.tif",
+                              sentinel_path="src/lst_study/Outputs/Data/ndvi/sentinel2_mosaic.tif",
+                              block_size=256, oversample=None, nodata=None):
+    """
+    MODIS LST and Sentinel-2 NDVI on the MODIS grid, computed block by block.
+
+    The MODIS grid is walked in blocks of `block_size` pixels; for each block
+    only the matching Sentinel window (plus a small margin) is read, NDVI is
+    computed in float32 and aggregated onto the block with one `average`
+    warp. Memory is bounded by the block size, and NDVI is averaged rather
+    than computed from averaged reflectances.
+
+    oversample=None (default) reads native 10 m. With an integer, a Sentinel
+    COG with overviews is read at the coarsest level that still has
+    `oversample` pixels per MODIS pixel and axis (e.g. 160 m for 1 km
+    MODIS), which decodes far fewer tiles. This is an approximation for
+    quick looks: overview pixels are block-averaged RED/NIR (see
+    raster_store.OVERVIEW_RESAMPLING), so NDVI is then computed from
+    averaged reflectances within each overview pixel.
+    `nodata` masks an undeclared legacy LST value, as in threshold_and_mask_modis.
+    Returns: (lst, ndvi) as float32 arrays, NaN where missing.
+    """
+    from rasterio.warp import transform_bounds
+    from rasterio.transform import array_bounds
+    from affine import Affine
+    from .Tensors import iter_tiles
+
+    # --- Load MODIS (small, 1 km) ---
+    with rasterio.open(lst_path) as src_modis:
+        modis_transform = src_modis.transform
+        modis_crs = src_modis.crs
+    lst = _lst_array(lst_path, nodata)
+
+    ndvi = np.full(lst.shape, np.nan, dtype=np.float32)
+
+    if oversample is None:
+        src_sen = rasterio.open(sentinel_path)
+    else:
+        # Size of one MODIS pixel in the Sentinel CRS
+        with rasterio.open(sentinel_path) as src_sen:
+            sen_crs = src_sen.crs
+        west, south, east, north = transform_bounds(
+            modis_crs, sen_crs, *array_bounds(lst.shape[0], lst.shape[1], modis_transform)
+        )
+        modis_pixel = min((east - west) / lst.shape[1], (north - south) / lst.shape[0])
+        src_sen = open_at_resolution(sentinel_path, modis_pixel, oversample)
+
+    with src_sen:
+        margin_x, margin_y = 2 * src_sen.res[0], 2 * src_sen.res[1]
+        for r0, r1, c0, c1 in iter_tiles(lst.shape[0], lst.shape[1], block_size):
+            dst_transform = modis_transform * Affine.translation(c0, r0)
+            west, south, east, north = array_bounds(r1 - r0, c1 - c0, dst_transform)
+            west, south, east, north = transform_bounds(modis_crs, src_sen.crs, west, south, east, north)
+            window = _aoi_window(src_sen, (west - margin_x, south - margin_y, east + margin_x, north + margin_y))
+            if window.width == 0 or window.height == 0:
+                continue
+
+            # --- NDVI at native resolution for this window only ---
+            RED, NIR = src_sen.read((1, 2), window=window, out_dtype="float32")
+            ndvi_native = _ndvi_from_bands(RED, NIR)
+            del RED, NIR
+
+            # --- One average warp onto the MODIS block ---
+            block = np.full((r1 - r0, c1 - c0), np.nan, dtype=np.float32)
+            reproject(
+                source=ndvi_native,
+                destination=block,
+                src_transform=src_sen.window_transform(window),
+                src_crs=src_sen.crs,
+                src_nodata=np.nan,
+                dst_transform=dst_transform,
+                dst_crs=modis_crs,
+                dst_nodata=np.nan,
+                resampling=Resampling.average
+            )
+            ndvi[r0:r1, c0:c1] = block
 
     return lst, ndvi
 
 
-# Exploring different cappabilities of NumpyArrays
+def st_ndvi_plot(lst_path="src/lst_study/Outputs/Data/modis_image/modis_lst_mean_2025.tif",
+                 sentinel_path="src/lst_study/Outputs/Data/ndvi/sentinel2_mosaic.tif",
+                 output_path="Outputs/Maps/LSTandNDVI.png",
+                 streaming=True):
+
+    # streaming=True aggregates native-resolution NDVI block by block;
+    # streaming=False resamples the full RED/NIR bands first (original method)
+    if streaming:
+        lst, ndvi = lst_ndvi_arrays_streaming(lst_path, sentinel_path)
+    else:
+        lst, ndvi = lst_ndvi_arrays(lst_path, sentinel_path)
+
+    # --- Correlation, OLS and density grid in one tile-by-tile pass ---
+    stats = accumulate_arrays(ndvi, lst)
+    corr = stats.pearson()
+    print(f"LST-NDVI correlation: {corr:.3f} (Spearman {stats.spearman():.3f}, slope {stats.slope():.2f} °C per NDVI)")
 
+    # --- Density plot (2-D histogram instead of one marker per pixel) ---
+    render_density(stats, output_path=output_path, title=f"LST vs NDVI (r={corr:.3f}) for Year 2025")
+
+    return lst, ndvi
+
+
+# Exploring different cappabilities of NumpyArrays
+# Run from the repository root: python -m src.lst_study.NumpyArrays
 if __name__ == "__main__":
-    # Load MODIS raster
-    with rasterio.open("Outputs/Data/modis_image/modis_lst_mean_2025.tif") as src_modis:
-        modis_data = src_modis.read(1).astype(float)  
+    # Load MODIS raster (decoded float32 °C, read-only)
+    modis_path = f"{DATA_DIR}/modis_image/modis_lst_mean_2025.tif"
+    modis_data = cached_band(modis_path)
+    with rasterio.open(modis_path) as src_modis:
         modis_transform = src_modis.transform
         modis_shape = (src_modis.height, src_modis.width)
+    print("MODIS LST shape:", modis_shape)
 
-    # Load Sentinel bands (
-    with rasterio.open("Outputs/Data/sentinel_image/sentinel2_mosaic.tif") as src_sen:
-        NIR = src_sen.read(2).astype(float)  # band 2
-        RED = src_sen.read(1).astype(float)  # band 1
+    # Load Sentinel bands
+    with rasterio.open(f"{DATA_DIR}/ndvi/sentinel2_mosaic.tif") as src_sen:
+        NIR = src_sen.read(2, out_dtype="float32")  # band 2
+        RED = src_sen.read(1, out_dtype="float32")  # band 1
 
     # Handle nodata values (replace 0 with NaN)
     NIR[NIR == 0] = float('nan')
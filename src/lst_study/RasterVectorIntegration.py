@@ -1,12 +1,13 @@
 
 
-import geopandas as gpd
 import rasterio
 import rasterio.mask
-from rasterio.features import geometry_mask
-from rasterstats import zonal_stats
 import numpy as np
-import matplotlib.pyplot as plt
+import pandas as pd
+from .raster_cache import cached_band
+from .Rendering import finish_figure
+from .vector_store import AREA_COLUMN, EQUAL_AREA_CRS, read_projected
+from .ZonalStatistics import zonal_statistics as coverage_zonal_statistics
 
 #Pipeline
 
@@ -23,99 +24,196 @@ class RasterVectorIntegration:
         self.dominant_classes = None
         self.hottest_classes = None
 
-    def load_data(self):
-        self.amsboundary = gpd.read_file(self.vector_path)
-        self.landuse = gpd.read_file(self.lu_vector_path)
+    def load_data(self, columns=("landuse",)):
+        # Layers come in the raster's CRS, reprojected once and cached (with
+        # an equal-area area_m2 column); land use is limited to the AOI's
+        # extent and the attribute columns used here
+        with rasterio.open(self.raster_path) as src:
+            crs = src.crs
+        self.amsboundary = read_projected(self.vector_path, crs)
+        self.landuse = read_projected(
+            self.lu_vector_path,
+            crs,
+            bbox=self.amsboundary.total_bounds,
+            columns=columns
+        )
         print("Vector data loaded.")
 
     def read_and_clip_raster(self):
         with rasterio.open(self.raster_path) as src:
+            # No-ops unless the layers were replaced by others in a different CRS
             self.amsboundary = self.amsboundary.to_crs(src.crs)
             self.landuse = self.landuse.to_crs(src.crs)
-            self.nodata = src.nodata
 
-            lst_clipped, self.lst_transform = rasterio.mask.mask(
+            outside, self.lst_transform, window = rasterio.mask.raster_geometry_mask(
                 src, self.amsboundary.geometry, crop=True
             )
-            self.lst_array = lst_clipped[0]
-            self.lst_array = np.ma.masked_equal(self.lst_array, self.nodata)
 
-        print("Raster data read and clipped.")
+        # The AOI window, decoded to float32 °C once per run (see
+        # raster_cache.py); nodata is NaN. The masked array wraps the
+        # read-only cached view without copying it.
+        lst = cached_band(self.raster_path, window=window)
+        self.lst_array = np.ma.masked_array(lst, mask=outside | np.isnan(lst))
+        self.nodata = np.nan
 
-    def zonal_statistics(self):
-        stats = zonal_stats(
-            self.landuse,
-            self.lst_array,
-            affine=self.lst_transform,
-            nodata=self.nodata,
-            stats=['mean', 'min', 'max']
-        )
-
-        self.landuse['mean_lst'] = [s['mean'] for s in stats]
-        self.landuse['min_lst'] = [s['min'] for s in stats]
-        self.landuse['max_lst'] = [s['max'] for s in stats]
-        print("Zonal statistics computed.")
+        print("Raster data read and clipped.")
 
-    def select_top_classes(self, top_n=10):
-        self.landuse['area_m2'] = self.landuse.geometry.area
+    def zonal_statistics(self, engine="coverage", fractional=False):
+        """
+        engine="coverage" rasterizes all polygons once and computes every
+        statistic in one vectorized pass (see ZonalStatistics.py);
+        engine="rasterstats" keeps the original per-polygon zonal_stats call.
+        fractional=True weights pixels by the share covered by each polygon.
+        """
+        if engine == "rasterstats":
+            from rasterstats import zonal_stats
+
+            stats = zonal_stats(
+                self.landuse,
+                self.lst_array,
+                affine=self.lst_transform,
+                nodata=self.nodata,
+                stats=['mean', 'min', 'max']
+            )
 
-        self.dominant_classes = (
-            self.landuse.groupby("landuse")
-            .agg(total_area_m2=("area_m2","sum"),
-                 avg_LST_mean=("mean_lst","mean"))
-            .sort_values("total_area_m2", ascending=False)
-            .head(top_n)
-            .reset_index()
-        )
+            self.landuse['mean_lst'] = [s['mean'] for s in stats]
+            self.landuse['min_lst'] = [s['min'] for s in stats]
+            self.landuse['max_lst'] = [s['max'] for s in stats]
+        elif engine == "coverage":
+            stats = coverage_zonal_statistics(
+                self.landuse,
+                self.lst_array,
+                self.lst_transform,
+                nodata=self.nodata,
+                fractional=fractional
+            )
 
-        self.hottest_classes = (
-            self.landuse.groupby("landuse")
-            .agg(total_area_m2=("area_m2","sum"),
-                 avg_LST_mean=("mean_lst","mean"))
-            .sort_values("avg_LST_mean", ascending=False)
-            .head(top_n)
-            .reset_index()
-        )
+            self.landuse['mean_lst'] = stats['mean']
+            self.landuse['min_lst'] = stats['min']
+            self.landuse['max_lst'] = stats['max']
+            self.landuse['count_lst'] = stats['count']
+            self.landuse['std_lst'] = stats['std']
+        else:
+            raise ValueError(f"Unknown zonal statistics engine: {engine}")
+        print("Zonal statistics computed.")
 
-        top_types = list(set(self.dominant_classes["landuse"].tolist() + 
-                             self.hottest_classes["landuse"].tolist()))
-        self.landuse['Classes_of_interest'] = self.landuse['landuse'].apply(
-            lambda x: x if x in top_types else 'Other'
+    def select_top_classes(self, top_n=10, area_weighted=False):
+        """
+        Rank land-use classes by total area (dominant) and by mean LST
+        (hottest) from one grouped aggregation, and label every polygon with
+        its class if it is in either top list, 'Other' otherwise.
+
+        area_weighted=True weights each polygon's mean LST by its area
+        instead of averaging polygon means. Areas come from the area_m2
+        column, or are computed in an equal-area (metric) CRS if it is missing.
+        """
+        landuse = self.landuse
+        if AREA_COLUMN not in landuse:
+            landuse[AREA_COLUMN] = landuse.geometry.to_crs(EQUAL_AREA_CRS).area
+
+        summary = class_summary(landuse, area_weighted=area_weighted)
+        self.dominant_classes = summary.sort_values("total_area_m2", ascending=False).head(top_n).reset_index()
+        self.hottest_classes = summary.sort_values("avg_LST_mean", ascending=False).head(top_n).reset_index()
+
+        top_types = pd.unique(pd.concat([self.dominant_classes["landuse"], self.hottest_classes["landuse"]]))
+        classes = landuse["landuse"].where(landuse["landuse"].isin(top_types), "Other")
+        landuse['Classes_of_interest'] = classes.astype(
+            pd.CategoricalDtype(sorted(set(top_types) | {"Other"}))
         )
         print("Top classes selected and categorized.")
 
+    def compute(self, top_n=10, engine="coverage", area_weighted=False):
+        """
+        Run the numeric part of the pipeline (no figures) and return the
+        land-use GeoDataFrame with its LST statistics and class labels.
+        """
+        self.load_data()
+        self.read_and_clip_raster()
+        self.zonal_statistics(engine=engine)
+        self.select_top_classes(top_n=top_n, area_weighted=area_weighted)
+        return self.landuse
+
+    def hotspot_index(self, crs=None):
+        """
+        Spatial/attribute query index over the land-use polygons and their
+        LST statistics (see HotspotIndex.py). Run after zonal_statistics().
+        """
+        if self.landuse is None or "mean_lst" not in self.landuse:
+            raise RuntimeError("Run zonal_statistics() first")
+        from .HotspotIndex import HotspotIndex
+
+        return HotspotIndex(self.landuse, value="mean_lst", crs=crs)
+
     def plot_result(self,output_path):
-        fig, ax = plt.subplots(2,2,figsize=(16,12))
-
-        # Land-use map
-        self.landuse.plot(column="Classes_of_interest", cmap="tab20",
-                          legend=True, ax=ax[0,0], edgecolor="black", linewidth=0.2)
-        self.amsboundary.boundary.plot(ax=ax[0,0], color="black", linewidth=1)
-        ax[0,0].set_title("Land-Use Map of Amsterdam")
-        ax[0,0].axis("off")
-
-        # Mean LST map
-        self.landuse.plot(column="mean_lst", cmap="YlGnBu",
-                          legend=True, ax=ax[0,1], edgecolor="black", linewidth=0.2,
-                          missing_kwds={"color":"lightgrey","label":"No Data"})
-        self.amsboundary.boundary.plot(ax=ax[0,1], color="black", linewidth=1)
-        ax[0,1].set_title("Mean LST per Land-Use Polygon on Year 2025")
-        ax[0,1].axis("off")
-
-        # Bar chart: dominant
-        ax[1,0].bar(self.dominant_classes["landuse"], self.dominant_classes["avg_LST_mean"], color="skyblue")
-        ax[1,0].set_ylabel("Mean LST (°C)")
-        ax[1,0].set_title("Top 10 Dominant Land Uses (by Area)")
-        ax[1,0].tick_params(axis="x", rotation=45)
-
-        # Bar chart: hottest
-        ax[1,1].bar(self.hottest_classes["landuse"], self.hottest_classes["avg_LST_mean"], color="salmon")
-        ax[1,1].set_ylabel("Mean LST (°C)")
-        ax[1,1].set_title("Top 10 Hottest Land Uses (by Mean LST)")
-        ax[1,1].tick_params(axis="x", rotation=45)
-
-        plt.tight_layout()
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.show()
+        render_landuse_result(
+            self.landuse, self.amsboundary, self.dominant_classes, self.hottest_classes,
+            output_path=output_path
+        )
 
 
+def class_summary(landuse, area_weighted=False) -> pd.DataFrame:
+    """
+    Per land-use class: total area (m²) and mean LST of its polygons,
+    indexed by class, in a single groupby pass.
+
+    The mean is over polygons with a mean_lst; area_weighted=True weights
+    them by area_m2.
+    """
+    lst = landuse["mean_lst"].astype(float)
+    area = landuse[AREA_COLUMN].astype(float)
+    has_lst = lst.notna()
+    frame = pd.DataFrame({
+        "landuse": landuse["landuse"],
+        "area": area,
+        "lst": lst,
+        "lst_area": (lst * area).where(has_lst, 0.0),
+        "lst_weight": area.where(has_lst, 0.0),
+    })
+    grouped = frame.groupby("landuse", observed=True).agg(
+        total_area_m2=("area", "sum"),
+        avg_LST_mean=("lst", "mean"),
+        lst_area=("lst_area", "sum"),
+        lst_weight=("lst_weight", "sum"),
+    )
+    if area_weighted:
+        grouped["avg_LST_mean"] = grouped["lst_area"] / grouped["lst_weight"].where(grouped["lst_weight"] > 0)
+    return grouped[["total_area_m2", "avg_LST_mean"]]
+
+
+def render_landuse_result(landuse, amsboundary, dominant_classes, hottest_classes, output_path=None):
+    """
+    Land-use map, mean LST map and the dominant / hottest class bar charts.
+    """
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(2,2,figsize=(16,12))
+
+    # Land-use map
+    landuse.plot(column="Classes_of_interest", cmap="tab20",
+                 legend=True, ax=ax[0,0], edgecolor="black", linewidth=0.2)
+    amsboundary.boundary.plot(ax=ax[0,0], color="black", linewidth=1)
+    ax[0,0].set_title("Land-Use Map of Amsterdam")
+    ax[0,0].axis("off")
+
+    # Mean LST map
+    landuse.plot(column="mean_lst", cmap="YlGnBu",
+                 legend=True, ax=ax[0,1], edgecolor="black", linewidth=0.2,
+                 missing_kwds={"color":"lightgrey","label":"No Data"})
+    amsboundary.boundary.plot(ax=ax[0,1], color="black", linewidth=1)
+    ax[0,1].set_title("Mean LST per Land-Use Polygon on Year 2025")
+    ax[0,1].axis("off")
+
+    # Bar chart: dominant
+    ax[1,0].bar(dominant_classes["landuse"], dominant_classes["avg_LST_mean"], color="skyblue")
+    ax[1,0].set_ylabel("Mean LST (°C)")
+    ax[1,0].set_title("Top 10 Dominant Land Uses (by Area)")
+    ax[1,0].tick_params(axis="x", rotation=45)
+
+    # Bar chart: hottest
+    ax[1,1].bar(hottest_classes["landuse"], hottest_classes["avg_LST_mean"], color="salmon")
+    ax[1,1].set_ylabel("Mean LST (°C)")
+    ax[1,1].set_title("Top 10 Hottest Land Uses (by Mean LST)")
+    ax[1,1].tick_params(axis="x", rotation=45)
+
+    plt.tight_layout()
+    finish_figure(fig, output_path)
@@ -1,47 +1,60 @@
 
 
-import glob
-import xarray as xr
-import rasterio
-import geopandas as gpd
-from rasterstats import zonal_stats
 import pandas as pd
-import rioxarray
-import matplotlib.pyplot as plt
 import os
+from .CubeStore import open_cube_store
+from .Rendering import finish_figure
+from .DataCube import list_lst_files, open_lst_cube, lst_timeseries_stats
+from .ZonalTimeseries import polygon_zonal_cube
+from .vector_store import BOUNDARY_PATH, DATA_DIR, read_vector
 
 
 # ------------------------------
 # Load multi-year rasters as Xarray cube
 # ------------------------------
 
-def datacube_lst_timeseries(raster_folder, output_path="Outputs/Maps/TimeSeriesPlot.png"):
-    # Get all raster files
-    files = sorted(glob.glob(os.path.join(raster_folder, "modis_lst_mean_*.tif")))
-    if not files:
-        print("No raster files found in the folder.")
-        return
-
-    # Load rasters as Xarray cube
-    ds_time = xr.concat([rioxarray.open_rasterio(f) for f in files], dim="time")
-    # Assign time from filename
-    ds_time["time"] = [f.split("_")[-1].split(".")[0] for f in files]
-    ds_time = ds_time.where(ds_time != 0)
-
-    # Compute statistics over spatial dimensions
-    mean_lst = ds_time.mean(dim=("x", "y"), skipna=True)
-    max_lst = ds_time.max(dim=("x", "y"), skipna=True)
-    min_lst = ds_time.min(dim=("x", "y"), skipna=True)
+def compute_lst_timeseries(raster_folder, chunks=None, workers=None, cached=True):
+    """
+    Per-year spatial LST statistics (DataFrame indexed by time), or None
+    when there are no rasters. `raster_folder` may also be a .zarr cube store.
+    cached=True reads the GeoTIFFs through the raster cache (see raster_cache.py).
+    """
+    if raster_folder.endswith(".zarr"):
+        # Consolidated cube store (see CubeStore.py), nodata already NaN
+        ds_time = open_cube_store(raster_folder)
+    else:
+        # Get all raster files
+        files = list_lst_files(raster_folder)
+        if not files:
+            print("No raster files found in the folder.")
+            return None
+
+        # Open rasters lazily as a chunked (Dask) Xarray cube, time from filename
+        # Layers are decoded with NaN for nodata; 0 °C is a valid value
+        ds_time = open_lst_cube(files, chunks=chunks, mask_nodata=False, cached=cached)
+
+    # Compute statistics over spatial dimensions in one fused pass,
+    # skipping NaN without building a masked copy
+    return lst_timeseries_stats(ds_time, workers=workers)
+
+
+def render_lst_timeseries(stats, output_path="Outputs/Maps/TimeSeriesPlot.png"):
+    """
+    Mean/max/min LST time series plot.
+    """
+    mean_lst, max_lst, min_lst = stats["mean"], stats["max"], stats["min"]
 
     # Compute y-axis limits with padding
     ymin = float(min_lst.min()) - 2
     ymax = float(max_lst.max()) + 2
 
     # Plot
-    plt.figure(figsize=(8,5))
-    plt.plot(ds_time["time"], mean_lst, marker="o", label="Mean LST")
-    plt.plot(ds_time["time"], max_lst, alpha=0.5, linestyle="--", label="Max LST")
-    plt.plot(ds_time["time"], min_lst, alpha=0.5, linestyle="--", label="Min LST")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(8,5))
+    plt.plot(stats.index, mean_lst, marker="o", label="Mean LST")
+    plt.plot(stats.index, max_lst, alpha=0.5, linestyle="--", label="Max LST")
+    plt.plot(stats.index, min_lst, alpha=0.5, linestyle="--", label="Min LST")
     plt.xlabel("Year")
     plt.ylabel("LST (°C)")
     plt.title("Land Surface Temperature Time Series")
@@ -49,19 +62,30 @@ def datacube_lst_timeseries(raster_folder, output_path="Outputs/Maps/TimeSeriesP
     plt.legend()
     plt.ylim(ymin, ymax)
 
-    # Save plot
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    # Save plot, show unless headless
+    finish_figure(fig, output_path)
+
 
+def datacube_lst_timeseries(raster_folder, output_path="Outputs/Maps/TimeSeriesPlot.png", chunks=None, workers=None):
+    stats = compute_lst_timeseries(raster_folder, chunks=chunks, workers=workers)
+    if stats is None:
+        return
+
+    render_lst_timeseries(stats, output_path=output_path)
     print(f"Time series plot saved to: {output_path}")
+    return stats
 
 
 
 # Exploring different cappabilities of Raster and Vector togeter like band-wise statistics, slicing
+# Run from the repository root: python -m src.lst_study.RasterandVectorDC
 if __name__ == "__main__":
+    import rioxarray
+
+    modis_dir = f"{DATA_DIR}/modis_image"
+
     # Load single raster
-    ds = rioxarray.open_rasterio("Outputs/Data/modis_image/modis_lst_mean_2020.tif")
+    ds = rioxarray.open_rasterio(f"{modis_dir}/modis_lst_mean_2020.tif", mask_and_scale=True)
     print(ds)
 
     # Band-wise statistics
@@ -69,10 +93,9 @@ if __name__ == "__main__":
     print("Band-wise mean values:")
     print(band_mean)
 
-    # Load multi-year rasters
-    files = sorted(glob.glob("Outputs/Data/modis_image/modis_lst_mean_*.tif")) 
-    ds_time = xr.concat([rioxarray.open_rasterio(f) for f in files], dim="time") 
-    ds_time["time"] = [f.split("_")[-1].split(".")[0] for f in files]
+    # Load multi-year rasters (lazy, chunked)
+    files = list_lst_files(modis_dir)
+    ds_time = open_lst_cube(files, mask_nodata=False)
     print(ds_time)
 
     # Spatio-temporal slicing
@@ -86,19 +109,12 @@ if __name__ == "__main__":
     print("Spatio-temporal slice:", spatio_temporal_slice)
 
     # Vector AOI
-    gdf = gpd.read_file("Outputs/Data/ams_boundary/amsterdam_boundary.shp")
+    gdf = read_vector(BOUNDARY_PATH)
     gdf = gdf.to_crs("EPSG:4326")  
 
-    # Zonal statistics
-    results = []
-    for f in files:
-        with rasterio.open(f) as src:
-            arr = src.read(1)
-            nodata= src.nodata
-            transform = src.transform
-            zs = zonal_stats(gdf, arr, affine=transform, stats=["mean","max", "min"], nodata=nodata )
-            zs[0]["time"] = f.split("_")[-1].split(".")[0]
-            results.append(zs[0])
-
-    df = pd.DataFrame(results)
+    # Zonal statistics for every year in one batched job: each raster is
+    # decoded once, and the coverage index is built once per grid and
+    # cached on disk (see ZonalTimeseries.py)
+    zonal_cube = polygon_zonal_cube(gdf, files, stats=["mean", "max", "min"])
+    df = zonal_cube.to_dataframe().reset_index()
     print(df)
@@ -0,0 +1,77 @@
+"""
+Rendering.py
+------------
+Figure output shared by the plotting functions, and a headless batch mode.
+
+Interactive runs save a figure (if an output path is given) and show it.
+In headless mode (set_headless(True), or LST_HEADLESS=1 in the
+environment) matplotlib uses the Agg backend, show() is skipped and
+figures are closed after saving. render_batch() renders figures in
+parallel worker processes, and only those that have an output path.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+_HEADLESS = os.environ.get("LST_HEADLESS", "") not in ("", "0")
+
+
+def set_headless(enabled: bool = True):
+    """
+    Switch headless mode on or off. Must be called before the first figure
+    is created for the Agg backend to take effect.
+    """
+    global _HEADLESS
+    _HEADLESS = enabled
+    if enabled:
+        import matplotlib
+
+        matplotlib.use("Agg")
+
+
+def is_headless() -> bool:
+    return _HEADLESS
+
+
+if _HEADLESS:
+    set_headless(True)
+
+
+def finish_figure(fig, output_path=None, dpi=300):
+    """
+    Save `fig` when an output path is given, then show it, or close it in
+    headless mode.
+    """
+    import matplotlib.pyplot as plt
+
+    if output_path:
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        fig.savefig(output_path, dpi=dpi, bbox_inches="tight")
+    if _HEADLESS:
+        plt.close(fig)
+    else:
+        plt.show()
+
+
+def _render_job(render, args, kwargs):
+    set_headless(True)
+    render(*args, **kwargs)
+    return kwargs["output_path"]
+
+
+def render_batch(jobs, workers=None):
+    """
+    Render figures in parallel worker processes, headless.
+
+    jobs: iterable of (render_function, args, kwargs); render functions must
+    be module-level (picklable) and take an `output_path` keyword. Jobs
+    without an output path are skipped, since nobody would see the figure.
+    Returns the written paths.
+    """
+    jobs = [(render, tuple(args), dict(kwargs)) for render, args, kwargs in jobs if kwargs.get("output_path")]
+    if not jobs:
+        return []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = [pool.submit(_render_job, render, args, kwargs) for render, args, kwargs in jobs]
+        return [f.result() for f in futures]
@@ -0,0 +1,215 @@
+"""
+StreamingStats.py
+-----------------
+Out-of-core bivariate statistics (e.g. LST vs NDVI) for rasters of any size.
+
+CorrelationAccumulator is updated tile by tile and keeps only running
+moments plus a fixed 2-D histogram, so memory is O(bins) regardless of the
+number of pixels. From that single pass it gives Pearson correlation, the
+OLS slope/intercept, Spearman correlation from binned ranks and the
+density grid used by render_density() in place of a per-point scatter.
+"""
+
+import os
+
+import numpy as np
+import rasterio
+
+from .Rendering import finish_figure
+
+
+class CorrelationAccumulator:
+    """
+    Streaming Pearson / OLS / binned-Spearman statistics of y against x.
+
+    Moments are merged with Chan et al.'s pairwise update, so they stay
+    accurate over hundreds of millions of pixels. Values outside the
+    histogram ranges still count in the moments and fall into the edge bins
+    of the histogram.
+    """
+
+    def __init__(self, x_range=(-1.0, 1.0), y_range=(-10.0, 60.0), bins=(200, 200)):
+        self.x_edges = np.linspace(x_range[0], x_range[1], bins[0] + 1)
+        self.y_edges = np.linspace(y_range[0], y_range[1], bins[1] + 1)
+        self.hist = np.zeros(bins, dtype=np.int64)
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def update(self, x, y):
+        """
+        Add one tile of paired values. Pairs where either value is NaN are skipped.
+        """
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        x, y = x[valid], y[valid]
+        n_b = x.shape[0]
+        if n_b == 0:
+            return self
+
+        mean_x_b, mean_y_b = x.mean(), y.mean()
+        dx, dy = x - mean_x_b, y - mean_y_b
+        self._merge_moments(n_b, mean_x_b, mean_y_b, dx @ dx, dy @ dy, dx @ dy)
+
+        xi = np.clip(np.searchsorted(self.x_edges, x, side="right") - 1, 0, self.hist.shape[0] - 1)
+        yi = np.clip(np.searchsorted(self.y_edges, y, side="right") - 1, 0, self.hist.shape[1] - 1)
+        self.hist += np.bincount(xi * self.hist.shape[1] + yi, minlength=self.hist.size).reshape(self.hist.shape)
+        return self
+
+    def _merge_moments(self, n_b, mean_x_b, mean_y_b, m2_x_b, m2_y_b, c_xy_b):
+        n_a = self.n
+        n = n_a + n_b
+        delta_x = mean_x_b - self.mean_x
+        delta_y = mean_y_b - self.mean_y
+        self.mean_x += delta_x * n_b / n
+        self.mean_y += delta_y * n_b / n
+        self.m2_x += m2_x_b + delta_x**2 * n_a * n_b / n
+        self.m2_y += m2_y_b + delta_y**2 * n_a * n_b / n
+        self.c_xy += c_xy_b + delta_x * delta_y * n_a * n_b / n
+        self.n = n
+
+    def merge(self, other):
+        """
+        Combine with an accumulator built on other tiles (same bins).
+        """
+        if other.n:
+            self._merge_moments(other.n, other.mean_x, other.mean_y, other.m2_x, other.m2_y, other.c_xy)
+            self.hist += other.hist
+        return self
+
+    def pearson(self) -> float:
+        if self.n < 2 or self.m2_x == 0 or self.m2_y == 0:
+            return np.nan
+        return self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+
+    def slope(self) -> float:
+        """
+        OLS slope of y on x.
+        """
+        return self.c_xy / self.m2_x if self.m2_x else np.nan
+
+    def intercept(self) -> float:
+        return self.mean_y - self.slope() * self.mean_x
+
+    def spearman(self) -> float:
+        """
+        Spearman correlation from the 2-D histogram: every value in a bin gets
+        the bin's mid-rank, so ties are resolved at bin resolution.
+        """
+        if self.n < 2:
+            return np.nan
+        count_x = self.hist.sum(axis=1)
+        count_y = self.hist.sum(axis=0)
+        rank_x = np.cumsum(count_x) - count_x + (count_x + 1) / 2.0
+        rank_y = np.cumsum(count_y) - count_y + (count_y + 1) / 2.0
+
+        w = self.hist.astype(np.float64)
+        mean_rx = (count_x * rank_x).sum() / self.n
+        mean_ry = (count_y * rank_y).sum() / self.n
+        drx, dry = rank_x - mean_rx, rank_y - mean_ry
+        cov = drx @ w @ dry
+        var_x = (count_x * drx**2).sum()
+        var_y = (count_y * dry**2).sum()
+        if var_x == 0 or var_y == 0:
+            return np.nan
+        return cov / np.sqrt(var_x * var_y)
+
+    def save(self, path):
+        """
+        Store the accumulator (histogram and moments) as .npz.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path, x_edges=self.x_edges, y_edges=self.y_edges, hist=self.hist,
+            moments=np.array([self.n, self.mean_x, self.mean_y, self.m2_x, self.m2_y, self.c_xy], dtype=np.float64),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            accumulator = cls.__new__(cls)
+            accumulator.x_edges = data["x_edges"]
+            accumulator.y_edges = data["y_edges"]
+            accumulator.hist = data["hist"]
+            n, accumulator.mean_x, accumulator.mean_y, accumulator.m2_x, accumulator.m2_y, accumulator.c_xy = (
+                float(v) for v in data["moments"]
+            )
+            accumulator.n = int(n)
+        return accumulator
+
+    def result(self) -> dict:
+        return {
+            "n": self.n,
+            "pearson": self.pearson(),
+            "spearman": self.spearman(),
+            "slope": self.slope(),
+            "intercept": self.intercept(),
+            "mean_x": self.mean_x,
+            "mean_y": self.mean_y,
+        }
+
+
+def accumulate_arrays(x, y, accumulator=None, block_size=1024):
+    """
+    Feed two aligned 2-D arrays (or memmaps) to an accumulator in row blocks.
+    """
+    accumulator = CorrelationAccumulator() if accumulator is None else accumulator
+    for r0 in range(0, x.shape[0], block_size):
+        accumulator.update(x[r0:r0 + block_size], y[r0:r0 + block_size])
+    return accumulator
+
+
+def accumulate_rasters(x_path, y_path, accumulator=None, x_band=1, y_band=1, nodata=None):
+    """
+    Feed two aligned single-band rasters to an accumulator, one internal
+    block window at a time, so neither raster is ever fully in memory.
+    Pixels that are nodata in either raster, or equal to `nodata` (legacy
+    rasters with an undeclared nodata value), are skipped. Scaled integer
+    rasters are decoded per window (see raster_store.py).
+    """
+    from .raster_store import read_band
+
+    accumulator = CorrelationAccumulator() if accumulator is None else accumulator
+    with rasterio.open(x_path) as src_x, rasterio.open(y_path) as src_y:
+        if (src_x.width, src_x.height, src_x.transform) != (src_y.width, src_y.height, src_y.transform):
+            raise ValueError("Rasters must share the same grid")
+        for _, window in src_x.block_windows(x_band):
+            x = read_band(src_x, x_band, window=window)
+            y = read_band(src_y, y_band, window=window)
+            if nodata is not None:
+                x[x == nodata] = np.nan
+                y[y == nodata] = np.nan
+            accumulator.update(x, y)
+    return accumulator
+
+
+def render_density(accumulator, output_path=None, xlabel="NDVI", ylabel="LST (°C)", title=None, cmap="hot"):
+    """
+    2-D histogram (log counts) of the accumulated pairs with the OLS line,
+    in place of a per-point scatter plot.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LogNorm
+
+    fig, ax = plt.subplots(figsize=(6,5))
+    counts = np.ma.masked_equal(accumulator.hist.T, 0)
+    # LogNorm needs at least one positive count
+    norm = LogNorm() if accumulator.n else None
+    mesh = ax.pcolormesh(accumulator.x_edges, accumulator.y_edges, counts, cmap=cmap, norm=norm)
+    fig.colorbar(mesh, ax=ax, label="Pixel count")
+
+    if accumulator.n >= 2:
+        xs = np.array([accumulator.x_edges[0], accumulator.x_edges[-1]])
+        ax.plot(xs, accumulator.intercept() + accumulator.slope() * xs, color="blue", linewidth=1, label="OLS fit")
+        ax.legend(loc="upper right")
+
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_title(title or f"{ylabel} vs {xlabel} (r={accumulator.pearson():.3f})")
+    finish_figure(fig, output_path)
@@ -0,0 +1,361 @@
+"""
+TensorBenchmark.py
+------------------
+Benchmark harness for Gaussian smoothing of LST rasters.
+
+Sweeps raster sizes, kernel sizes, sigmas, dtypes, backends and thread
+counts on synthetic rasters (no network, no input files) and records
+median / p95 wall time, megapixels per second and peak memory per
+configuration. Results are written as JSON and CSV so that runs from
+different commits can be diffed with compare_results().
+
+Usage:
+    python -m src.lst_study.TensorBenchmark --sizes modis_1km landsat_30m \\
+        --backends numpy_direct scipy --out Outputs/Tables/benchmark
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from .Tensors import gaussian_blur_numpy, gaussian_blur_tiled
+
+
+# Raster shapes (rows, cols) covering Amsterdam (~30 x 40 km) at different resolutions
+RASTER_SIZES = {
+    "modis_1km": (30, 40),
+    "landsat_30m": (1000, 1334),
+    "sentinel_20m": (1500, 2000),
+    "sentinel_10m": (3000, 4000),
+}
+
+BACKENDS = ("numpy_loop", "numpy_direct", "numpy_fft", "numpy_tiled", "scipy", "torch_cpu")
+
+# Backends whose thread count is a real parameter; the others run single-threaded
+THREADED_BACKENDS = ("numpy_tiled", "torch_cpu")
+
+# Backends that compute in the input dtype; the NumPy and torch blurs always
+# work in float32, so other dtypes are skipped for them
+FLOAT64_BACKENDS = ("scipy",)
+
+# The reference loop is far too slow above this many pixels
+MAX_LOOP_PIXELS = 250_000
+
+
+def synthetic_lst(shape, seed: int = 0, dtype=np.float32, nodata_fraction: float = 0.0) -> np.ndarray:
+    """
+    Reproducible LST-like field in °C: a smooth urban heat dome plus noise.
+    Optionally sets a fraction of pixels to NaN to mimic masked MODIS cells.
+    """
+    rng = np.random.default_rng(seed)
+    H, W = shape
+    yy, xx = np.mgrid[0:H, 0:W]
+    cy, cx = H / 2, W / 2
+    dome = 8.0 * np.exp(-(((yy - cy) / (0.3 * H)) ** 2 + ((xx - cx) / (0.3 * W)) ** 2))
+    lst = 22.0 + dome + rng.normal(0.0, 1.5, shape)
+    if nodata_fraction > 0:
+        lst[rng.random(shape) < nodata_fraction] = np.nan
+    return lst.astype(dtype)
+
+
+def _blur_function(backend: str, size: int, sigma: float, threads: int):
+    """
+    Return a callable f(lst) -> blurred for one backend, or None when the
+    backend is not installed.
+    """
+    if backend == "numpy_loop":
+        return lambda lst: gaussian_blur_numpy(lst, size, sigma, method="loop")[0]
+    if backend == "numpy_direct":
+        return lambda lst: gaussian_blur_numpy(lst, size, sigma, method="direct")[0]
+    if backend == "numpy_fft":
+        return lambda lst: gaussian_blur_numpy(lst, size, sigma, method="fft")[0]
+    if backend == "numpy_tiled":
+        return lambda lst: gaussian_blur_tiled(lst, size, sigma, workers=threads, method="direct")[0]
+    if backend == "scipy":
+        try:
+            from scipy.ndimage import gaussian_filter
+        except ImportError:
+            return None
+        # truncate so the kernel radius equals size // 2, as in gaussian_kernel
+        truncate = (size // 2) / sigma
+        return lambda lst: gaussian_filter(lst, sigma=sigma, mode="nearest", truncate=truncate)
+    if backend == "torch_cpu":
+        try:
+            import torch
+            import torch.nn.functional as F
+        except ImportError:
+            return None
+        from .Tensors import gaussian_kernel
+
+        # One conv2d per call, like the other backends: gaussian_blur_torch
+        # runs its own warm-up convolution, which `warmup` already covers here
+        kernel = torch.from_numpy(gaussian_kernel(size=size, sigma=sigma)).unsqueeze(0).unsqueeze(0)
+        pad = size // 2
+
+        def blur(lst):
+            x = torch.from_numpy(np.ascontiguousarray(lst, dtype=np.float32)).unsqueeze(0).unsqueeze(0)
+            return F.conv2d(F.pad(x, (pad, pad, pad, pad), mode="replicate"), kernel).squeeze().numpy()
+
+        return blur
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+@contextlib.contextmanager
+def _backend_threads(backend: str, threads: int):
+    """
+    Set torch's intra-op thread count for a torch run and restore it after,
+    so runs with isolate=False do not leak it into later configurations.
+    """
+    if backend != "torch_cpu":
+        yield
+        return
+    import torch
+
+    previous = torch.get_num_threads()
+    torch.set_num_threads(threads)
+    try:
+        yield
+    finally:
+        torch.set_num_threads(previous)
+
+
+def _max_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def benchmark_config(
+    raster: str,
+    shape,
+    backend: str,
+    size: int = 11,
+    sigma: float = 2.0,
+    dtype: str = "float32",
+    threads: int = 1,
+    repeats: int = 5,
+    warmup: int = 1,
+    seed: int = 0,
+) -> dict:
+    """
+    Time one configuration. Returns a flat dict (one result row), with
+    status "skipped" when the backend is unavailable, too slow for the size
+    or does not compute in `dtype`.
+    """
+    row = {
+        "raster": raster,
+        "height": shape[0],
+        "width": shape[1],
+        "backend": backend,
+        "kernel_size": size,
+        "sigma": sigma,
+        "dtype": dtype,
+        "threads": threads,
+        "repeats": repeats,
+    }
+    if backend == "numpy_loop" and shape[0] * shape[1] > MAX_LOOP_PIXELS:
+        return {**row, "status": "skipped"}
+    if np.dtype(dtype) != np.float32 and backend not in FLOAT64_BACKENDS:
+        return {**row, "status": "skipped"}
+
+    blur = _blur_function(backend, size, sigma, threads)
+    if blur is None:
+        return {**row, "status": "skipped"}
+
+    lst = synthetic_lst(shape, seed=seed, dtype=np.dtype(dtype))
+    with _backend_threads(backend, threads):
+        for _ in range(warmup):
+            blur(lst)
+
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            blur(lst)
+            times.append(time.perf_counter() - t0)
+
+        # Separate run for memory: tracemalloc slows the timed runs down
+        tracemalloc.start()
+        blur(lst)
+        _, peak_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    median = statistics.median(times)
+    megapixels = shape[0] * shape[1] / 1e6
+    return {
+        **row,
+        "status": "ok",
+        "median_sec": median,
+        "p95_sec": float(np.percentile(times, 95)),
+        "min_sec": min(times),
+        "megapixels_per_sec": megapixels / median if median > 0 else None,
+        "peak_alloc_mb": peak_alloc / (1024 * 1024),
+        "max_rss_mb": _max_rss_mb(),
+    }
+
+
+def _configs(sizes, backends, kernel_sizes, sigmas, dtypes, thread_counts):
+    for raster in sizes:
+        for backend in backends:
+            threads_for_backend = thread_counts if backend in THREADED_BACKENDS else [1]
+            for size in kernel_sizes:
+                for sigma in sigmas:
+                    for dtype in dtypes:
+                        for threads in threads_for_backend:
+                            yield raster, backend, size, sigma, dtype, threads
+
+
+def run_benchmark_suite(
+    sizes=("modis_1km", "landsat_30m"),
+    backends=BACKENDS,
+    kernel_sizes=(5, 11, 31),
+    sigmas=(2.0,),
+    dtypes=("float32", "float64"),
+    thread_counts=(1, 4),
+    repeats: int = 5,
+    warmup: int = 1,
+    isolate: bool = True,
+    seed: int = 0,
+) -> dict:
+    """
+    Run the full sweep. With isolate=True every configuration runs in a
+    fresh spawned process, so max_rss_mb is that configuration's own peak.
+    Returns {"metadata": {...}, "results": [row, ...]}.
+    """
+    results = []
+    for raster, backend, size, sigma, dtype, threads in _configs(
+        sizes, backends, kernel_sizes, sigmas, dtypes, thread_counts
+    ):
+        args = (raster, RASTER_SIZES[raster], backend, size, sigma, dtype, threads, repeats, warmup, seed)
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                row = pool.submit(benchmark_config, *args).result()
+        else:
+            row = benchmark_config(*args)
+        print(
+            f"{raster:>13} {backend:>13} k={size:<3} sigma={sigma:<4} {dtype} t={threads}: "
+            + (f"{row['median_sec']:.4f}s" if row["status"] == "ok" else row["status"])
+        )
+        results.append(row)
+
+    return {"metadata": _metadata(repeats, warmup, seed, isolate), "results": results}
+
+
+def _metadata(repeats, warmup, seed, isolate) -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "repeats": repeats,
+        "warmup": warmup,
+        "seed": seed,
+        "isolate": isolate,
+    }
+
+
+def write_results(report: dict, out_prefix: str):
+    """
+    Write <out_prefix>.json (metadata + rows) and <out_prefix>.csv (rows).
+    """
+    os.makedirs(os.path.dirname(out_prefix) or ".", exist_ok=True)
+    json_path = f"{out_prefix}.json"
+    csv_path = f"{out_prefix}.csv"
+
+    with open(json_path, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    fieldnames = sorted({key for row in report["results"] for key in row})
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(report["results"])
+
+    return json_path, csv_path
+
+
+def _config_key(row: dict) -> tuple:
+    return (row["raster"], row["backend"], row["kernel_size"], row["sigma"], row["dtype"], row["threads"])
+
+
+def compare_results(baseline: dict, candidate: dict) -> list[dict]:
+    """
+    Join two reports on their configuration and return the median-time
+    ratio (candidate / baseline) for every configuration both ran.
+    """
+    base = {_config_key(r): r for r in baseline["results"] if r["status"] == "ok"}
+    rows = []
+    for row in candidate["results"]:
+        key = _config_key(row)
+        if row["status"] != "ok" or key not in base:
+            continue
+        rows.append({
+            "raster": row["raster"],
+            "backend": row["backend"],
+            "kernel_size": row["kernel_size"],
+            "sigma": row["sigma"],
+            "dtype": row["dtype"],
+            "threads": row["threads"],
+            "baseline_median_sec": base[key]["median_sec"],
+            "candidate_median_sec": row["median_sec"],
+            "ratio": row["median_sec"] / base[key]["median_sec"],
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gaussian smoothing benchmark on synthetic LST rasters")
+    parser.add_argument("--sizes", nargs="+", default=["modis_1km", "landsat_30m"], choices=list(RASTER_SIZES))
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--kernel-sizes", nargs="+", type=int, default=[5, 11, 31])
+    parser.add_argument("--sigmas", nargs="+", type=float, default=[2.0])
+    parser.add_argument("--dtypes", nargs="+", default=["float32", "float64"], choices=["float32", "float64"])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--no-isolate", action="store_true", help="run all configurations in this process")
+    parser.add_argument("--out", default="Outputs/Tables/tensor_benchmark")
+    parser.add_argument("--compare", help="baseline JSON report to compare against")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark_suite(
+        sizes=args.sizes,
+        backends=args.backends,
+        kernel_sizes=args.kernel_sizes,
+        sigmas=args.sigmas,
+        dtypes=args.dtypes,
+        thread_counts=args.threads,
+        repeats=args.repeats,
+        warmup=args.warmup,
+        isolate=not args.no_isolate,
+    )
+    json_path, csv_path = write_results(report, args.out)
+    print(f"Saved: {json_path}, {csv_path}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for row in compare_results(baseline, report):
+            print(
+                f"{row['raster']:>13} {row['backend']:>13} k={row['kernel_size']:<3} "
+                f"{row['dtype']} t={row['threads']}: x{row['ratio']:.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,10 @@ Gaussian smoothing of Land Surface Temperature (LST)
 and performance comparison: NumPy vs PyTorch
 """
 
+import os
 import time
 import numpy as np
+
 def gaussian_kernel(size: int = 11, sigma: float = 2.0) -> np.ndarray:
     """
     Create a 2D Gaussian kernel (size x size) normalized to sum to 1.
@@ -21,12 +23,152 @@ def gaussian_kernel(size: int = 11, sigma: float = 2.0) -> np.ndarray:
     kernel /= kernel.sum()
     return kernel.astype(np.float32)
 
-def gaussian_blur_numpy(lst_2d: np.ndarray, size: int = 11, sigma: float = 2.0):
+def gaussian_kernel_1d(size: int = 11, sigma: float = 2.0) -> np.ndarray:
+    """
+    Create the 1D Gaussian kernel whose outer product with itself
+    equals gaussian_kernel(size, sigma).
+    """
+    if size % 2 == 0:
+        raise ValueError("size must be odd (e.g., 5, 7, 11)")
+
+    ax = np.arange(-(size // 2), size // 2 + 1, dtype=np.float32)
+    kernel = np.exp(-(ax**2) / (2.0 * sigma**2))
+    kernel /= kernel.sum()
+    return kernel.astype(np.float32)
+
+
+# Kernels at least this wide are convolved in the frequency domain
+FFT_MIN_KERNEL_SIZE = 31
+
+
+def _resolve_method(method: str, size: int) -> str:
+    if method == "auto":
+        method = "fft" if size >= FFT_MIN_KERNEL_SIZE else "direct"
+    if method not in ("loop", "direct", "fft"):
+        raise ValueError(f"Unknown method: {method}")
+    return method
+
+
+def _convolve_axis_direct(padded: np.ndarray, kernel_1d: np.ndarray, axis: int) -> np.ndarray:
+    """
+    'Valid' 1D convolution along one axis by accumulating shifted slices.
+    Memory stays at one output-sized buffer regardless of kernel size.
+    """
+    K = kernel_1d.shape[0]
+    n = padded.shape[axis] - K + 1
+    out = np.zeros(
+        padded.shape[:axis] + (n,) + padded.shape[axis + 1:], dtype=np.float32
+    )
+    index = [slice(None)] * padded.ndim
+    for t in range(K):
+        index[axis] = slice(t, t + n)
+        out += kernel_1d[t] * padded[tuple(index)]
+    return out
+
+
+def _convolve_axis_fft(padded: np.ndarray, kernel_1d: np.ndarray, axis: int) -> np.ndarray:
+    """
+    'Valid' 1D convolution along one axis using real FFTs.
+    """
+    K = kernel_1d.shape[0]
+    L = padded.shape[axis]
+    n_fft = 1 << int(np.ceil(np.log2(L + K - 1)))
+    spec = np.fft.rfft(padded, n=n_fft, axis=axis)
+    kspec = np.fft.rfft(kernel_1d.astype(np.float64), n=n_fft)
+    shape = [1] * padded.ndim
+    shape[axis] = kspec.shape[0]
+    full = np.fft.irfft(spec * kspec.reshape(shape), n=n_fft, axis=axis)
+    index = [slice(None)] * padded.ndim
+    index[axis] = slice(K - 1, L)
+    return full[tuple(index)].astype(np.float32)
+
+
+def _separable_blur_valid(padded: np.ndarray, kernel_1d: np.ndarray, method: str) -> np.ndarray:
+    """
+    Separable blur of an already padded block: one pass along rows, one
+    along columns. The result is `size - 1` pixels smaller on each axis.
+    """
+    convolve = _convolve_axis_fft if method == "fft" else _convolve_axis_direct
+    rows = convolve(padded, kernel_1d, axis=1)
+    return convolve(rows, kernel_1d, axis=0)
+
+
+def _blur_padded_block(
+    padded: np.ndarray, kernel_1d: np.ndarray, method: str, nodata: float | None = None
+) -> np.ndarray:
+    """
+    Blur an edge-padded float32 block in 'valid' mode.
+
+    Every output pixel depends only on its own K x K window, so blurring
+    tiles with a `size // 2` halo gives exactly the same values as blurring
+    the whole raster at once.
+    """
+    invalid = np.isnan(padded)
+    if nodata is not None:
+        invalid |= padded == nodata
+
+    if not invalid.any():
+        return _separable_blur_valid(padded, kernel_1d, method)
+
+    # Normalized convolution: blur(data * w) / blur(w), w = 0 on missing pixels
+    K = kernel_1d.shape[0]
+    pad = K // 2
+    weights = (~invalid).astype(np.float32)
+    data = np.where(invalid, np.float32(0), padded)
+    num = _separable_blur_valid(data, kernel_1d, method)
+    den = _separable_blur_valid(weights, kernel_1d, method)
+    full = _separable_blur_valid(np.ones((K, K), dtype=np.float32), kernel_1d, method)[0, 0]
+
+    # Windows without missing pixels keep the plain blur value
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = np.where(den == full, num, num / den)
+    out[invalid[pad:pad + out.shape[0], pad:pad + out.shape[1]] | (den <= 0)] = np.nan
+    return out
+
+
+def gaussian_blur_numpy(
+    lst_2d: np.ndarray,
+    size: int = 11,
+    sigma: float = 2.0,
+    method: str = "auto",
+    nodata: float | None = None,
+):
     """
     Apply Gaussian blur to a 2D array using NumPy.
+
+    method:
+      "loop"   - reference per-pixel 2D convolution (slow, kept for comparison)
+      "direct" - separable row/column passes with shifted-slice accumulation
+      "fft"    - separable row/column passes in the frequency domain
+      "auto"   - "fft" when size >= FFT_MIN_KERNEL_SIZE, otherwise "direct"
+
+    NaN pixels (and pixels equal to `nodata`) are handled by normalized
+    convolution in the vectorized methods: they carry no weight, so they
+    do not bleed into neighbours, and they stay NaN in the output.
+
     Returns: (blurred_array, runtime_seconds)
     """
+    method = _resolve_method(method, size)
     lst = lst_2d.astype(np.float32)
+
+    if method == "loop":
+        return _gaussian_blur_loop(lst, size=size, sigma=sigma)
+
+    kernel_1d = gaussian_kernel_1d(size=size, sigma=sigma)
+
+    t0 = time.perf_counter()
+    padded = np.pad(lst, pad_width=size // 2, mode="edge")
+    out = _blur_padded_block(padded, kernel_1d, method, nodata=nodata)
+    dt = time.perf_counter() - t0
+
+    return out, dt
+
+
+def _gaussian_blur_loop(lst: np.ndarray, size: int = 11, sigma: float = 2.0):
+    """
+    Reference per-pixel 2D convolution.
+    Returns: (blurred_array, runtime_seconds)
+    """
     kernel = gaussian_kernel(size=size, sigma=sigma)
     K = kernel.shape[0]
     pad = K // 2
@@ -45,6 +187,7 @@ def gaussian_blur_numpy(lst_2d: np.ndarray, size: int = 11, sigma: float = 2.0):
     dt = time.perf_counter() - t0
 
     return out, dt
+
 def gaussian_blur_torch(lst_2d: np.ndarray, size: int = 11, sigma: float = 2.0, device: str | None = None):
     """
     Apply Gaussian blur using PyTorch conv2d.
@@ -81,19 +224,209 @@ def gaussian_blur_torch(lst_2d: np.ndarray, size: int = 11, sigma: float = 2.0,
     out = y.squeeze().detach().cpu().numpy()
     return out, dt, device
 
-def run_tensor_benchmark(lst_2d: np.ndarray, size: int = 11, sigma: float = 2.0) -> dict:
+# ------------------------------
+# Tiled execution
+# ------------------------------
+def iter_tiles(height: int, width: int, tile_size: int = 512):
+    """
+    Yield (row_start, row_stop, col_start, col_stop) covering a raster.
+    """
+    for r0 in range(0, height, tile_size):
+        for c0 in range(0, width, tile_size):
+            yield r0, min(r0 + tile_size, height), c0, min(c0 + tile_size, width)
+
+
+def _halo_bounds(tile, height: int, width: int, halo: int):
+    """
+    Expand a tile by `halo` pixels, clipped to the raster.
+    Returns the clipped bounds and the edge padding still needed on each side.
+    """
+    r0, r1, c0, c1 = tile
+    rr0, rr1 = max(r0 - halo, 0), min(r1 + halo, height)
+    cc0, cc1 = max(c0 - halo, 0), min(c1 + halo, width)
+    pad = ((halo - (r0 - rr0), halo - (rr1 - r1)), (halo - (c0 - cc0), halo - (cc1 - c1)))
+    return (rr0, rr1, cc0, cc1), pad
+
+
+def _blur_tile(block: np.ndarray, pad, size: int, sigma: float, method: str, nodata: float | None):
+    """
+    Blur one tile read with its halo. Edge padding is only added where the
+    halo falls outside the raster, exactly as the untiled run pads.
+    """
+    block = np.pad(block.astype(np.float32), pad, mode="edge")
+    kernel_1d = gaussian_kernel_1d(size=size, sigma=sigma)
+    return _blur_padded_block(block, kernel_1d, method, nodata=nodata)
+
+
+def _blur_geotiff_tile(src_path: str, band: int, tile, size: int, sigma: float, method: str, nodata):
+    """
+    Read one tile plus halo from a GeoTIFF window and blur it.
+    Opens its own dataset handle so it is safe in threads and processes.
+    """
+    import rasterio
+    from rasterio.windows import Window
+
+    from .raster_store import read_band
+
+    with rasterio.open(src_path) as src:
+        (rr0, rr1, cc0, cc1), pad = _halo_bounds(tile, src.height, src.width, size // 2)
+        block = read_band(src, band, window=Window(cc0, rr0, cc1 - cc0, rr1 - rr0))
+    return tile, _blur_tile(block, pad, size, sigma, method, nodata)
+
+
+def _make_executor(executor: str, workers: int | None):
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=workers)
+    if executor == "process":
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError("executor must be 'thread' or 'process'")
+
+
+def _run_bounded(pool, fn, jobs, max_in_flight: int):
+    """
+    Submit jobs to a pool, keeping at most `max_in_flight` pending so that
+    peak memory stays bounded by tile size x workers. Yields results in
+    completion order.
+    """
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    pending = set()
+    for job in jobs:
+        pending.add(pool.submit(fn, *job))
+        if len(pending) >= max_in_flight:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+    for fut in pending:
+        yield fut.result()
+
+
+def gaussian_blur_tiled(
+    lst_2d: np.ndarray,
+    size: int = 11,
+    sigma: float = 2.0,
+    tile_size: int = 512,
+    workers: int | None = None,
+    executor: str = "thread",
+    method: str = "direct",
+    nodata: float | None = None,
+):
+    """
+    Apply the NumPy Gaussian blur tile by tile with a `size // 2` halo,
+    in a thread pool (NumPy releases the GIL) or a process pool.
+    Unlike gaussian_blur_numpy ("auto"), the default is "direct" for every
+    kernel size, so the result is bit-identical to the untiled direct blur.
+    method="fft" or "auto" is faster for large kernels but only matches the
+    untiled result to float32 rounding (about 1e-5 relative).
+    Returns: (blurred_array, runtime_seconds)
+    """
+    method = _resolve_method(method, size)
+    if method == "loop":
+        raise ValueError("The tiled executor needs a vectorized method")
+
+    H, W = lst_2d.shape
+    halo = size // 2
+    out = np.empty((H, W), dtype=np.float32)
+
+    def jobs():
+        for tile in iter_tiles(H, W, tile_size):
+            (rr0, rr1, cc0, cc1), pad = _halo_bounds(tile, H, W, halo)
+            yield lst_2d[rr0:rr1, cc0:cc1], pad, size, sigma, method, nodata, tile
+
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    with _make_executor(executor, workers) as pool:
+        for (r0, r1, c0, c1), result in _run_bounded(pool, _blur_tile_job, jobs(), 2 * workers):
+            out[r0:r1, c0:c1] = result
+    dt = time.perf_counter() - t0
+
+    return out, dt
+
+
+def _blur_tile_job(block, pad, size, sigma, method, nodata, tile):
+    # Module-level so that process pools can pickle it
+    return tile, _blur_tile(block, pad, size, sigma, method, nodata)
+
+
+def gaussian_blur_geotiff(
+    src_path: str,
+    dst_path: str,
+    size: int = 11,
+    sigma: float = 2.0,
+    band: int = 1,
+    tile_size: int = 512,
+    workers: int | None = None,
+    executor: str = "thread",
+    method: str = "direct",
+):
+    """
+    Blur one band of a GeoTIFF tile by tile and write a float32 GeoTIFF.
+    Blocks are read straight from windows of the source, so the raster never
+    has to fit in memory; the source nodata value is treated as missing.
+    `method` defaults to "direct", as in gaussian_blur_tiled.
+    Returns: (dst_path, runtime_seconds)
+    """
+    import rasterio
+    from rasterio.windows import Window
+
+    method = _resolve_method(method, size)
+    if method == "loop":
+        raise ValueError("The tiled executor needs a vectorized method")
+
+    with rasterio.open(src_path) as src:
+        profile = src.profile.copy()
+        nodata = src.nodata
+        H, W = src.height, src.width
+
+    block = max(16, (min(tile_size, 512) // 16) * 16)
+    profile.update(
+        count=1, dtype="float32", nodata=np.nan,
+        tiled=True, blockxsize=block, blockysize=block,
+    )
+    os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
+
+    jobs = ((src_path, band, tile, size, sigma, method, nodata) for tile in iter_tiles(H, W, tile_size))
+
+    workers = workers or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    with rasterio.open(dst_path, "w", **profile) as dst, _make_executor(executor, workers) as pool:
+        for (r0, r1, c0, c1), result in _run_bounded(pool, _blur_geotiff_tile, jobs, 2 * workers):
+            dst.write(result, 1, window=Window(c0, r0, c1 - c0, r1 - r0))
+    dt = time.perf_counter() - t0
+
+    return dst_path, dt
+
+def run_tensor_benchmark(
+    lst_2d: np.ndarray, size: int = 11, sigma: float = 2.0, repeats: int = 1, method: str = "auto"
+) -> dict:
     """
     Runs Gaussian smoothing with NumPy and PyTorch and returns timings + outputs.
+    With repeats > 1 the reported times are medians over the repeats.
+    For full sweeps over sizes, backends and threads see TensorBenchmark.py.
     """
-    np_blur, t_np = gaussian_blur_numpy(lst_2d, size=size, sigma=sigma)
-    torch_blur, t_torch, device = gaussian_blur_torch(lst_2d, size=size, sigma=sigma)
+    np_times, torch_times = [], []
+    for _ in range(repeats):
+        np_blur, t_np = gaussian_blur_numpy(lst_2d, size=size, sigma=sigma, method=method)
+        torch_blur, t_torch, device = gaussian_blur_torch(lst_2d, size=size, sigma=sigma)
+        np_times.append(t_np)
+        torch_times.append(t_torch)
+
+    megapixels = lst_2d.shape[0] * lst_2d.shape[1] / 1e6
+    t_np, t_torch = float(np.median(np_times)), float(np.median(torch_times))
 
     return {
         "numpy_time_sec": t_np,
         "torch_time_sec": t_torch,
+        "numpy_time_std_sec": float(np.std(np_times)),
+        "torch_time_std_sec": float(np.std(torch_times)),
+        "numpy_megapixels_per_sec": megapixels / t_np if t_np > 0 else None,
+        "torch_megapixels_per_sec": megapixels / t_torch if t_torch > 0 else None,
         "torch_device": device,
         "numpy_blur": np_blur,
         "torch_blur": torch_blur,
         "kernel_size": size,
         "sigma": sigma,
+        "repeats": repeats,
     }
@@ -0,0 +1,318 @@
+"""
+ZonalStatistics.py
+------------------
+Single-pass zonal statistics for many polygons over one raster grid.
+
+Instead of rasterizing and masking every polygon on its own (as
+rasterstats.zonal_stats does), the polygons are turned once into a sparse
+pixel -> zone coverage table. Statistics for every zone are then computed
+in one vectorized pass with np.bincount and ufunc.reduceat.
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import shapely
+from affine import Affine
+from rasterio.features import MergeAlg, rasterize
+from rasterio.windows import from_bounds
+
+
+ZONAL_STATS = ("mean", "min", "max", "count", "std")
+
+
+class ZoneCoverage:
+    """
+    Sparse coverage table of a raster grid by a sequence of zones.
+
+    Entries are sorted by zone: entry k says that pixel `pixel[k]`
+    (flat index into a raster of `shape`) belongs to zone `zone[k]`
+    with weight `weight[k]` (1 for plain rasterization, the covered
+    fraction of the pixel for fractional coverage).
+    """
+
+    def __init__(self, zone, pixel, weight, n_zones, shape):
+        order = np.lexsort((pixel, zone))
+        self.zone = np.asarray(zone, dtype=np.int64)[order]
+        self.pixel = np.asarray(pixel, dtype=np.int64)[order]
+        self.weight = np.asarray(weight, dtype=np.float32)[order]
+        self.n_zones = int(n_zones)
+        self.shape = tuple(shape)
+
+    def __len__(self):
+        return self.zone.shape[0]
+
+    def __repr__(self):
+        return f"ZoneCoverage(zones={self.n_zones}, entries={len(self)}, shape={self.shape})"
+
+    def matvec(self, x, weights=None):
+        """
+        Sparse product A @ x, where A[zone, pixel] = weight: the weighted sum
+        of the flat raster `x` over every zone. `weights` (per entry)
+        overrides the stored weights, e.g. to drop invalid pixels.
+        """
+        w = self.weight if weights is None else weights
+        return np.bincount(self.zone, weights=w * np.asarray(x).ravel()[self.pixel], minlength=self.n_zones)
+
+    def save(self, path):
+        """
+        Save as a compressed .npz in CSR layout (zone row pointers, pixel
+        indices, weights).
+        """
+        indptr = np.searchsorted(self.zone, np.arange(self.n_zones + 1))
+        n_pixels = self.shape[0] * self.shape[1]
+        pixel_dtype = np.int32 if n_pixels < np.iinfo(np.int32).max else np.int64
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            indptr=indptr.astype(np.int64),
+            pixel=self.pixel.astype(pixel_dtype),
+            weight=self.weight,
+            shape=np.asarray(self.shape, dtype=np.int64),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            indptr = f["indptr"]
+            zone = np.repeat(np.arange(indptr.shape[0] - 1), np.diff(indptr))
+            return cls(zone, f["pixel"], f["weight"], indptr.shape[0] - 1, tuple(f["shape"]))
+
+
+def _window_has_any(summed, window, shape):
+    """
+    True if the window contains any flagged pixel, using a summed-area table.
+    """
+    r0 = max(int(np.floor(window.row_off)), 0)
+    c0 = max(int(np.floor(window.col_off)), 0)
+    r1 = min(int(np.ceil(window.row_off + window.height)), shape[0])
+    c1 = min(int(np.ceil(window.col_off + window.width)), shape[1])
+    if r1 <= r0 or c1 <= c0:
+        return False, None
+    total = summed[r1, c1] - summed[r0, c1] - summed[r1, c0] + summed[r0, c0]
+    return total > 0, (r0, r1, c0, c1)
+
+
+def _rasterize_coverage(geometries, transform, shape, all_touched):
+    """
+    Exact (pixel, zone) incidences for possibly overlapping geometries.
+
+    One rasterization gives the zone id of every pixel covered once; a
+    second, additive one counts how many zones cover each pixel. Only
+    geometries whose bounding window contains a multiply covered pixel are
+    rasterized again on their own window to resolve the overlaps.
+    """
+    labels = rasterize(
+        ((geom, i + 1) for i, geom in enumerate(geometries) if geom is not None and not geom.is_empty),
+        out_shape=shape, transform=transform, fill=0, all_touched=all_touched, dtype="int32",
+    )
+    hits = rasterize(
+        ((geom, 1) for geom in geometries if geom is not None and not geom.is_empty),
+        out_shape=shape, transform=transform, fill=0, all_touched=all_touched,
+        merge_alg=MergeAlg.add, dtype="int32",
+    )
+
+    single = np.flatnonzero(hits.ravel() == 1)
+    zones = [labels.ravel()[single] - 1]
+    pixels = [single]
+
+    overlapped = hits > 1
+    if overlapped.any():
+        summed = np.zeros((shape[0] + 1, shape[1] + 1), dtype=np.int64)
+        summed[1:, 1:] = overlapped.cumsum(0).cumsum(1)
+        for i, geom in enumerate(geometries):
+            if geom is None or geom.is_empty:
+                continue
+            window = from_bounds(*geom.bounds, transform=transform)
+            has_overlap, bounds = _window_has_any(summed, window, shape)
+            if not has_overlap:
+                continue
+            r0, r1, c0, c1 = bounds
+            inside = rasterize(
+                [(geom, 1)], out_shape=(r1 - r0, c1 - c0),
+                transform=transform * Affine.translation(c0, r0),
+                fill=0, all_touched=all_touched, dtype="uint8",
+            ).astype(bool)
+            rows, cols = np.nonzero(inside & overlapped[r0:r1, c0:c1])
+            pixels.append((rows + r0) * shape[1] + (cols + c0))
+            zones.append(np.full(rows.shape[0], i, dtype=np.int64))
+
+    return np.concatenate(zones), np.concatenate(pixels)
+
+
+def build_zone_coverage(geometries, transform, shape, all_touched=False, fractional=False, supersample=10):
+    """
+    Build the coverage table of a raster grid by `geometries` (in the raster CRS).
+
+    fractional=True weights each pixel by the share of it covered by the zone,
+    estimated on a `supersample` x `supersample` sub-grid. Use it on coarse
+    grids such as 1 km MODIS, where most land-use polygons cover only parts
+    of a pixel (or no pixel centre at all).
+    """
+    geometries = list(geometries)
+    shape = tuple(shape)
+
+    if not fractional:
+        zones, pixels = _rasterize_coverage(geometries, transform, shape, all_touched)
+        return ZoneCoverage(zones, pixels, np.ones(zones.shape[0], dtype=np.float32), len(geometries), shape)
+
+    s = int(supersample)
+    fine_shape = (shape[0] * s, shape[1] * s)
+    fine_transform = transform * Affine.scale(1.0 / s)
+    zones, fine_pixels = _rasterize_coverage(geometries, fine_transform, fine_shape, all_touched)
+
+    # Collapse sub-pixels onto their parent pixel and count them
+    fine_rows, fine_cols = np.divmod(fine_pixels, fine_shape[1])
+    pixels = (fine_rows // s) * shape[1] + fine_cols // s
+    keys, counts = np.unique(zones * (shape[0] * shape[1]) + pixels, return_counts=True)
+    zones, pixels = np.divmod(keys, shape[0] * shape[1])
+    return ZoneCoverage(zones, pixels, counts / float(s * s), len(geometries), shape)
+
+
+def _valid_values(values, nodata):
+    """
+    Flatten a raster (plain or masked array) to float64 values plus a validity mask.
+    """
+    mask = np.ma.getmaskarray(values).ravel() if np.ma.isMaskedArray(values) else None
+    data = np.ma.getdata(values).ravel().astype(np.float64)
+    valid = ~np.isnan(data)
+    if nodata is not None and not np.isnan(nodata):
+        valid &= data != nodata
+    if mask is not None:
+        valid &= ~mask
+    return data, valid
+
+
+def zonal_stats_table(coverage: ZoneCoverage, values, nodata=None, stats=ZONAL_STATS, index=None) -> pd.DataFrame:
+    """
+    Compute statistics for every zone of `coverage` in one pass over `values`.
+
+    Pixels equal to `nodata`, NaN or masked are ignored. Weighted coverage
+    gives weighted mean/std and a fractional count. Zones without valid
+    pixels get NaN (and count 0). Returns one row per zone, in zone order,
+    indexed by `index` when given (e.g. the GeoDataFrame index).
+    """
+    unknown = set(stats) - set(ZONAL_STATS)
+    if unknown:
+        raise ValueError(f"Unsupported statistics: {sorted(unknown)}")
+    if tuple(np.shape(values)) != coverage.shape:
+        raise ValueError(f"Raster shape {np.shape(values)} does not match coverage {coverage.shape}")
+
+    data, valid = _valid_values(values, nodata)
+    keep = valid[coverage.pixel]
+    zone = coverage.zone[keep]
+    v = data[coverage.pixel[keep]]
+    w = coverage.weight[keep].astype(np.float64)
+    n = coverage.n_zones
+
+    count = np.bincount(zone, weights=w, minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(zone, weights=w * v, minlength=n) / count
+    has_data = count > 0
+    mean[~has_data] = np.nan
+
+    out = {}
+    if "mean" in stats:
+        out["mean"] = mean
+    if "min" in stats or "max" in stats:
+        # Entries are sorted by zone, so each zone is one contiguous segment
+        present, starts = np.unique(zone, return_index=True)
+        if "min" in stats:
+            out["min"] = np.full(n, np.nan)
+            if present.size:
+                out["min"][present] = np.minimum.reduceat(v, starts)
+        if "max" in stats:
+            out["max"] = np.full(n, np.nan)
+            if present.size:
+                out["max"][present] = np.maximum.reduceat(v, starts)
+    if "count" in stats:
+        out["count"] = count
+    if "std" in stats:
+        # Two-pass variance avoids the cancellation of E[x^2] - E[x]^2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = np.bincount(zone, weights=w * (v - mean[zone]) ** 2, minlength=n) / count
+        var[~has_data] = np.nan
+        out["std"] = np.sqrt(var)
+
+    return pd.DataFrame({stat: out[stat] for stat in stats}, index=index)
+
+
+# ------------------------------
+# Persistent coverage index
+# ------------------------------
+def geometry_fingerprint(geometries) -> str:
+    """
+    Hash of the geometries' WKB, in order. Changes whenever any polygon,
+    or the order of the polygons, changes.
+    """
+    digest = hashlib.sha1()
+    for wkb in shapely.to_wkb(np.asarray(list(geometries), dtype=object), hex=False):
+        digest.update(b"" if wkb is None else wkb)
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+def coverage_cache_key(geometries, transform, shape, crs=None, all_touched=False, fractional=False, supersample=10) -> str:
+    """
+    Cache key of a coverage index: geometry hash, raster grid and
+    rasterization options.
+    """
+    parts = [
+        geometry_fingerprint(geometries),
+        ",".join(f"{v:.12g}" for v in tuple(transform)[:6]),
+        "x".join(str(int(n)) for n in shape),
+        "" if crs is None else str(crs),
+        f"all_touched={bool(all_touched)}",
+        f"fractional={bool(fractional)}:{int(supersample) if fractional else 0}",
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def load_or_build_coverage(
+    geometries,
+    transform,
+    shape,
+    crs=None,
+    all_touched=False,
+    fractional=False,
+    supersample=10,
+    cache_dir="cache/zonal_coverage",
+) -> ZoneCoverage:
+    """
+    Return the coverage index for these geometries on this raster grid,
+    building and saving it under `cache_dir` only the first time.
+    Later years, and later runs, on the same grid skip rasterization.
+    cache_dir=None always builds the coverage and saves nothing.
+    """
+    geometries = list(geometries)
+    path = None
+    if cache_dir:
+        key = coverage_cache_key(geometries, transform, shape, crs, all_touched, fractional, supersample)
+        path = os.path.join(cache_dir, f"coverage_{key}.npz")
+        if os.path.exists(path):
+            return ZoneCoverage.load(path)
+
+    coverage = build_zone_coverage(
+        geometries, transform, shape, all_touched=all_touched, fractional=fractional, supersample=supersample
+    )
+    if path is not None:
+        coverage.save(path)
+    return coverage
+
+
+def zonal_statistics(
+    gdf, values, transform, nodata=None, stats=ZONAL_STATS, all_touched=False, fractional=False
+) -> pd.DataFrame:
+    """
+    Zonal statistics of `values` for every geometry of `gdf` (already in the
+    raster CRS), aligned to gdf.index. Drop-in replacement for a
+    rasterstats.zonal_stats call over all polygons.
+    """
+    coverage = build_zone_coverage(
+        gdf.geometry, transform, np.shape(values), all_touched=all_touched, fractional=fractional
+    )
+    return zonal_stats_table(coverage, values, nodata=nodata, stats=stats, index=gdf.index)
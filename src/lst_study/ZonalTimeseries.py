@@ -0,0 +1,168 @@
+"""
+ZonalTimeseries.py
+------------------
+Zonal statistics of many polygons over a multi-year raster stack, as one
+(polygon, time) cube.
+
+Each yearly raster is decoded once and reduced for every polygon at once
+through the shared coverage index (see ZonalStatistics.py), which is
+built once per raster grid and cached on disk. Years can be processed in
+parallel threads. The result is an xarray Dataset with one variable per
+statistic; polygon attributes (e.g. land-use class, area) ride along as
+coordinates, so per-class series and warming trends are a groupby away.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import rasterio
+import xarray as xr
+from pyproj import CRS
+
+from .DataCube import list_lst_files, time_from_filename
+from .raster_cache import cached_band
+from .ZonalStatistics import load_or_build_coverage, zonal_stats_table
+
+
+ZONAL_CUBE_STATS = ("mean", "min", "max", "count")
+
+
+def _year_stats(path, crs, index, nodata, stats, coverage_for):
+    # One decode per raster; the coverage is shared by every polygon
+    with rasterio.open(path) as src:
+        if src.crs is not None and crs is not None and not CRS.from_user_input(src.crs).equals(crs):
+            raise ValueError(f"{path} is in {src.crs}, expected {crs}; all rasters must share one CRS")
+        transform = src.transform
+    # Decoded to float32 °C once per run (see raster_cache.py); the
+    # raster's own nodata is already NaN
+    values = cached_band(path)
+
+    coverage = coverage_for(transform, values.shape)
+    return zonal_stats_table(coverage, values, nodata=nodata, stats=stats, index=index)
+
+
+def polygon_zonal_cube(
+    gdf,
+    rasters,
+    stats=ZONAL_CUBE_STATS,
+    nodata=None,
+    attributes=("landuse", "area_m2"),
+    workers=None,
+    all_touched=False,
+    fractional=False,
+    cache_dir="cache/zonal_coverage",
+) -> xr.Dataset:
+    """
+    Per-polygon statistics for every raster of a time series.
+
+    gdf: polygons (reprojected to the rasters' CRS if needed).
+    rasters: list of single-band rasters, or a folder of modis_lst_mean_*.tif;
+    time stamps come from the file names.
+    nodata: value to ignore besides each raster's own nodata, which is
+    always skipped.
+    attributes: gdf columns kept as coordinates along `polygon` (missing
+    ones are skipped).
+    workers: number of years processed concurrently (1 = sequential).
+
+    Returns a Dataset with dimensions (polygon, time) and one variable per
+    statistic; `polygon` holds gdf.index.
+    """
+    files = list_lst_files(rasters) if isinstance(rasters, (str, os.PathLike)) else list(rasters)
+    if not files:
+        raise FileNotFoundError("No raster files to process")
+    times = pd.DatetimeIndex([time_from_filename(f) for f in files])
+
+    with rasterio.open(files[0]) as src:
+        crs = CRS.from_user_input(src.crs) if src.crs is not None else None
+    if crs is not None and gdf.crs is not None and not CRS.from_user_input(gdf.crs).equals(crs):
+        gdf = gdf.to_crs(crs)
+    geometries = list(gdf.geometry)
+
+    # One coverage per distinct grid (normally a single one for all years)
+    coverages = {}
+    lock = threading.Lock()
+
+    def coverage_for(transform, shape):
+        key = (tuple(transform), tuple(shape))
+        with lock:
+            if key not in coverages:
+                coverages[key] = load_or_build_coverage(
+                    geometries, transform, shape, crs=crs, all_touched=all_touched,
+                    fractional=fractional, cache_dir=cache_dir
+                )
+            return coverages[key]
+
+    def run(path):
+        return _year_stats(path, crs, gdf.index, nodata, stats, coverage_for)
+
+    if workers == 1 or len(files) == 1:
+        tables = [run(path) for path in files]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            tables = list(pool.map(run, files))
+
+    polygon = pd.Index(gdf.index, name="polygon")
+    data_vars = {
+        stat: (("polygon", "time"), np.column_stack([table[stat].to_numpy() for table in tables]))
+        for stat in stats
+    }
+    coords = {"polygon": polygon, "time": times}
+    for column in attributes:
+        if column in gdf.columns:
+            coords[column] = ("polygon", gdf[column].to_numpy())
+
+    ds = xr.Dataset(data_vars, coords=coords)
+    ds.attrs["crs"] = crs.to_wkt() if crs is not None else ""
+    return ds.sortby("time")
+
+
+def zonal_cube_to_parquet(ds, path):
+    """
+    Write the cube as a long (polygon, time) table.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    table = ds.to_dataframe().reset_index()
+    for column in table.columns:
+        if table[column].dtype == object:
+            table[column] = table[column].astype("string")
+    table.to_parquet(path, index=False)
+    return path
+
+
+def class_trends(ds, by="landuse", stat="mean", weight="area_m2") -> pd.DataFrame:
+    """
+    Warming trend per class: the class series of `stat` (weighted by the
+    `weight` coordinate when present, plain mean otherwise) and its OLS
+    slope in degrees per year, fitted over the years with data.
+    """
+    values = ds[stat]
+    if weight is not None and weight in ds.coords:
+        w = ds[weight].where(values.notnull(), 0.0)
+        series = (values.fillna(0.0) * w).groupby(by).sum() / w.groupby(by).sum()
+    else:
+        series = values.groupby(by).mean()
+    series = series.transpose(by, "time")
+
+    years = ds["time"].dt.year.to_numpy() + (ds["time"].dt.dayofyear.to_numpy() - 1) / 365.25
+    y = series.to_numpy()
+    has = np.isfinite(y)
+    n = has.sum(axis=1)
+    t = np.where(has, years, 0.0)
+    t_mean = t.sum(axis=1) / np.maximum(n, 1)
+    y_mean = np.where(has, y, 0.0).sum(axis=1) / np.maximum(n, 1)
+    dt = np.where(has, years - t_mean[:, None], 0.0)
+    dy = np.where(has, y - y_mean[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (dt * dy).sum(axis=1) / (dt ** 2).sum(axis=1)
+    slope[n < 2] = np.nan
+
+    table = series.to_pandas()
+    times = pd.DatetimeIndex(series["time"].values)
+    label = "%Y" if times.year.is_unique else "%Y-%m-%d"
+    table.columns = [f"{stat}_{time.strftime(label)}" for time in times]
+    table.insert(0, "trend_per_year", slope)
+    table.insert(1, "n_years", n)
+    return table
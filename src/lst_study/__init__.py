@@ -0,0 +1,27 @@
+"""
+LST study package.
+
+Submodules are imported on first attribute access (PEP 562), so
+`import lst_study` is cheap and Earth Engine, osmnx, geopandas, xarray
+and matplotlib only load when a module that needs them is used.
+"""
+
+import importlib
+
+_SUBMODULES = {
+    "CubeStore", "DataCube", "HotspotIndex", "NumpyArrays", "RasterVectorIntegration",
+    "RasterandVectorDC", "Rendering", "StreamingStats", "TensorBenchmark", "Tensors",
+    "VectorProcessing", "ZonalStatistics", "ZonalTimeseries", "data_collection",
+    "export_scheduler", "pipeline", "raster_cache", "raster_store", "request_cache",
+    "study_pipeline", "vector_store", "wfs_reader",
+}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES)
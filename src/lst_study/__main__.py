@@ -0,0 +1,118 @@
+"""
+__main__.py
+-----------
+Command line entry point: python -m lst_study <command> ...
+
+    python -m lst_study pipeline [stages] [--only] [--force] [--list]
+    python -m lst_study timeseries Outputs/Data/modis_image --out lst_timeseries.csv
+    python -m lst_study threshold modis_lst_mean_2025.tif --threshold 25 --out masked.tif
+    python -m lst_study cog Outputs/Data/ndvi/sentinel2_mosaic.tif
+    python -m lst_study benchmark --sizes modis_1km
+
+Only argparse is imported up front; each command imports what it needs
+when it runs, so --help and the local commands start quickly.
+"""
+
+import argparse
+import sys
+
+# Commands whose arguments are parsed by the module they forward to
+FORWARDED = {
+    "pipeline": ("study_pipeline", "run the study pipeline (stale stages only)"),
+    "benchmark": ("TensorBenchmark", "Gaussian smoothing benchmark"),
+}
+
+
+def _timeseries(args):
+    from .DataCube import list_lst_files, lst_timeseries_stats, open_lst_cube
+
+    files = list_lst_files(args.folder, pattern=args.pattern)
+    if not files:
+        raise SystemExit(f"No rasters matching {args.pattern} in {args.folder}")
+    cube = open_lst_cube(files, mask_nodata=False)
+    stats = lst_timeseries_stats(cube, nodata=args.nodata, percentiles=args.percentiles)
+    if args.out:
+        stats.to_csv(args.out)
+    else:
+        print(stats.to_string())
+
+
+def _threshold(args):
+    import numpy as np
+
+    from .NumpyArrays import threshold_and_mask_modis
+    from .raster_store import write_lst
+
+    masked, transform, crs, _ = threshold_and_mask_modis(args.raster, args.aoi, threshold=args.threshold)
+    write_lst(args.out, masked, transform, crs)
+    print(f"{int(np.count_nonzero(~np.isnan(masked)))} pixels at or below {args.threshold} written to {args.out}")
+
+
+def _cog(args):
+    from .raster_store import encode_lst_file, to_cog
+
+    for path in args.rasters:
+        if args.lst_celsius:
+            encode_lst_file(path)
+        else:
+            to_cog(path, block_size=args.block_size, compress=args.compress, force=args.force)
+        print(f"{path}: COG")
+
+
+def build_parser():
+    from .vector_store import BOUNDARY_PATH
+
+    parser = argparse.ArgumentParser(prog="lst_study", description="Amsterdam land surface temperature study")
+    parser.add_argument("--headless", action="store_true", help="render figures with Agg and never show them")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    for name, (_, help_text) in FORWARDED.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+
+    timeseries = commands.add_parser("timeseries", help="per-year LST statistics of a folder of rasters")
+    timeseries.add_argument("folder")
+    timeseries.add_argument("--pattern", default="modis_lst_mean_*.tif")
+    timeseries.add_argument("--nodata", type=float, default=None,
+                            help="extra nodata value, for legacy float rasters that store 0 without declaring it")
+    timeseries.add_argument("--percentiles", nargs="*", type=float, default=())
+    timeseries.add_argument("--out", help="CSV path (default: print)")
+    timeseries.set_defaults(handler=_timeseries)
+
+    threshold = commands.add_parser("threshold", help="mask a LST raster to pixels above a threshold inside the AOI")
+    threshold.add_argument("raster")
+    threshold.add_argument("--aoi", default=BOUNDARY_PATH)
+    threshold.add_argument("--threshold", type=float, default=25)
+    threshold.add_argument("--out", required=True)
+    threshold.set_defaults(handler=_threshold)
+
+    cog = commands.add_parser("cog", help="rewrite GeoTIFFs in place as COGs with overviews")
+    cog.add_argument("rasters", nargs="+")
+    cog.add_argument("--block-size", type=int, default=256)
+    cog.add_argument("--compress", default="DEFLATE", choices=["DEFLATE", "ZSTD", "LZW"])
+    cog.add_argument("--force", action="store_true", help="rewrite files that are already COGs")
+    cog.add_argument("--lst-celsius", action="store_true", help="also re-encode float °C LST as scaled int16")
+    cog.set_defaults(handler=_cog)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+
+    if args.headless:
+        from .Rendering import set_headless
+
+        set_headless(True)
+
+    if args.command in FORWARDED:
+        import importlib
+
+        module = importlib.import_module(f".{FORWARDED[args.command][0]}", __package__)
+        return module.main(extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,15 @@
 # ------------------------------
 # Imports
 # ------------------------------
-import ee
-import geemap
-import requests
-import osmnx as ox
-import geopandas as gpd
+# Earth Engine and osmnx are imported where they are used, so local
+# analysis does not need them installed (or pay for importing them)
 import os
-import xarray as xr
 import numpy as np
 import rasterio
+from .export_scheduler import ExportScheduler, ExportTask, region_key
+from .raster_store import encode_lst_file, read_band, to_cog
+from .request_cache import RequestCache, property_equals_filter
+from .wfs_reader import read_wfs
 
 # ------------------------------
 # Create required folders
@@ -23,7 +23,11 @@ import rasterio
 # Vector Data Class
 # ------------------------------
 class VectorDataCollection:
-    def __init__(self):
+    def __init__(self, naam="Amsterdam", cache=None):
+        # naam: municipality to request from the WFS (server-side filter);
+        # None downloads every municipality
+        self.naam = naam
+        self.cache = RequestCache() if cache is None else cache
         self.url = "https://service.pdok.nl/kadaster/bestuurlijkegebieden/wfs/v1_0"
         self.params = {
             "service": "WFS",
@@ -36,11 +40,14 @@ class VectorDataCollection:
         self.ams_boundary = None
 
     def fetch_gemeente(self):
-        response = requests.get(self.url, params=self.params)
-        data = response.json()
-        self.gemeente_gdf = gpd.GeoDataFrame.from_features(
-            data["features"], crs="EPSG:28992"
-        ).to_crs(epsg=4326)
+        params = dict(self.params)
+        if self.naam is not None:
+            params["filter"] = property_equals_filter("naam", self.naam)
+        # Paged download, reprojected to EPSG:4326 page by page
+        gemeente = self.cache.fetch(
+            self.url, params, lambda: read_wfs(self.url, params, crs="EPSG:28992", to_crs="EPSG:4326")
+        )
+        self.gemeente_gdf = gemeente.to_crs(epsg=4326)
         return self.gemeente_gdf
 
     def filter_amsterdam(self):
@@ -51,19 +58,33 @@ class VectorDataCollection:
         return self.ams_boundary
 
     def land_use(self):
+        place = "Amsterdam, Netherlands"
         tags = {"landuse": True}
-        landuse = ox.features_from_place(
-            "Amsterdam, Netherlands", tags=tags
-        )
-        landuse = landuse[landuse.geometry.type.isin(["Polygon", "MultiPolygon"])]
+
+        def download():
+            import osmnx as ox
+
+            features = ox.features_from_place(place, tags=tags)
+            features = features[features.geometry.type.isin(["Polygon", "MultiPolygon"])].copy()
+            # OSM tag columns hold mixed types; GeoParquet needs one type per column
+            columns = features.drop(columns="geometry").select_dtypes("object").columns
+            features[columns] = features[columns].astype("string")
+            return features
+
+        landuse = self.cache.fetch("osmnx:features_from_place", {"place": place, "tags": tags}, download)
         landuse = landuse.to_crs(epsg=4326)
         return landuse
 
 # ------------------------------
 # Raster Data Class
 # ------------------------------
+# Everything downloaded from Earth Engine is rewritten as a COG with
+# overviews before it is moved into place (see raster_store.py)
+SENTINEL_BLOCK_SIZE = 512
+
+
 class RasterDataCollection:
-    def __init__(self, AOI_ee, start_year=2020, end_year=2024):
+    def __init__(self, AOI_ee, start_year=2020, end_year=2024, scheduler=None):
         self.AOI_ee = AOI_ee
         self.start_year = start_year
         self.end_year = end_year
@@ -75,43 +96,79 @@ class RasterDataCollection:
         self.start_date = f"{self.start_year}-06-01"
         self.end_date = f"{self.end_year}-08-31"
         self.max_cloud = 20
-        
-        
+        self.modis_out_dir = "src/lst_study/Outputs/Data/modis_image"
+        self.ndvi_out_dir = "src/lst_study/Outputs/Data/ndvi"
+
+        # Parallel, resumable exports (see export_scheduler.py)
+        self.scheduler = ExportScheduler() if scheduler is None else scheduler
 
-        # Export MODIS LST per year
+    # ------------------------------
+    # MODIS LST
+    # ------------------------------
+    def get_modis_annual_mean(self, year):
+        import ee
+
+        start_date = f"{year}-06-01"
+        end_date = f"{year}-08-31"
+
+        # MODIS LST collection
+        summer_collection = (
+            ee.ImageCollection("MODIS/061/MOD11A2")
+            .filterBounds(self.AOI_ee)
+            .filterDate(start_date, end_date)
+            .select("LST_Day_1km")
+        )
+        # Kept in MODIS digital numbers (0.02 K, 0 = fill) so the export is
+        # int16; it is tagged with scale/offset and decoded on read
+        annual_mean = summer_collection.mean().round().unmask(0).toInt16()
+        self.annual_means[year] = annual_mean
+        return annual_mean
+
+    def modis_tasks(self):
+        tasks = []
         for year in range(self.start_year, self.end_year + 1):
-            start_date = f"{year}-06-01"
-            end_date = f"{year}-08-31"
-
-            # MODIS LST collection
-            summer_collection = (
-                ee.ImageCollection("MODIS/061/MOD11A2")
-                .filterBounds(self.AOI_ee)
-                .filterDate(start_date, end_date)
-                .select("LST_Day_1km")
-            )
-            annual_mean = summer_collection.mean().multiply(0.02).subtract(273.15)
-            self.annual_means[year] = annual_mean
-
-            # Export to GeoTIFF
-            out_path = os.path.join("src/lst_study/Outputs/Data/modis_image", f"modis_lst_mean_{year}.tif")
-            geemap.ee_export_image(
-                annual_mean,
-                filename=out_path,
+            out_path = os.path.join(self.modis_out_dir, f"modis_lst_mean_{year}.tif")
+            tasks.append(ExportTask(
+                name=f"modis_lst_mean_{year}",
+                out_path=out_path,
+                build_image=lambda year=year: self.get_modis_annual_mean(year),
                 scale=1000,
                 region=self.AOI_ee.geometry(),
-            )
+                params={
+                    "collection": "MODIS/061/MOD11A2",
+                    "band": "LST_Day_1km",
+                    "start": f"{year}-06-01",
+                    "end": f"{year}-08-31",
+                    "region": region_key(self.AOI_ee),
+                    "encoding": "int16_dn",
+                },
+                postprocess=lambda path: encode_lst_file(path, units="dn"),
+            ))
+        return tasks
+
+    def export_modis(self):
+        """
+        Export the summer mean LST of every year (skipping years already
+        exported with the same parameters) and read them back as float32 °C arrays.
+        """
+        status = self.scheduler.run(self.modis_tasks())
 
-            # Read back as NumPy array
+        # Read back as NumPy array
+        for year in range(self.start_year, self.end_year + 1):
+            out_path = os.path.join(self.modis_out_dir, f"modis_lst_mean_{year}.tif")
+            if status.get(f"modis_lst_mean_{year}") == "failed":
+                continue
             with rasterio.open(out_path) as src:
-                self.arrays[year] = src.read(1)
+                self.arrays[year] = read_band(src)
+        return status
 
 
     # ------------------------------
     # Sentinel-2 NDVI
     # ------------------------------
     def get_sentinel2_mosaic(self):
-        self.ndvi_out_dir="src/lst_study/Outputs/Data/ndvi"
+        import ee
+
         collection = (
             ee.ImageCollection("COPERNICUS/S2_HARMONIZED")
             .filterBounds(self.AOI)
@@ -122,18 +179,102 @@ class RasterDataCollection:
         mosaic = collection.mosaic()
         return mosaic
 
-    def export_ndvi(self, filename="sentinel2_mosaic.tif", scale=10):
-        mosaic = self.get_sentinel2_mosaic()
+    def export_ndvi(self, filename="sentinel2_mosaic.tif", scale=10, tiles=(1, 1)):
+        """
+        Export the Sentinel-2 RED/NIR mosaic as a COG. With tiles=(rows, cols)
+        the AOI bounding box is split into tiles that are exported in
+        parallel and then merged into one COG.
+        """
         out_path = os.path.join(self.ndvi_out_dir, filename)
-        geemap.ee_export_image(
-            mosaic,
-            filename=out_path,
-            scale=scale,
-            region=self.AOI.geometry(),
-            file_per_band=False
-        )
+        params = {
+            "collection": "COPERNICUS/S2_HARMONIZED",
+            "bands": ["B4", "B8"],
+            "start": f"{self.end_year}-06-01",
+            "end": f"{self.end_year}-08-31",
+            "max_cloud": self.max_cloud,
+            "region": region_key(self.AOI),
+        }
+        n_rows, n_cols = tiles
+
+        if (n_rows, n_cols) == (1, 1):
+            task = ExportTask("sentinel2_mosaic", out_path, self.get_sentinel2_mosaic, scale,
+                              self.AOI.geometry(), params, export_kwargs={"file_per_band": False},
+                              postprocess=lambda path: to_cog(path, block_size=SENTINEL_BLOCK_SIZE))
+            status = self.scheduler.run([task])
+            # Mosaics exported before the COG step are normalized in place
+            if status.get("sentinel2_mosaic") != "failed":
+                to_cog(out_path, block_size=SENTINEL_BLOCK_SIZE)
+            return out_path
+
+        import ee
+
+        # Split the AOI bounding box into tiles
+        coords = self.AOI.geometry().bounds().coordinates().getInfo()[0]
+        xs, ys = [c[0] for c in coords], [c[1] for c in coords]
+        x_edges = np.linspace(min(xs), max(xs), n_cols + 1)
+        y_edges = np.linspace(min(ys), max(ys), n_rows + 1)
+        root, ext = os.path.splitext(out_path)
+        tasks = []
+        for i in range(n_rows):
+            for j in range(n_cols):
+                tile = [x_edges[j], y_edges[i], x_edges[j + 1], y_edges[i + 1]]
+                tasks.append(ExportTask(
+                    f"sentinel2_mosaic_r{i}_c{j}", f"{root}_r{i}_c{j}{ext}", self.get_sentinel2_mosaic,
+                    scale, ee.Geometry.Rectangle(tile), dict(params, tile=tile),
+                    export_kwargs={"file_per_band": False},
+                ))
+        mosaic = ExportTask("sentinel2_mosaic", out_path, self.get_sentinel2_mosaic, scale,
+                            self.AOI.geometry(), dict(params, tiles=[n_rows, n_cols]))
+        export_tiles(self.scheduler, mosaic, tasks)
         return out_path
 
+
+def export_tiles(scheduler, mosaic, tasks):
+    """
+    Export the tile `tasks` and merge them into `mosaic.out_path`.
+
+    The merged mosaic is recorded in the scheduler's manifest under
+    `mosaic`'s params: a rerun with the same params exports and merges
+    nothing. Tiles are deleted once they are merged.
+    Returns the scheduler status of the tiles plus the mosaic's.
+    """
+    if scheduler.is_done(mosaic):
+        return {mosaic.name: "skipped"}
+    status = scheduler.run(tasks)
+    if any(result == "failed" for result in status.values()):
+        raise RuntimeError(f"Sentinel-2 tile export failed: {status}")
+
+    tile_paths = [task.out_path for task in tasks]
+    merge_tiles(tile_paths, mosaic.out_path)
+    scheduler.mark_done(mosaic)
+    for path in tile_paths:
+        os.remove(path)
+    status[mosaic.name] = "done"
+    return status
+
+
+def merge_tiles(tile_paths, out_path):
+    """
+    Merge exported GeoTIFF tiles into one COG (atomic write).
+    """
+    from rasterio.merge import merge
+
+    sources = [rasterio.open(p) for p in tile_paths]
+    try:
+        mosaic, transform = merge(sources)
+        profile = sources[0].profile.copy()
+    finally:
+        for src in sources:
+            src.close()
+    profile.update(height=mosaic.shape[1], width=mosaic.shape[2], transform=transform)
+    root, ext = os.path.splitext(out_path)
+    tmp_path = f"{root}.part{ext}"
+    with rasterio.open(tmp_path, "w", **profile) as dst:
+        dst.write(mosaic)
+    to_cog(tmp_path, out_path, block_size=SENTINEL_BLOCK_SIZE)
+    os.remove(tmp_path)
+    return out_path
+
 # # ------------------------------
 # # USAGE EXAMPLE
 # # ------------------------------
@@ -160,6 +301,7 @@ class RasterDataCollection:
 # # Raster Collection
 # # ------------------------------
 # raster_data = RasterDataCollection(AOI_ee, start_year=2020, end_year=2025)
+# raster_data.export_modis()
 
 # # Access annual NumPy arrays
 # arr_2020 = raster_data.arrays[2020]
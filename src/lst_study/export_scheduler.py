@@ -0,0 +1,195 @@
+"""
+export_scheduler.py
+-------------------
+Parallel, resumable raster exports from Earth Engine.
+
+ExportScheduler fans export tasks (MODIS years, Sentinel-2 tiles) out over
+a bounded thread pool. Each task is retried with exponential backoff,
+written to a temporary file and atomically renamed into place, and
+recorded in a JSON manifest. Tasks whose output exists with matching
+parameters are skipped, so an interrupted run resumes where it stopped.
+
+The export itself goes through an ExportClient, so a local fake can stand
+in for Earth Engine in tests.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+
+class ExportError(RuntimeError):
+    pass
+
+
+class ExportClient(ABC):
+    """
+    Interface of an image export backend.
+    """
+
+    @abstractmethod
+    def export_image(self, image, filename, scale, region, **kwargs):
+        """
+        Write `image` over `region` at `scale` metres to `filename` (GeoTIFF).
+        Must raise on failure.
+        """
+
+
+class GeemapExportClient(ExportClient):
+    """
+    Exports through geemap.ee_export_image (direct download from Earth Engine).
+    """
+
+    def export_image(self, image, filename, scale, region, **kwargs):
+        import geemap
+
+        geemap.ee_export_image(image, filename=filename, scale=scale, region=region, **kwargs)
+        # ee_export_image prints errors instead of raising
+        if not os.path.exists(filename):
+            raise ExportError(f"Earth Engine export produced no file: {filename}")
+
+
+class ExportTask:
+    """
+    One raster export.
+
+    build_image: zero-argument callable returning the image, so nothing is
+    sent to Earth Engine for tasks that are skipped.
+    params: everything that defines the output (collection, dates, scale,
+    region, ...); a change in params makes the task run again.
+    postprocess: optional callable applied to the downloaded file (path)
+    before it is moved into place, e.g. re-encoding it.
+    """
+
+    def __init__(self, name, out_path, build_image, scale, region, params, export_kwargs=None, postprocess=None):
+        self.name = name
+        self.out_path = out_path
+        self.build_image = build_image
+        self.scale = scale
+        self.region = region
+        self.params = dict(params, scale=scale)
+        self.export_kwargs = export_kwargs or {}
+        self.postprocess = postprocess
+
+    @property
+    def params_hash(self):
+        return hashlib.sha1(json.dumps(self.params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def region_key(region) -> str:
+    """
+    Stable identifier of an Earth Engine geometry/feature collection, taken
+    from its client-side serialization (no network call).
+    """
+    text = region.serialize() if hasattr(region, "serialize") else repr(region)
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class ExportScheduler:
+    def __init__(self, client=None, manifest_path="src/lst_study/Outputs/Data/export_manifest.json",
+                 max_workers=4, retries=3, backoff=2.0):
+        self.client = GeemapExportClient() if client is None else client
+        self.manifest_path = manifest_path
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if self.manifest_path and os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_manifest(self):
+        # Called with the lock held; write-then-rename keeps the manifest valid
+        if not self.manifest_path:
+            return
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _record(self, task, status, attempts, error=None):
+        with self._lock:
+            self.manifest[task.name] = {
+                "path": task.out_path,
+                "params": task.params,
+                "params_hash": task.params_hash,
+                "status": status,
+                "attempts": attempts,
+                "error": error,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self._save_manifest()
+
+    def mark_done(self, task):
+        """
+        Record an output produced outside the scheduler (e.g. a mosaic
+        merged from exported tiles), so is_done() skips it on later runs.
+        """
+        self._record(task, "done", attempts=0)
+
+    def is_done(self, task) -> bool:
+        entry = self.manifest.get(task.name)
+        return (
+            entry is not None
+            and entry["status"] == "done"
+            and entry["params_hash"] == task.params_hash
+            and os.path.exists(task.out_path)
+        )
+
+    def _run_task(self, task):
+        os.makedirs(os.path.dirname(task.out_path) or ".", exist_ok=True)
+        root, ext = os.path.splitext(task.out_path)
+        tmp_path = f"{root}.part{ext}"
+
+        for attempt in range(1, self.retries + 1):
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                self.client.export_image(
+                    task.build_image(), tmp_path, task.scale, task.region, **task.export_kwargs
+                )
+                if task.postprocess is not None:
+                    task.postprocess(tmp_path)
+                os.replace(tmp_path, task.out_path)
+                self._record(task, "done", attempt)
+                return task.name, "done"
+            except Exception as exc:
+                if attempt == self.retries:
+                    self._record(task, "failed", attempt, error=repr(exc))
+                    return task.name, "failed"
+                # Exponential backoff with jitter
+                time.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+
+    def run(self, tasks) -> dict:
+        """
+        Export every task that is not already done. Failures are recorded in
+        the manifest and do not stop the other tasks.
+        Returns {task name: "skipped" | "done" | "failed"}.
+        """
+        status = {}
+        pending = []
+        for task in tasks:
+            if self.is_done(task):
+                status[task.name] = "skipped"
+            else:
+                pending.append(task)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._run_task, task) for task in pending]
+            for future in as_completed(futures):
+                name, result = future.result()
+                status[name] = result
+                print(f"Export {name}: {result}")
+
+        return status
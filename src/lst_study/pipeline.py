@@ -0,0 +1,248 @@
+"""
+pipeline.py
+-----------
+Incremental, dependency-aware runner for multi-stage workflows.
+
+A Stage declares the files it reads and writes. A stage depends on the
+stages that write its inputs, and is stale when it has never run, when an
+output is missing or was changed since, or when its signature (a hash of
+its parameters and of the content of its inputs) differs from the last
+successful run. Pipeline.run() executes only the stale stages, running
+independent stages concurrently, and records every run in a JSON state
+file. File content hashes are cached by (size, mtime), so a rerun where
+nothing changed only stats the files.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+
+class PipelineError(RuntimeError):
+    pass
+
+
+class Stage:
+    """
+    One step of a pipeline.
+
+    run: zero-argument callable doing the work; it must write `outputs`.
+    inputs / outputs: file paths read / written by the stage.
+    params: everything else that defines the result (years, thresholds,
+    ...); a change reruns the stage. Bump `version` when the code changes.
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), params=None, version=1):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = dict(params or {})
+        self.version = version
+
+
+class Pipeline:
+    def __init__(self, stages, state_path="src/lst_study/Outputs/Data/pipeline_state.json", max_workers=4):
+        self.stages = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        self.state_path = state_path
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.state = self._load_state()
+
+        producers = {}
+        for stage in self.stages.values():
+            for path in stage.outputs:
+                if path in producers:
+                    raise ValueError(f"{path} is written by both {producers[path]} and {stage.name}")
+                producers[path] = stage.name
+        self.deps = {
+            name: sorted({producers[p] for p in stage.inputs if p in producers} - {name})
+            for name, stage in self.stages.items()
+        }
+        self._check_acyclic()
+
+    # ------------------------------
+    # State
+    # ------------------------------
+    def _load_state(self):
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                state = json.load(f)
+        else:
+            state = {}
+        state.setdefault("stages", {})
+        state.setdefault("files", {})
+        return state
+
+    def _save_state(self):
+        # Called with the lock held; write-then-rename keeps the state valid
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    def file_digest(self, path):
+        """
+        Content hash of a file, or None if it does not exist. Reuses the
+        hash recorded for the same (size, mtime).
+        """
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        with self._lock:
+            cached = self.state["files"].get(path)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["digest"]
+
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest = digest.hexdigest()
+        with self._lock:
+            self.state["files"][path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest}
+        return digest
+
+    def signature(self, stage):
+        payload = {
+            "version": stage.version,
+            "params": stage.params,
+            "inputs": {path: self.file_digest(path) for path in stage.inputs},
+            "outputs": stage.outputs,
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def is_stale(self, stage):
+        record = self.state["stages"].get(stage.name)
+        if record is None or record.get("status") != "done":
+            return True
+        if record["signature"] != self.signature(stage):
+            return True
+        return any(self.file_digest(path) != record["outputs"].get(path) for path in stage.outputs)
+
+    # ------------------------------
+    # Graph
+    # ------------------------------
+    def _check_acyclic(self):
+        visiting, visited = set(), set()
+
+        def visit(name, path):
+            if name in visiting:
+                raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}")
+            if name in visited:
+                return
+            visiting.add(name)
+            for dep in self.deps[name]:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name, [])
+
+    def select(self, targets=None, with_deps=True):
+        """
+        Names of the stages to consider: `targets` (default: all) and,
+        with_deps=True, everything they depend on.
+        """
+        if targets is None:
+            return set(self.stages)
+        unknown = set(targets) - set(self.stages)
+        if unknown:
+            raise PipelineError(f"Unknown stages: {sorted(unknown)}")
+        selected = set()
+        todo = list(targets)
+        while todo:
+            name = todo.pop()
+            if name not in selected:
+                selected.add(name)
+                if with_deps:
+                    todo.extend(self.deps[name])
+        return selected
+
+    # ------------------------------
+    # Execution
+    # ------------------------------
+    def _execute(self, stage, force):
+        # Staleness is checked only once upstream stages have finished,
+        # since they may have just rewritten this stage's inputs
+        if not force and not self.is_stale(stage):
+            return "fresh"
+        missing = [path for path in stage.inputs if not os.path.exists(path)]
+        if missing:
+            raise PipelineError(f"{stage.name}: missing inputs {missing}")
+
+        signature = self.signature(stage)
+        stage.run()
+        outputs = {path: self.file_digest(path) for path in stage.outputs}
+        missing = [path for path, digest in outputs.items() if digest is None]
+        if missing:
+            raise PipelineError(f"{stage.name}: did not write {missing}")
+
+        with self._lock:
+            self.state["stages"][stage.name] = {
+                "status": "done",
+                "signature": signature,
+                "outputs": outputs,
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+            }
+            self._save_state()
+        return "ran"
+
+    def run(self, targets=None, with_deps=True, force=False):
+        """
+        Run the selected stages that are stale, each as soon as its
+        dependencies are done. force=True also reruns up-to-date stages, but
+        only those named in `targets` (all stages when targets is None); their
+        dependencies are still checked for staleness. A failed stage blocks
+        the stages that depend on it but not the others.
+        Returns {stage: "fresh" | "ran" | "failed" | "blocked"}.
+        """
+        selected = self.select(targets, with_deps)
+        forced = set(self.stages if targets is None else targets) if force else set()
+        status = {}
+        remaining = set(selected)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while remaining or running:
+                for name in sorted(remaining):
+                    deps = [d for d in self.deps[name] if d in selected]
+                    if any(status.get(d) in ("failed", "blocked") for d in deps):
+                        status[name] = "blocked"
+                        remaining.discard(name)
+                    elif all(d in status for d in deps):
+                        running[pool.submit(self._execute, self.stages[name], name in forced)] = name
+                        remaining.discard(name)
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except Exception as exc:
+                        status[name] = "failed"
+                        with self._lock:
+                            self.state["stages"][name] = {
+                                "status": "failed",
+                                "error": repr(exc),
+                                "finished_at": datetime.now(timezone.utc).isoformat(),
+                            }
+                            self._save_state()
+                    print(f"Stage {name}: {status[name]}")
+
+        with self._lock:
+            self._save_state()
+        return status
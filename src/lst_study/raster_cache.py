@@ -0,0 +1,214 @@
+"""
+raster_cache.py
+---------------
+Decode-once cache of raster bands as memory-mapped .npy files.
+
+The same GeoTIFFs are read by several steps of a run (the analysis-year
+MODIS raster by clipping, thresholding and the NDVI comparison; the whole
+stack by the time series). RasterCache decodes each (file, band, window)
+once to float32 (see raster_store.read_band) and stores it as .npy;
+every later read is a read-only np.memmap of that file, so it costs a
+page-cache hit instead of a decompression, and consumers share the pages
+instead of holding copies.
+
+Entries are keyed by the file's path, size and modification time, so a
+rewritten raster is decoded again; superseded entries of the same band
+are dropped, and the least recently used entries are evicted when the
+cache exceeds its size cap. Hits only update the in-memory access time;
+index.json is written when entries are added or removed, merged with the
+entries other processes sharing the directory have written meanwhile.
+
+    view = cached_band("modis_lst_mean_2025.tif")   # read-only float32 °C
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .raster_store import read_band
+
+
+DEFAULT_CACHE_DIR = "cache/rasters"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3   # 2 GB
+# Bump when the decoding changes, so older entries are not reused
+FORMAT_VERSION = 1
+
+
+def _window_key(window):
+    if window is None:
+        return None
+    return [int(round(v)) for v in (window.col_off, window.row_off, window.width, window.height)]
+
+
+class RasterCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._index = self._load_index()
+        # Keys removed by this instance, so merging does not bring them back
+        self._removed = set()
+
+    def _load_index(self):
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                return json.load(f)
+        return {}
+
+    def _merge_saved_index(self):
+        """
+        Fold in the entries on disk (possibly written by other processes)
+        and forget entries whose file is gone.
+        """
+        for key, entry in self._load_index().items():
+            if key in self._removed:
+                continue
+            mine = self._index.get(key)
+            if mine is None:
+                self._index[key] = entry
+            else:
+                mine["last_access"] = max(mine["last_access"], entry["last_access"])
+        for key in [k for k in self._index if not os.path.exists(self._path(k))]:
+            del self._index[key]
+
+    def _save_index(self):
+        self._merge_saved_index()
+        tmp_path = f"{self._index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _drop(self, key):
+        self._index.pop(key, None)
+        self._removed.add(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            # Missing, or still mapped on a platform that forbids removal
+            pass
+
+    @staticmethod
+    def source(path, band=1, window=None):
+        """
+        Identity of a band (window) of a raster: without the file's
+        size/mtime, so a rewritten file replaces its old entry.
+        """
+        return {"path": os.path.abspath(path), "band": band, "window": _window_key(window)}
+
+    def key(self, path, band=1, window=None):
+        stat = os.stat(path)
+        payload = dict(self.source(path, band, window), size=stat.st_size, mtime_ns=stat.st_mtime_ns,
+                       version=FORMAT_VERSION)
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def read(self, path, band=1, window=None) -> np.ndarray:
+        """
+        Band `band` (optionally a window) of `path`, decoded to float32 with
+        NaN for nodata, as a read-only memory map. Decoded on the first call
+        only; copy before modifying.
+        """
+        key = self.key(path, band, window)
+        cache_path = self._path(key)
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and os.path.exists(cache_path):
+                entry["last_access"] = time.time()
+                return np.load(cache_path, mmap_mode="r")
+
+        values = read_band(path, band, window=window)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+        np.save(tmp_path, values)
+        os.replace(tmp_path, cache_path)
+
+        source = self.source(path, band, window)
+        now = time.time()
+        with self._lock:
+            self._removed.discard(key)
+            self._merge_saved_index()
+            for other in [k for k, e in self._index.items() if e["source"] == source and k != key]:
+                self._drop(other)
+            self._index[key] = {
+                "source": source,
+                "created_at": now,
+                "last_access": now,
+                "size": os.path.getsize(cache_path),
+            }
+            self._evict(keep=key)
+            self._save_index()
+        return np.load(cache_path, mmap_mode="r")
+
+    def _evict(self, keep=None):
+        total = sum(entry["size"] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._index[key]["size"]
+            self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._merge_saved_index()
+            for key in list(self._index):
+                self._drop(key)
+            self._save_index()
+            self._prune()
+
+    def _prune(self):
+        # .npy files no index entry refers to, e.g. left by an interrupted write
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npy") and name[:-len(".npy")] not in self._index:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+
+# ------------------------------
+# Shared cache
+# ------------------------------
+# LST_RASTER_CACHE sets the directory of the shared cache; "off" disables
+# it, and cached_band() then decodes on every call
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            cache_dir = os.environ.get("LST_RASTER_CACHE", DEFAULT_CACHE_DIR)
+            if cache_dir.lower() in ("off", "0", ""):
+                return None
+            _default_cache = RasterCache(cache_dir)
+        return _default_cache
+
+
+def set_default_cache(cache):
+    """
+    Replace the shared cache (a RasterCache, or None to reset to LST_RASTER_CACHE).
+    """
+    global _default_cache
+    with _default_lock:
+        _default_cache = cache
+
+
+def cached_band(path, band=1, window=None) -> np.ndarray:
+    """
+    Decoded band of a raster through the shared cache (read-only), or a
+    fresh decode when the cache is disabled.
+    """
+    cache = default_cache()
+    if cache is None:
+        return read_band(path, band, window=window)
+    return cache.read(path, band, window=window)
@@ -0,0 +1,234 @@
+"""
+raster_store.py
+---------------
+Compact storage of LST rasters, and decoding to float32 on read.
+
+LST is stored the way MODIS delivers it: int16 digital numbers in units
+of 0.02 K with 0 as the nodata sentinel, the scale and offset recorded
+in the GeoTIFF (DN * 0.02 - 273.15 = °C). That is half the size of
+float32 and a quarter of float64, and rounding to the sensor's own
+0.02 K step loses nothing it measured.
+
+Every raster the study writes or downloads is stored as a Cloud-Optimized
+GeoTIFF: internal tiles, DEFLATE (or ZSTD) with a predictor, and average
+overview pyramids. Windowed reads then touch only the tiles they need,
+and coarse reads (e.g. 10 m Sentinel-2 aggregated to 1 km MODIS pixels)
+open a pre-averaged overview level instead of decoding full resolution
+(see open_at_resolution).
+
+Readers never see the digital numbers: read_band() decodes one window
+at a time to float32 °C with NaN for nodata, and decode_dataarray() does
+the same lazily for Dask-backed cubes. Rasters stored as floats (older
+exports, derived products) read through the same functions unchanged.
+"""
+
+import os
+
+import numpy as np
+import rasterio
+from rasterio.enums import Resampling
+
+
+LST_SCALE = 0.02        # K per digital number (MOD11A2 LST_Day_1km)
+LST_OFFSET = -273.15    # DN * LST_SCALE + LST_OFFSET = °C
+LST_NODATA = 0          # MODIS fill value
+LST_DTYPE = "int16"
+BLOCK_SIZE = 256
+OVERVIEW_RESAMPLING = "AVERAGE"
+
+
+def encode_lst(celsius) -> np.ndarray:
+    """
+    °C (NaN for missing) to int16 digital numbers, LST_NODATA where missing.
+    """
+    celsius = np.asarray(celsius, dtype=np.float32)
+    dn = np.rint((celsius - np.float32(LST_OFFSET)) / np.float32(LST_SCALE))
+    invalid = np.isnan(dn)
+    # 1..32767 DN is 0.02..655 K; valid DN never collide with the sentinel
+    dn = np.clip(np.nan_to_num(dn), 1, np.iinfo(np.int16).max).astype(np.int16)
+    dn[invalid] = LST_NODATA
+    return dn
+
+
+def decode(raw, scale=1.0, offset=0.0, nodata=None) -> np.ndarray:
+    """
+    Stored values to float32 physical values, NaN where equal to `nodata`.
+    """
+    raw = np.asarray(raw)
+    values = raw.astype(np.float32)
+    if scale != 1.0:
+        values *= np.float32(scale)
+    if offset != 0.0:
+        values += np.float32(offset)
+    if nodata is not None and not np.isnan(nodata):
+        values[raw == nodata] = np.nan
+    return values
+
+
+def band_scaling(src, band=1):
+    """
+    (scale, offset, nodata) of a band of an open dataset.
+    """
+    return src.scales[band - 1], src.offsets[band - 1], src.nodata
+
+
+def read_band(src, band=1, window=None, out_shape=None, resampling=Resampling.nearest) -> np.ndarray:
+    """
+    One band (optionally a window, or resampled to `out_shape`) of an open
+    dataset or a path, decoded to float32 with NaN for nodata.
+    """
+    if isinstance(src, (str, os.PathLike)):
+        with rasterio.open(src) as dataset:
+            return read_band(dataset, band, window=window, out_shape=out_shape, resampling=resampling)
+    raw = src.read(band, window=window, out_shape=out_shape, resampling=resampling)
+    return decode(raw, *band_scaling(src, band))
+
+
+def decode_dataarray(da):
+    """
+    Lazy decode of a DataArray opened with rioxarray (mask_and_scale=False):
+    integer layers become float32 with scale/offset applied and NaN for
+    nodata. Float layers only get NaN for their declared nodata, as in
+    decode().
+    """
+    if not np.issubdtype(da.dtype, np.integer):
+        nodata = da.rio.nodata
+        if nodata is None or np.isnan(nodata):
+            return da
+        return da.where(da != nodata).assign_attrs(da.attrs)
+    scale = da.attrs.get("scale_factor", 1.0)
+    offset = da.attrs.get("add_offset", 0.0)
+    nodata = da.attrs.get("_FillValue", da.rio.nodata)
+    values = da.astype(np.float32) * np.float32(scale) + np.float32(offset)
+    if nodata is not None:
+        values = values.where(da != nodata)
+    attrs = {k: v for k, v in da.attrs.items() if k not in ("scale_factor", "add_offset", "_FillValue")}
+    return values.assign_attrs(attrs)
+
+
+def _cog_options(dtype, block_size=BLOCK_SIZE, compress="DEFLATE", overviews=True,
+                 overview_resampling=OVERVIEW_RESAMPLING):
+    # Integer data uses the horizontal differencing predictor, floats the
+    # floating-point one
+    predictor = "3" if np.issubdtype(np.dtype(dtype), np.floating) else "2"
+    return {
+        "COMPRESS": compress,
+        "PREDICTOR": predictor,
+        "BLOCKSIZE": str(block_size),
+        "OVERVIEWS": "AUTO" if overviews else "NONE",
+        "OVERVIEW_RESAMPLING": overview_resampling,
+    }
+
+
+def write_raster(path, array, transform, crs, nodata=None, scale=None, offset=None,
+                 block_size=BLOCK_SIZE, compress="DEFLATE", overviews=True):
+    """
+    Write a 2-D (or band, y, x) array as a COG (atomic).
+
+    scale/offset are stored as band metadata, so read_band() decodes
+    integer arrays to physical values. Overviews are averaged, ignoring
+    nodata, down to the tile size.
+    """
+    from rasterio.io import MemoryFile
+    from rasterio.shutil import copy
+
+    array = np.asarray(array)
+    if array.ndim == 2:
+        array = array[np.newaxis]
+    count, height, width = array.shape
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.tif"
+    with MemoryFile() as memfile:
+        with memfile.open(driver="GTiff", height=height, width=width, count=count, dtype=array.dtype,
+                          crs=crs, transform=transform, nodata=nodata) as dst:
+            dst.write(array)
+            if scale is not None:
+                dst.scales = (scale,) * count
+            if offset is not None:
+                dst.offsets = (offset,) * count
+        with memfile.open() as src:
+            copy(src, tmp_path, driver="COG", **_cog_options(array.dtype, block_size, compress, overviews))
+    os.replace(tmp_path, path)
+    return path
+
+
+def is_cog(path) -> bool:
+    with rasterio.open(path) as src:
+        return src.tags(ns="IMAGE_STRUCTURE").get("LAYOUT") == "COG"
+
+
+def to_cog(src_path, dst_path=None, block_size=BLOCK_SIZE, compress="DEFLATE", force=False):
+    """
+    Rewrite a GeoTIFF as a COG with overviews, in place by default.
+    Nodata, scale/offset and band descriptions are kept. A file that is
+    already a COG is left alone unless force=True.
+    """
+    from rasterio.shutil import copy
+
+    dst_path = dst_path or src_path
+    if not force and dst_path == src_path and is_cog(src_path):
+        return src_path
+
+    tmp_path = f"{dst_path}.tmp.tif"
+    with rasterio.open(src_path) as src:
+        copy(src, tmp_path, driver="COG", **_cog_options(src.dtypes[0], block_size, compress))
+    os.replace(tmp_path, dst_path)
+    return dst_path
+
+
+def overview_level(src, resolution, oversample=4):
+    """
+    Index of the coarsest overview of an open dataset whose pixels are at
+    most resolution / oversample (dataset CRS units), or None for full
+    resolution. `oversample` source pixels per target pixel and axis keep
+    aggregates close to a full-resolution read.
+    """
+    level = None
+    pixel = max(abs(src.res[0]), abs(src.res[1]))
+    for k, factor in enumerate(src.overviews(1)):
+        if factor * pixel * oversample <= resolution:
+            level = k
+    return level
+
+
+def open_at_resolution(path, resolution, oversample=4):
+    """
+    Open a raster at the overview level matching `resolution` (see
+    overview_level); the dataset's transform, shape and windows are those
+    of that level.
+    """
+    with rasterio.open(path) as src:
+        level = overview_level(src, resolution, oversample)
+    if level is None:
+        return rasterio.open(path)
+    return rasterio.open(path, overview_level=level)
+
+
+def write_lst(path, celsius, transform, crs):
+    """
+    Write LST in °C as a scaled int16 COG (see encode_lst).
+    """
+    return write_raster(path, encode_lst(celsius), transform, crs,
+                        nodata=LST_NODATA, scale=LST_SCALE, offset=LST_OFFSET)
+
+
+def encode_lst_file(src_path, dst_path=None, units="celsius"):
+    """
+    Rewrite a single-band LST GeoTIFF as a scaled int16 COG, in place by default.
+
+    units="celsius" for rasters holding °C (older exports), "dn" for
+    MODIS digital numbers as exported from Earth Engine (0 = fill).
+    """
+    with rasterio.open(src_path) as src:
+        if units == "dn":
+            celsius = decode(src.read(1), LST_SCALE, LST_OFFSET, nodata=LST_NODATA)
+        elif units == "celsius":
+            celsius = read_band(src)
+            if src.nodata is None:
+                # Earlier float exports used 0 for missing pixels
+                celsius[celsius == 0] = np.nan
+        else:
+            raise ValueError(f"Unknown LST units: {units}")
+        transform, crs = src.transform, src.crs
+    return write_lst(dst_path or src_path, celsius, transform, crs)
@@ -0,0 +1,151 @@
+"""
+request_cache.py
+----------------
+Content-addressed cache for vector downloads (PDOK WFS, OSM via osmnx).
+
+Entries are keyed by a hash of the request (URL + sorted parameters) and
+stored as GeoParquet, i.e. already parsed, so a warm run neither touches
+the network nor re-parses GeoJSON. Entries expire after a TTL, and the
+least recently used ones are evicted when the cache exceeds its size cap.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from xml.sax.saxutils import escape
+
+
+DEFAULT_CACHE_DIR = "cache/requests"
+DEFAULT_TTL = 30 * 24 * 3600          # seconds
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2   # 512 MB
+
+
+def request_key(url, params=None) -> str:
+    """
+    Hash of a request: the URL plus its parameters in sorted order.
+    """
+    payload = json.dumps({"url": url, "params": params or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class RequestCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._index = self._load_index()
+
+    def _load_index(self):
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_index(self):
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self._index_path)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def _drop(self, key):
+        entry = self._index.pop(key, None)
+        if entry is not None and os.path.exists(self._path(key)):
+            os.remove(self._path(key))
+
+    def get(self, key):
+        """
+        Cached GeoDataFrame for `key`, or None if missing or expired. The
+        access time is updated in memory and saved with the next put.
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or not os.path.exists(self._path(key)):
+                return None
+            if self.ttl is not None and time.time() - entry["created_at"] > self.ttl:
+                self._drop(key)
+                self._save_index()
+                return None
+            entry["last_access"] = time.time()
+        import geopandas as gpd
+
+        return gpd.read_parquet(self._path(key))
+
+    def put(self, key, gdf, description=None):
+        """
+        Store a GeoDataFrame as GeoParquet, then evict least recently used
+        entries until the cache fits in max_bytes.
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        gdf.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            self._index[key] = {
+                "created_at": now,
+                "last_access": now,
+                "size": os.path.getsize(path),
+                "description": description,
+            }
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._index.values())
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index[key]["size"]
+            self._drop(key)
+
+    def fetch(self, url, params, load):
+        """
+        Return the cached result of a request, calling `load()` (which does
+        the actual download and parsing) only on a miss.
+        """
+        key = request_key(url, params)
+        gdf = self.get(key)
+        if gdf is None:
+            gdf = load()
+            self.put(key, gdf, description=url)
+        return gdf
+
+
+# ------------------------------
+# WFS helpers
+# ------------------------------
+def property_equals_filter(name, value) -> str:
+    """
+    OGC Filter Encoding 2.0 `PropertyIsEqualTo` for the WFS FILTER parameter,
+    so the server returns only matching features (e.g. naam = 'Amsterdam').
+    """
+    return (
+        '<fes:Filter xmlns:fes="http://www.opengis.net/fes/2.0">'
+        "<fes:PropertyIsEqualTo>"
+        f"<fes:ValueReference>{name}</fes:ValueReference>"
+        f"<fes:Literal>{escape(str(value))}</fes:Literal>"
+        "</fes:PropertyIsEqualTo>"
+        "</fes:Filter>"
+    )
+
+
+def fetch_geojson(url, params, crs, session=None, timeout=120):
+    """
+    GET a GeoJSON feature collection and parse it into a GeoDataFrame.
+    """
+    import geopandas as gpd
+    import requests
+
+    http = session or requests
+    response = http.get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    return gpd.GeoDataFrame.from_features(response.json()["features"], crs=crs)
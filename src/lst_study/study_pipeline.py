@@ -0,0 +1,318 @@
+"""
+study_pipeline.py
+-----------------
+The Amsterdam LST study (formerly the body of main.py) as pipeline stages.
+
+    fetch_vectors -> export_modis, export_ndvi -> clip -> zonal -> aggregate
+                                               -> timeseries, threshold, ndvi
+    aggregate, timeseries, threshold, ndvi -> render
+
+Every stage writes its result to disk and declares what it reads, so a
+rerun only executes the stages whose inputs or parameters changed (see
+pipeline.py). Earth Engine is only initialized when an export stage
+actually runs, and heavy libraries are imported inside the stages.
+
+    python main.py                    # run whatever is stale
+    python main.py zonal aggregate    # these stages (and stale dependencies)
+    python main.py render --only      # just this stage
+    python main.py --list             # stages and whether they are up to date
+"""
+
+import argparse
+import os
+import threading
+
+from .pipeline import Pipeline, Stage
+from .vector_store import DATA_DIR
+
+
+class StudyConfig:
+    def __init__(self, start_year=2020, end_year=2025, analysis_year=2025, threshold=25, top_n=10,
+                 ee_project="pratistha111", data_dir=DATA_DIR, maps_dir="Outputs/Maps", tables_dir="Outputs/Tables"):
+        self.start_year = start_year
+        self.end_year = end_year
+        self.analysis_year = analysis_year
+        self.threshold = threshold
+        self.top_n = top_n
+        self.ee_project = ee_project
+        self.data_dir = data_dir
+        self.maps_dir = maps_dir
+        self.tables_dir = tables_dir
+
+        self.boundary = f"{data_dir}/ams_boundary/amsterdam_boundary.parquet"
+        self.landuse = f"{data_dir}/land_use_polygon/amsterdam_landuse.parquet"
+        self.modis_dir = f"{data_dir}/modis_image"
+        self.sentinel = f"{data_dir}/ndvi/sentinel2_mosaic.tif"
+        self.clipped = f"{data_dir}/clipped/modis_lst_clipped_{analysis_year}.tif"
+        self.landuse_lst = f"{data_dir}/land_use_polygon/amsterdam_landuse_lst_{analysis_year}.parquet"
+        self.landuse_classes = f"{data_dir}/land_use_polygon/amsterdam_landuse_classes_{analysis_year}.parquet"
+        self.dominant_table = f"{tables_dir}/dominant_classes_{analysis_year}.csv"
+        self.hottest_table = f"{tables_dir}/hottest_classes_{analysis_year}.csv"
+        self.timeseries_table = f"{tables_dir}/lst_timeseries.csv"
+        self.masked = f"{data_dir}/threshold/modis_masked_{analysis_year}.tif"
+        self.lst_ndvi = f"{data_dir}/lst_ndvi_{analysis_year}.npz"
+
+    @property
+    def years(self):
+        return list(range(self.start_year, self.end_year + 1))
+
+    def modis_path(self, year):
+        return f"{self.modis_dir}/modis_lst_mean_{year}.tif"
+
+    @property
+    def figures(self):
+        return {
+            "landuse": f"{self.maps_dir}/LSTandLandUse.png",
+            "timeseries": f"{self.maps_dir}/TimeSeriesPlot_from_datacube.png",
+            "threshold": f"{self.maps_dir}/MODIS_masked_{self.analysis_year}.png",
+            "ndvi": f"{self.maps_dir}/LSTandNDVI.png",
+        }
+
+
+# ------------------------------
+# Earth Engine
+# ------------------------------
+_ee_lock = threading.Lock()
+_ee_ready = False
+
+
+def init_earth_engine(project):
+    """
+    Initialize Earth Engine once per process, authenticating only when
+    there are no stored credentials.
+    """
+    global _ee_ready
+    import ee
+
+    with _ee_lock:
+        if not _ee_ready:
+            try:
+                ee.Initialize(project=project)
+            except Exception:
+                ee.Authenticate()
+                ee.Initialize(project=project)
+            _ee_ready = True
+
+
+def _aoi_ee(config):
+    import geemap
+
+    from .vector_store import read_vector
+
+    init_earth_engine(config.ee_project)
+    return geemap.geopandas_to_ee(read_vector(config.boundary))
+
+
+# ------------------------------
+# Stages
+# ------------------------------
+def fetch_vectors(config):
+    from .data_collection import VectorDataCollection
+    from .vector_store import write_vector
+
+    vector_data = VectorDataCollection()
+    vector_data.fetch_gemeente()
+    write_vector(vector_data.filter_amsterdam(), config.boundary)
+    write_vector(vector_data.land_use(), config.landuse)
+
+
+def export_modis(config):
+    from .data_collection import RasterDataCollection
+
+    raster_data = RasterDataCollection(_aoi_ee(config), start_year=config.start_year, end_year=config.end_year)
+    raster_data.export_modis()
+
+
+def export_ndvi(config):
+    from .data_collection import RasterDataCollection
+
+    raster_data = RasterDataCollection(_aoi_ee(config), start_year=config.start_year, end_year=config.end_year)
+    ndvi_path = raster_data.export_ndvi()
+    print(f"Sentinel-2 NDVI saved at: {ndvi_path}")
+
+
+def clip(config):
+    """
+    MODIS LST of the analysis year clipped to the AOI.
+    """
+    import rasterio
+    import rasterio.mask
+
+    from .raster_store import band_scaling, write_raster
+    from .vector_store import read_projected
+
+    # Clipped in the stored encoding; scale/offset are carried over
+    with rasterio.open(config.modis_path(config.analysis_year)) as src:
+        aoi = read_projected(config.boundary, src.crs)
+        clipped, transform = rasterio.mask.mask(src, aoi.geometry, crop=True)
+        crs, (scale, offset, nodata) = src.crs, band_scaling(src)
+    write_raster(config.clipped, clipped[0], transform, crs, nodata=nodata, scale=scale, offset=offset)
+
+
+def zonal(config):
+    """
+    LST statistics of every land-use polygon.
+    """
+    from .RasterVectorIntegration import RasterVectorIntegration
+    from .vector_store import write_vector
+
+    pipeline = RasterVectorIntegration(config.clipped, config.boundary, config.landuse)
+    pipeline.load_data()
+    pipeline.read_and_clip_raster()
+    pipeline.zonal_statistics()
+    write_vector(pipeline.landuse, config.landuse_lst, spatial_sort=False)
+
+
+def aggregate(config):
+    """
+    Dominant and hottest land-use classes, and the class labels for the map.
+    """
+    from .RasterVectorIntegration import RasterVectorIntegration
+    from .vector_store import read_vector, write_vector
+
+    pipeline = RasterVectorIntegration(config.clipped, config.boundary, config.landuse_lst)
+    pipeline.landuse = read_vector(config.landuse_lst)
+    pipeline.select_top_classes(top_n=config.top_n)
+
+    os.makedirs(config.tables_dir, exist_ok=True)
+    pipeline.dominant_classes.to_csv(config.dominant_table, index=False)
+    pipeline.hottest_classes.to_csv(config.hottest_table, index=False)
+    write_vector(pipeline.landuse, config.landuse_classes, spatial_sort=False)
+
+
+def timeseries(config):
+    from .DataCube import lst_timeseries_stats, open_lst_cube
+
+    cube = open_lst_cube([config.modis_path(year) for year in config.years], mask_nodata=False, cached=True)
+    stats = lst_timeseries_stats(cube)
+    os.makedirs(config.tables_dir, exist_ok=True)
+    stats.to_csv(config.timeseries_table)
+
+
+def threshold(config):
+    from .NumpyArrays import threshold_and_mask_modis
+    from .raster_store import write_lst
+
+    masked, transform, crs, _ = threshold_and_mask_modis(
+        config.modis_path(config.analysis_year), config.boundary, threshold=config.threshold, windowed=False
+    )
+    write_lst(config.masked, masked, transform, crs)
+
+
+def ndvi(config):
+    from .NumpyArrays import lst_ndvi_arrays_streaming
+    from .StreamingStats import accumulate_arrays
+
+    lst, ndvi_grid = lst_ndvi_arrays_streaming(config.modis_path(config.analysis_year), config.sentinel)
+    stats = accumulate_arrays(ndvi_grid, lst)
+    print(f"LST-NDVI correlation: {stats.pearson():.3f} (Spearman {stats.spearman():.3f})")
+    stats.save(config.lst_ndvi)
+
+
+def render(config):
+    """
+    All figures, from the stage outputs, in parallel headless workers.
+    """
+    import pandas as pd
+    import rasterio
+
+    from .NumpyArrays import render_threshold_map
+    from .RasterandVectorDC import render_lst_timeseries
+    from .RasterVectorIntegration import render_landuse_result
+    from .raster_store import read_band
+    from .Rendering import render_batch
+    from .StreamingStats import CorrelationAccumulator, render_density
+    from .vector_store import read_vector
+
+    figures = config.figures
+    landuse = read_vector(config.landuse_classes)
+    boundary = read_vector(config.boundary).to_crs(landuse.crs)
+    with rasterio.open(config.masked) as src:
+        masked, masked_transform = read_band(src), src.transform
+        mask_gdf = read_vector(config.boundary).to_crs(src.crs)
+    stats = pd.read_csv(config.timeseries_table, index_col=0, parse_dates=True)
+    accumulator = CorrelationAccumulator.load(config.lst_ndvi)
+
+    jobs = [
+        (render_landuse_result,
+         (landuse, boundary, pd.read_csv(config.dominant_table), pd.read_csv(config.hottest_table)),
+         {"output_path": figures["landuse"]}),
+        (render_lst_timeseries, (stats,), {"output_path": figures["timeseries"]}),
+        (render_threshold_map, (masked, masked_transform, mask_gdf),
+         {"threshold": config.threshold, "output_path": figures["threshold"]}),
+        (render_density, (accumulator,),
+         {"output_path": figures["ndvi"], "title": f"LST vs NDVI (r={accumulator.pearson():.3f}) for Year {config.analysis_year}"}),
+    ]
+    render_batch(jobs)
+
+
+def build_pipeline(config=None, state_path=None, max_workers=4) -> Pipeline:
+    config = StudyConfig() if config is None else config
+    state_path = state_path or f"{config.data_dir}/pipeline_state.json"
+    modis = [config.modis_path(year) for year in config.years]
+    analysis_modis = config.modis_path(config.analysis_year)
+
+    def stage(name, run, **kwargs):
+        return Stage(name, lambda: run(config), **kwargs)
+
+    stages = [
+        stage("fetch_vectors", fetch_vectors, outputs=[config.boundary, config.landuse]),
+        # version 2: exports are stored as COGs (int16 LST); rerunning
+        # re-encodes or normalizes rasters exported before
+        stage("export_modis", export_modis, inputs=[config.boundary], outputs=modis,
+              params={"years": config.years}, version=2),
+        stage("export_ndvi", export_ndvi, inputs=[config.boundary], outputs=[config.sentinel],
+              params={"year": config.end_year}, version=2),
+        stage("clip", clip, inputs=[analysis_modis, config.boundary], outputs=[config.clipped]),
+        stage("zonal", zonal, inputs=[config.clipped, config.boundary, config.landuse],
+              outputs=[config.landuse_lst]),
+        stage("aggregate", aggregate, inputs=[config.landuse_lst],
+              outputs=[config.dominant_table, config.hottest_table, config.landuse_classes],
+              params={"top_n": config.top_n}),
+        # version 2: 0 °C is a valid decoded value, no longer masked as nodata
+        stage("timeseries", timeseries, inputs=modis, outputs=[config.timeseries_table], version=2),
+        stage("threshold", threshold, inputs=[analysis_modis, config.boundary], outputs=[config.masked],
+              params={"threshold": config.threshold}, version=2),
+        # version 2: NDVI from native-resolution bands, not COG overviews;
+        # version 3: 0 °C LST pixels are kept
+        stage("ndvi", ndvi, inputs=[analysis_modis, config.sentinel], outputs=[config.lst_ndvi], version=3),
+        stage("render", render,
+              inputs=[config.landuse_classes, config.boundary, config.dominant_table, config.hottest_table,
+                      config.timeseries_table, config.masked, config.lst_ndvi],
+              outputs=list(config.figures.values())),
+    ]
+    return Pipeline(stages, state_path=state_path, max_workers=max_workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Amsterdam LST study pipeline (runs only stale stages)")
+    parser.add_argument("stages", nargs="*", help="stages to run (default: all)")
+    parser.add_argument("--only", action="store_true", help="do not run the stages' dependencies")
+    parser.add_argument("--force", action="store_true", help="rerun the named stages even if up to date (dependencies only when stale)")
+    parser.add_argument("--list", action="store_true", help="list stages and whether they are stale")
+    parser.add_argument("--workers", type=int, default=4, help="stages run concurrently")
+    parser.add_argument("--start-year", type=int, default=2020)
+    parser.add_argument("--end-year", type=int, default=2025)
+    parser.add_argument("--threshold", type=float, default=25)
+    args = parser.parse_args(argv)
+
+    config = StudyConfig(start_year=args.start_year, end_year=args.end_year,
+                         analysis_year=args.end_year, threshold=args.threshold)
+    pipeline = build_pipeline(config, max_workers=args.workers)
+
+    if args.list:
+        for name, stage in pipeline.stages.items():
+            state = "stale" if pipeline.is_stale(stage) else "up to date"
+            deps = ", ".join(pipeline.deps[name]) or "-"
+            print(f"{name:<14} {state:<11} after: {deps}")
+        return {}
+
+    status = pipeline.run(args.stages or None, with_deps=not args.only, force=args.force)
+    failed = [name for name, result in status.items() if result in ("failed", "blocked")]
+    if failed:
+        raise SystemExit(f"Stages not completed: {', '.join(sorted(failed))}")
+    return status
+
+
+if __name__ == "__main__":
+    main()
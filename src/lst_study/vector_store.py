@@ -0,0 +1,169 @@
+"""
+vector_store.py
+---------------
+On-disk storage for the boundary and land-use layers.
+
+Layers are written as GeoParquet (default) or FlatGeobuf instead of
+shapefiles, so column names are kept in full. GeoParquet files are sorted
+along a Hilbert curve and carry a bbox covering column, and FlatGeobuf
+files a packed R-tree, so read_vector() with a bbox only decodes the row
+groups / features near that box, and with `columns` only those columns.
+Other formats (legacy shapefiles) are read through pyogrio's Arrow path.
+
+read_projected() reprojects a stored layer once per target CRS and keeps
+the result, with each feature's area from an equal-area CRS, as GeoParquet
+in a `.projected/` folder beside the source; later calls read it back
+instead of running pyproj again.
+"""
+
+import hashlib
+import json
+import os
+
+
+
+DATA_DIR = "src/lst_study/Outputs/Data"
+BOUNDARY_PATH = f"{DATA_DIR}/ams_boundary/amsterdam_boundary.parquet"
+LANDUSE_PATH = f"{DATA_DIR}/land_use_polygon/amsterdam_landuse.parquet"
+
+# Rows per Parquet row group: the granularity of bbox skipping
+ROW_GROUP_SIZE = 2048
+
+# ETRS89 / LAEA Europe: equal-area, so areas are exact for Dutch layers
+EQUAL_AREA_CRS = "EPSG:3035"
+AREA_COLUMN = "area_m2"
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".geoparquet")
+
+
+def write_vector(gdf, path, row_group_size=ROW_GROUP_SIZE, spatial_sort=True):
+    """
+    Write a layer as GeoParquet (.parquet) or FlatGeobuf (.fgb), by extension.
+    spatial_sort=False keeps the row order of `gdf`.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if spatial_sort and len(gdf) > 1:
+        # Spatially close features end up in the same row groups / index nodes
+        gdf = gdf.iloc[gdf.hilbert_distance().argsort()]
+
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.tmp{ext}"
+    if _is_parquet(path):
+        gdf.to_parquet(tmp_path, write_covering_bbox=True, row_group_size=row_group_size)
+    elif ext.lower() == ".fgb":
+        gdf.to_file(tmp_path, driver="FlatGeobuf", engine="pyogrio", SPATIAL_INDEX="YES")
+    else:
+        raise ValueError(f"Unsupported vector format: {path} (use .parquet or .fgb)")
+    os.replace(tmp_path, path)
+    return path
+
+
+def vector_crs(path):
+    """
+    CRS of a stored layer, read from its metadata only.
+    """
+    from pyproj import CRS
+
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        geo = json.loads(pq.read_schema(path).metadata[b"geo"])
+        column = geo["columns"][geo["primary_column"]]
+        # GeoParquet: a missing crs means OGC:CRS84, null means unknown
+        crs = column.get("crs", "OGC:CRS84")
+    else:
+        import pyogrio
+
+        crs = pyogrio.read_info(path)["crs"]
+    return CRS.from_user_input(crs) if crs is not None else None
+
+
+def read_vector(path, bbox=None, columns=None, bbox_crs=None):
+    """
+    Read a stored layer, optionally only the features intersecting `bbox`
+    (xmin, ymin, xmax, ymax) and only the given attribute `columns`.
+
+    bbox is in the layer's CRS unless `bbox_crs` says otherwise.
+    """
+    # geopandas/pyproj are imported here, so modules that only need the
+    # paths above stay light to import
+    import geopandas as gpd
+    from pyproj import CRS, Transformer
+
+    if bbox is not None and bbox_crs is not None:
+        layer_crs = vector_crs(path)
+        if layer_crs is not None and not layer_crs.equals(CRS.from_user_input(bbox_crs)):
+            bbox = Transformer.from_crs(bbox_crs, layer_crs, always_xy=True).transform_bounds(*bbox)
+    bbox = tuple(bbox) if bbox is not None else None
+
+    if _is_parquet(path):
+        if columns is not None:
+            columns = list(columns) + ["geometry"]
+        return gpd.read_parquet(path, columns=columns, bbox=bbox)
+
+    # The Arrow path speeds up full reads; bbox reads go through GDAL's
+    # spatial filter (pyogrio's Arrow reader fails on an empty selection)
+    return gpd.read_file(path, bbox=bbox, columns=columns, engine="pyogrio", use_arrow=bbox is None)
+
+
+# ------------------------------
+# Reproject-once cache
+# ------------------------------
+def layer_fingerprint(path) -> str:
+    """
+    Identifies one version of a stored layer: changes whenever the file is
+    rewritten.
+    """
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def _crs_key(crs) -> str:
+    from pyproj import CRS
+
+    crs = CRS.from_user_input(crs)
+    epsg = crs.to_epsg()
+    return f"epsg{epsg}" if epsg is not None else hashlib.sha1(crs.to_wkt().encode()).hexdigest()[:12]
+
+
+def projected_cache_path(path, crs) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(
+        os.path.dirname(path), ".projected", f"{stem}-{_crs_key(crs)}-{layer_fingerprint(path)}.parquet"
+    )
+
+
+def read_projected(path, crs, bbox=None, columns=None):
+    """
+    Layer at `path` in `crs`, with an `area_m2` column computed in
+    EQUAL_AREA_CRS. The reprojection runs once per (layer version, CRS);
+    afterwards the cached GeoParquet is read, with bbox (in `crs`) and
+    column pushdown as in read_vector(). Rows keep the source order.
+    """
+    from pyproj import CRS
+
+    cache_path = projected_cache_path(path, crs)
+    if not os.path.exists(cache_path):
+        gdf = read_vector(path)
+        if gdf.crs is None:
+            raise ValueError(f"Layer has no CRS, cannot reproject: {path}")
+        target = CRS.from_user_input(crs)
+        gdf[AREA_COLUMN] = gdf.geometry.to_crs(EQUAL_AREA_CRS).area
+        if not gdf.crs.equals(target):
+            gdf = gdf.to_crs(target)
+
+        # Versions of this layer/CRS from older source files are stale
+        prefix = os.path.basename(cache_path).rsplit("-", 1)[0] + "-"
+        cache_dir = os.path.dirname(cache_path)
+        if os.path.isdir(cache_dir):
+            for name in os.listdir(cache_dir):
+                if name.startswith(prefix):
+                    os.remove(os.path.join(cache_dir, name))
+        write_vector(gdf, cache_path, spatial_sort=False)
+
+    if columns is not None:
+        columns = [c for c in columns if c != AREA_COLUMN] + [AREA_COLUMN]
+    return read_vector(cache_path, bbox=bbox, columns=columns)
@@ -0,0 +1,130 @@
+"""
+wfs_reader.py
+-------------
+Paged, streaming reader for WFS 2.0 GeoJSON layers (PDOK and similar).
+
+Instead of one GetFeature request for the whole layer, pages of `count`
+features are requested at increasing `startIndex` over a pooled
+requests.Session, with a bounded number of pages in flight. Pages are
+parsed and reprojected one at a time and yielded in order as GeoDataFrame
+chunks, so only a few pages are ever in memory.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def make_session(pool_size=8, retries=3):
+    """
+    requests.Session with a connection pool large enough for `pool_size`
+    concurrent page requests, retrying transient server errors.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _fetch_page(session, url, params, start, page_size, timeout):
+    page_params = dict(params, count=page_size, startIndex=start)
+    response = session.get(url, params=page_params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def _to_frame(collection, crs, to_crs):
+    import geopandas as gpd
+
+    chunk = gpd.GeoDataFrame.from_features(collection["features"], crs=crs)
+    if to_crs is not None:
+        chunk = chunk.to_crs(to_crs)
+    return chunk
+
+
+def iter_wfs_features(url, params, crs, to_crs="EPSG:4326", page_size=1000, workers=4,
+                      session=None, timeout=120):
+    """
+    Yield the features of a WFS 2.0 layer as GeoDataFrame chunks, one per page.
+
+    params: GetFeature parameters (typeNames, outputFormat=application/json,
+    filter, ...) without count/startIndex. Paging is only stable when the
+    server orders features consistently; pass sortBy for servers that don't.
+    crs: CRS of the returned coordinates; to_crs: CRS of the yielded chunks
+    (None keeps the source CRS).
+
+    Up to `workers` pages are requested ahead. Each page starts where the
+    previous one ended: when the server returns fewer features than asked
+    (e.g. a count capped below `page_size`), pages requested ahead are
+    dropped and paging continues at the server's page length. Reading
+    stops at numberMatched when the server reports it, or at the first
+    empty page.
+    """
+    own_session = session is None
+    session = make_session(workers) if own_session else session
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            next_start = 0
+            step = page_size
+            total = None
+
+            def submit():
+                nonlocal next_start
+                future = pool.submit(_fetch_page, session, url, params, next_start, page_size, timeout)
+                in_flight.append((next_start, future))
+                next_start += step
+
+            def discard_pending():
+                for _, pending in in_flight:
+                    pending.cancel()
+                in_flight.clear()
+
+            submit()
+            while in_flight:
+                start, future = in_flight.popleft()
+                collection = future.result()
+                n_features = len(collection.get("features", []))
+                if total is None and isinstance(collection.get("numberMatched"), int):
+                    total = collection["numberMatched"]
+                end = start + n_features
+
+                if n_features == 0 or (total is not None and end >= total):
+                    # Pages requested past the end are discarded
+                    discard_pending()
+                else:
+                    if n_features < step:
+                        # Short page: the server caps the page length; pages
+                        # requested ahead would skip features
+                        discard_pending()
+                        step = n_features
+                        next_start = end
+                    while len(in_flight) < workers and (total is None or next_start < total):
+                        submit()
+
+                if n_features:
+                    yield _to_frame(collection, crs, to_crs)
+    finally:
+        if own_session:
+            session.close()
+
+
+def read_wfs(url, params, crs, to_crs="EPSG:4326", page_size=1000, workers=4, session=None, timeout=120):
+    """
+    Read a whole WFS layer page by page into one GeoDataFrame
+    (see iter_wfs_features).
+    """
+    import geopandas as gpd
+    import pandas as pd
+
+    chunks = list(iter_wfs_features(url, params, crs, to_crs=to_crs, page_size=page_size,
+                                    workers=workers, session=session, timeout=timeout))
+    target = crs if to_crs is None else to_crs
+    if not chunks:
+        return gpd.GeoDataFrame(geometry=[], crs=target)
+    return gpd.GeoDataFrame(pd.concat(chunks, ignore_index=True), crs=target)
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+from src.lst_study.Rendering import set_headless
+
+# Tests never look at figures: use Agg and skip plt.show()
+set_headless(True)
+
+# Decoded rasters go to a throwaway cache, not the repository's cache/rasters
+os.environ.setdefault("LST_RASTER_CACHE", tempfile.mkdtemp(prefix="lst_raster_cache_"))
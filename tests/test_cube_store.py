@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import rasterio
+from src.lst_study.CubeStore import ingest_lst_cube, open_cube_store, point_timeseries, bbox_timeseries
+from .test_datacube import _write_year
+
+
+def test_ingest_appends_new_years_only(tmp_path):
+    pytest.importorskip("zarr")
+    rng = np.random.default_rng(1)
+    rasters = tmp_path / "modis_image"
+    rasters.mkdir()
+    store = str(tmp_path / "cube.zarr")
+
+    for year in (2020, 2021):
+        _write_year(rasters, year, rng.normal(25.0, 3.0, (30, 40)))
+    assert len(ingest_lst_cube(str(rasters), store)) == 2
+    assert ingest_lst_cube(str(rasters), store) == []
+
+    data_2022 = rng.normal(25.0, 3.0, (30, 40))
+    data_2022[0, 0] = 0
+    _write_year(rasters, 2022, data_2022)
+    assert [t.year for t in ingest_lst_cube(str(rasters), store)] == [2022]
+
+    cube = open_cube_store(store)
+    assert cube.sizes == {"time": 3, "y": 30, "x": 40}
+    assert cube.rio.crs.to_epsg() == 4326
+    assert np.isnan(cube.isel(time=2, y=0, x=0).values)
+
+    with rasterio.open(rasters / "modis_lst_mean_2022.tif") as src:
+        x, y = src.xy(10, 20)
+        expected = src.read(1)[10, 20]
+    series = point_timeseries(x, y, store)
+    assert series.iloc[-1] == pytest.approx(expected)
+
+    stats = bbox_timeseries(x - 0.05, y - 0.05, x + 0.05, y + 0.05, store)
+    assert len(stats) == 3 and (stats["count"] > 0).all()
+
+
+def test_out_of_order_years_are_rejected(tmp_path):
+    pytest.importorskip("zarr")
+    rng = np.random.default_rng(2)
+    rasters = tmp_path / "modis_image"
+    rasters.mkdir()
+    store = str(tmp_path / "cube.zarr")
+
+    _write_year(rasters, 2021, rng.normal(25.0, 3.0, (30, 40)))
+    ingest_lst_cube(str(rasters), store)
+    _write_year(rasters, 2020, rng.normal(25.0, 3.0, (30, 40)))
+    with pytest.raises(ValueError, match="earlier than"):
+        ingest_lst_cube(str(rasters), store)
+    assert open_cube_store(store).sizes["time"] == 1
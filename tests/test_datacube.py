@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from src.lst_study.DataCube import time_from_filename, list_lst_files, open_lst_cube, lst_timeseries_stats
+
+
+def _write_year(folder, year, data):
+    path = folder / f"modis_lst_mean_{year}.tif"
+    with rasterio.open(
+        path, "w", driver="GTiff", height=data.shape[0], width=data.shape[1], count=1,
+        dtype="float32", crs="EPSG:4326", transform=from_origin(4.7, 52.45, 0.01, 0.01), nodata=0,
+    ) as dst:
+        dst.write(data.astype(np.float32), 1)
+    return path
+
+
+@pytest.fixture
+def lst_folder(tmp_path):
+    rng = np.random.default_rng(0)
+    for year in (2022, 2020, 2021):
+        data = rng.normal(25.0, 3.0, (30, 40))
+        data[:5, :5] = 0  # nodata
+        _write_year(tmp_path, year, data)
+    return tmp_path
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("modis_lst_mean_2025.tif", "2025-01-01"),
+    ("lst_2020-06-01.tif", "2020-06-01"),
+    ("lst_20200601.tif", "2020-06-01"),
+    ("MOD11A1.A2020153.tif", "2020-06-01"),
+])
+def test_time_from_filename(name, expected):
+    assert time_from_filename(name) == pd.Timestamp(expected)
+
+def test_lazy_cube_statistics_match_eager(lst_folder):
+    files = list_lst_files(str(lst_folder))
+    assert [time_from_filename(f).year for f in files] == [2020, 2021, 2022]
+
+    cube = open_lst_cube(files, chunks={"y": 8, "x": 16})
+    assert cube.chunks is not None
+    assert np.issubdtype(cube["time"].dtype, np.datetime64)
+
+    stats = lst_timeseries_stats(cube, workers=2)
+    for f, (_, row) in zip(files, stats.iterrows()):
+        with rasterio.open(f) as src:
+            data = src.read(1).astype(float)
+        data[data == 0] = np.nan
+        assert row["mean"] == pytest.approx(np.nanmean(data), rel=1e-5)
+        assert row["max"] == pytest.approx(np.nanmax(data))
+        assert row["min"] == pytest.approx(np.nanmin(data))
+
+def test_fused_statistics_skip_nodata_without_masking(lst_folder):
+    files = list_lst_files(str(lst_folder))
+    cube = open_lst_cube(files, chunks={"y": 7, "x": 9}, mask_nodata=False)
+    stats = lst_timeseries_stats(cube, nodata=0, percentiles=(50, 95))
+
+    for f, (_, row) in zip(files, stats.iterrows()):
+        with rasterio.open(f) as src:
+            data = src.read(1).astype(float)
+        values = data[data != 0]
+        assert row["count"] == values.size
+        assert row["mean"] == pytest.approx(values.mean(), rel=1e-9)
+        assert row["std"] == pytest.approx(values.std(), rel=1e-6)
+        assert row["min"] == pytest.approx(values.min())
+        assert row["max"] == pytest.approx(values.max())
+        # Histogram sketch is exact to one 0.02 °C bin
+        assert abs(row["p50"] - np.percentile(values, 50)) < 0.05
+        assert abs(row["p95"] - np.percentile(values, 95)) < 0.05
+
+def test_block_merge_keeps_small_variance_at_large_offset():
+    import xarray as xr
+
+    rng = np.random.default_rng(1)
+    values = 1e6 + rng.normal(0.0, 0.01, (2, 40, 60))
+    values[0, :3, :3] = np.nan
+    cube = xr.DataArray(values, dims=("time", "y", "x"), coords={"time": pd.date_range("2020", periods=2, freq="YS")})
+    stats = lst_timeseries_stats(cube.chunk({"y": 7, "x": 11}))
+
+    for t in range(2):
+        assert stats["std"].iloc[t] == pytest.approx(np.nanstd(values[t]), rel=1e-6)
+        assert stats["mean"].iloc[t] == pytest.approx(np.nanmean(values[t]), rel=1e-12)
@@ -0,0 +1,129 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+
+from src.lst_study.data_collection import export_tiles
+from src.lst_study.export_scheduler import ExportClient, ExportScheduler, ExportTask
+
+
+class FakeExportClient(ExportClient):
+    """
+    Stands in for Earth Engine: writes the image value to the file,
+    failing the first `failures[name]` attempts of a task.
+    """
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def export_image(self, image, filename, scale, region, **kwargs):
+        with self._lock:
+            self.calls.append(image)
+            if self.failures.get(image, 0) > 0:
+                self.failures[image] -= 1
+                raise ConnectionError("simulated Earth Engine timeout")
+        with open(filename, "w") as f:
+            f.write(f"{image}:{scale}")
+
+
+def _tasks(tmp_path, years, scale=1000):
+    return [
+        ExportTask(f"modis_{y}", str(tmp_path / f"modis_lst_mean_{y}.tif"), lambda y=y: f"modis_{y}",
+                   scale, region="AOI", params={"year": y})
+        for y in years
+    ]
+
+
+def test_scheduler_retries_and_resumes(tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+    client = FakeExportClient(failures={"modis_2021": 1, "modis_2022": 5})
+    scheduler = ExportScheduler(client, manifest, max_workers=3, retries=2, backoff=0)
+
+    status = scheduler.run(_tasks(tmp_path, [2020, 2021, 2022]))
+    assert status == {"modis_2020": "done", "modis_2021": "done", "modis_2022": "failed"}
+    assert not (tmp_path / "modis_lst_mean_2022.tif").exists()
+    assert not list(tmp_path.glob("*.part.tif"))
+    with open(manifest) as f:
+        assert json.load(f)["modis_2022"]["status"] == "failed"
+
+    # A new run (fresh scheduler, same manifest) only redoes the failed year
+    client = FakeExportClient()
+    status = ExportScheduler(client, manifest, backoff=0).run(_tasks(tmp_path, [2020, 2021, 2022]))
+    assert status == {"modis_2020": "skipped", "modis_2021": "skipped", "modis_2022": "done"}
+    assert client.calls == ["modis_2022"]
+
+    # Changed parameters invalidate the existing outputs
+    status = ExportScheduler(client, manifest, backoff=0).run(_tasks(tmp_path, [2020], scale=500))
+    assert status == {"modis_2020": "done"}
+    assert (tmp_path / "modis_lst_mean_2020.tif").read_text() == "modis_2020:500"
+
+
+def test_postprocess_runs_before_the_file_is_moved_into_place(tmp_path):
+    seen = []
+
+    def postprocess(path):
+        seen.append(path)
+        with open(path, "a") as f:
+            f.write(":encoded")
+
+    task = ExportTask("modis_2020", str(tmp_path / "modis_lst_mean_2020.tif"), lambda: "modis_2020",
+                      1000, region="AOI", params={"year": 2020}, postprocess=postprocess)
+    status = ExportScheduler(FakeExportClient(), str(tmp_path / "manifest.json"), backoff=0).run([task])
+    assert status == {"modis_2020": "done"}
+    assert seen == [str(tmp_path / "modis_lst_mean_2020.part.tif")]
+    assert (tmp_path / "modis_lst_mean_2020.tif").read_text() == "modis_2020:1000:encoded"
+
+
+class RasterExportClient(ExportClient):
+    """
+    Writes a 2-band 10 m tile whose top-left corner is `region` (x, y).
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def export_image(self, image, filename, scale, region, **kwargs):
+        self.calls.append(image)
+        data = np.full((2, 8, 8), len(self.calls), dtype=np.uint16)
+        with rasterio.open(
+            filename, "w", driver="GTiff", height=8, width=8, count=2, dtype="uint16",
+            crs="EPSG:32631", transform=from_origin(*region, scale, scale), nodata=0,
+        ) as dst:
+            dst.write(data)
+
+
+def test_client_interface_is_abstract():
+    with pytest.raises(TypeError):
+        ExportClient()
+
+
+def test_tiles_are_merged_once_and_removed(tmp_path):
+    def tasks():
+        return [
+            ExportTask(f"tile_{i}", str(tmp_path / f"mosaic_c{i}.tif"), lambda i=i: f"tile_{i}", 10,
+                       region=(600000 + 80 * i, 5820000), params={"tile": i})
+            for i in range(2)
+        ]
+
+    out_path = str(tmp_path / "mosaic.tif")
+    mosaic = ExportTask("mosaic", out_path, None, 10, region=None, params={"tiles": [1, 2]})
+    client = RasterExportClient()
+    manifest = str(tmp_path / "manifest.json")
+
+    status = export_tiles(ExportScheduler(client, manifest, backoff=0), mosaic, tasks())
+    assert status == {"tile_0": "done", "tile_1": "done", "mosaic": "done"}
+    assert not list(tmp_path.glob("mosaic_c*.tif"))
+    with rasterio.open(out_path) as src:
+        assert src.shape == (8, 16)
+
+    # Same parameters: nothing is exported or merged again
+    mtime = (tmp_path / "mosaic.tif").stat().st_mtime_ns
+    status = export_tiles(ExportScheduler(client, manifest, backoff=0), mosaic, tasks())
+    assert status == {"mosaic": "skipped"}
+    assert client.calls == ["tile_0", "tile_1"]
+    assert (tmp_path / "mosaic.tif").stat().st_mtime_ns == mtime
@@ -0,0 +1,79 @@
+import geopandas as gpd
+import numpy as np
+import pytest
+from shapely.geometry import Point, Polygon, box
+
+from src.lst_study.HotspotIndex import HotspotIndex
+
+
+@pytest.fixture
+def landuse():
+    # 40 x 40 grid of 100 m parcels in RD New
+    rng = np.random.default_rng(3)
+    xs, ys = np.meshgrid(np.arange(40), np.arange(40))
+    xs, ys = 120000 + 100 * xs.ravel(), 485000 + 100 * ys.ravel()
+    gdf = gpd.GeoDataFrame(
+        {
+            "landuse": rng.choice(["residential", "industrial", "grass"], xs.size),
+            "mean_lst": rng.normal(27, 3, xs.size),
+        },
+        geometry=[box(x, y, x + 90, y + 90) for x, y in zip(xs, ys)],
+        crs="EPSG:28992",
+    )
+    gdf.loc[5, "mean_lst"] = np.nan
+    return gdf
+
+
+def test_within_distance_matches_brute_force(landuse):
+    index = HotspotIndex(landuse)
+    point = Point(121234, 486789)
+    result = index.within_distance((point.x, point.y), 500, where={"mean_lst": (28, None)}, top=5)
+
+    brute = landuse[(landuse.distance(point) <= 500) & (landuse["mean_lst"] >= 28)]
+    brute = brute.sort_values("mean_lst", ascending=False).head(5)
+    assert list(result.index) == list(brute.index)
+    assert (result["distance"] <= 500).all()
+
+
+def test_batched_bbox_and_polygon_queries(landuse):
+    index = HotspotIndex(landuse)
+    boxes = np.array([[120000, 485000, 120500, 485500], [122000, 487000, 122300, 487300]])
+    result = index.in_bbox(boxes, where={"landuse": ["industrial", "grass"]})
+
+    for q, bounds in enumerate(boxes):
+        brute = landuse[landuse.intersects(box(*bounds)) & landuse["landuse"].isin(["industrial", "grass"])]
+        assert set(result[result["query"] == q].index) == set(brute.index)
+
+    district = box(120000, 485000, 121000, 486000)
+    hot_industry = index.in_polygon(district, where={"landuse": "industrial", "mean_lst": (30, None)})
+    assert (hot_industry["landuse"] == "industrial").all()
+    assert (hot_industry["mean_lst"] >= 30).all()
+    assert hot_industry["mean_lst"].is_monotonic_decreasing
+
+
+def test_knn_with_filter(landuse):
+    index = HotspotIndex(landuse)
+    points = [Point(121555, 486555), Point(100000, 480000)]  # the second is far outside the layer
+    result = index.nearest(points, k=3, where={"landuse": "grass"})
+
+    grass = landuse[landuse["landuse"] == "grass"]
+    for q, point in enumerate(points):
+        expected = grass.distance(point).sort_values().head(3)
+        got = result[result["query"] == q]
+        np.testing.assert_allclose(got["distance"].to_numpy(), expected.to_numpy())
+
+
+def test_geographic_layer_and_query_crs(landuse):
+    index = HotspotIndex(landuse.to_crs(4326))
+    assert not index.crs.is_geographic
+
+    lonlat = gpd.GeoSeries([Point(121234, 486789)], crs=28992).to_crs(4326).iloc[0]
+    result = index.within_distance((lonlat.x, lonlat.y), 300, geometry_crs="EPSG:4326")
+    brute = landuse[landuse.distance(Point(121234, 486789)) <= 300]
+    assert set(result.index) == set(brute.index)
+
+
+def test_knn_on_empty_index(landuse):
+    for gdf in (landuse.iloc[:0], landuse.iloc[:3].set_geometry([Polygon()] * 3, crs=landuse.crs)):
+        result = HotspotIndex(gdf).nearest([Point(121555, 486555)], k=3)
+        assert result.empty and list(result.columns[:2]) == ["query", "distance"]
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.lst_study.__main__ import main
+
+from .test_datacube import _write_year
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Network-only or heavy modules that must not load on these paths
+HEAVY = ("ee", "geemap", "osmnx", "geopandas", "matplotlib.pyplot", "xarray", "rasterstats", "rioxarray")
+
+# Cumulative import time budget in microseconds; generous for slow CI machines
+BUDGET_US = 1_500_000
+
+
+def _importtime(*args):
+    """
+    Run python -X importtime with `args`; return {module: cumulative microseconds}.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop("LST_HEADLESS", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative_us)
+    return modules
+
+
+@pytest.mark.parametrize("command", [
+    ["-c", "import src.lst_study"],
+    ["-c", "import src.lst_study.NumpyArrays"],
+    ["-c", "import src.lst_study.study_pipeline"],
+    ["-c", "import src.lst_study.data_collection"],
+    ["-m", "src.lst_study", "--help"],
+])
+def test_startup_does_not_load_heavy_modules(command):
+    modules = _importtime(*command)
+    loaded = [name for name in HEAVY if name in modules]
+    assert loaded == []
+    # The outermost package import includes everything it pulled in
+    assert max(us for name, us in modules.items() if name.startswith("src.lst_study")) < BUDGET_US
+
+
+def test_package_attributes_load_lazily():
+    import src.lst_study as package
+
+    assert package.pipeline.Pipeline is not None
+    assert "vector_store" in dir(package)
+    with pytest.raises(AttributeError):
+        package.nope
+
+
+def test_timeseries_command(tmp_path, capsys):
+    rng = np.random.default_rng(0)
+    for year in (2020, 2021):
+        _write_year(tmp_path, year, rng.normal(25.0, 3.0, (10, 12)))
+
+    out = tmp_path / "stats.csv"
+    main(["timeseries", str(tmp_path), "--out", str(out)])
+    assert len(pd.read_csv(out)) == 2
+
+    with pytest.raises(SystemExit):
+        main(["timeseries", str(tmp_path), "--bogus"])
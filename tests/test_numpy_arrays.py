@@ -0,0 +1,97 @@
+import numpy as np
+import geopandas as gpd
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from shapely.geometry import Point
+from rasterio.warp import reproject, Resampling
+from src.lst_study.NumpyArrays import threshold_and_mask_modis, lst_ndvi_arrays_streaming
+
+
+@pytest.fixture
+def modis_and_aoi(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.normal(24.0, 3.0, (60, 80)).astype(np.float32)
+    data[20:22, 30:32] = 0
+    raster_path = tmp_path / "modis_lst_mean_2025.tif"
+    with rasterio.open(
+        raster_path, "w", driver="GTiff", height=60, width=80, count=1, dtype="float32",
+        crs="EPSG:4326", transform=from_origin(4.5, 52.6, 0.01, 0.01), nodata=0,
+    ) as dst:
+        dst.write(data, 1)
+
+    aoi_path = tmp_path / "aoi.shp"
+    gpd.GeoDataFrame(geometry=[Point(4.9, 52.37).buffer(0.12)], crs="EPSG:4326").to_file(aoi_path)
+    return str(raster_path), str(aoi_path)
+
+
+def test_windowed_masking_matches_full_read(modis_and_aoi):
+    raster_path, aoi_path = modis_and_aoi
+    full, full_transform, _, _ = threshold_and_mask_modis(raster_path, aoi_path, threshold=25, windowed=False)
+    window, transform, _, _ = threshold_and_mask_modis(raster_path, aoi_path, threshold=25, windowed=True)
+
+    assert window.dtype == np.float32
+    assert window.size < full.size
+    col_off, row_off = ~full_transform * (transform.c, transform.f)
+    r0, c0 = int(round(row_off)), int(round(col_off))
+    sub = full[r0:r0 + window.shape[0], c0:c0 + window.shape[1]]
+    np.testing.assert_array_equal(window, sub)
+
+    # Nothing valid outside the window, and everything valid is <= threshold
+    assert np.count_nonzero(~np.isnan(full)) == np.count_nonzero(~np.isnan(window)) > 0
+    assert np.nanmax(window) <= 25
+
+
+def test_streaming_ndvi_matches_single_full_warp(modis_and_aoi, tmp_path):
+    raster_path, _ = modis_and_aoi
+    rng = np.random.default_rng(1)
+    # Sentinel-like bands in Web Mercator at 200 m, covering the MODIS grid
+    transform = from_origin(495000, 6915000, 200, 200)
+    red = rng.uniform(100, 2000, (600, 600)).astype(np.float32)
+    nir = rng.uniform(100, 4000, (600, 600)).astype(np.float32)
+    red[:40, :40] = 0
+    sentinel_path = tmp_path / "sentinel2_mosaic.tif"
+    with rasterio.open(
+        sentinel_path, "w", driver="GTiff", height=600, width=600, count=2,
+        dtype="float32", crs="EPSG:3857", transform=transform,
+    ) as dst:
+        dst.write(np.stack([red, nir]))
+
+    lst, ndvi = lst_ndvi_arrays_streaming(raster_path, str(sentinel_path), block_size=16)
+
+    native = (nir - red) / (nir + red + np.float32(1e-10))
+    native[red == 0] = np.nan
+    expected = np.full(lst.shape, np.nan, dtype=np.float32)
+    with rasterio.open(raster_path) as src:
+        reproject(
+            native, expected, src_transform=transform, src_crs="EPSG:3857", src_nodata=np.nan,
+            dst_transform=src.transform, dst_crs=src.crs, dst_nodata=np.nan,
+            resampling=Resampling.average,
+        )
+    assert ndvi.dtype == np.float32 and lst.shape == ndvi.shape
+    assert np.count_nonzero(~np.isnan(ndvi)) > 0
+    np.testing.assert_allclose(ndvi, expected, atol=1e-6)
+
+
+def test_zero_celsius_kept_unless_legacy_nodata_given(modis_and_aoi, tmp_path):
+    from src.lst_study.raster_store import read_band, write_lst
+
+    raster_path, aoi_path = modis_and_aoi
+    with rasterio.open(raster_path) as src:
+        celsius, transform = read_band(src), src.transform
+    celsius[30:32, 40:42] = 0.0   # a real 0 °C patch inside the AOI
+    lst_path = write_lst(str(tmp_path / "lst_int16.tif"), celsius, transform, "EPSG:4326")
+
+    masked, _, _, _ = threshold_and_mask_modis(lst_path, aoi_path, windowed=False)
+    np.testing.assert_allclose(masked[30:32, 40:42], 0.0, atol=0.011)
+    assert np.isnan(masked[20:22, 30:32]).all()   # declared nodata of the source
+
+    # Legacy float export storing missing pixels as an undeclared 0
+    legacy_path = tmp_path / "lst_legacy.tif"
+    with rasterio.open(
+        legacy_path, "w", driver="GTiff", height=60, width=80, count=1, dtype="float32",
+        crs="EPSG:4326", transform=transform,
+    ) as dst:
+        dst.write(np.nan_to_num(celsius), 1)
+    legacy, _, _, _ = threshold_and_mask_modis(str(legacy_path), aoi_path, windowed=False, nodata=0)
+    assert np.isnan(legacy[30:32, 40:42]).all()
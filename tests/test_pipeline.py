@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from src.lst_study.pipeline import Pipeline, PipelineError, Stage
+from src.lst_study.study_pipeline import StudyConfig, build_pipeline
+
+
+class Recorder:
+    """
+    Stage bodies that copy/concatenate files and record which stages ran.
+    """
+
+    def __init__(self):
+        self.ran = []
+        self._lock = threading.Lock()
+
+    def stage(self, name, inputs, outputs, transform=str.upper, fail=False, delay=0.0):
+        def run():
+            with self._lock:
+                self.ran.append(name)
+            time.sleep(delay)
+            if fail:
+                raise RuntimeError(f"{name} failed")
+            text = "".join(open(p).read() for p in inputs)
+            for path in outputs:
+                with open(path, "w") as f:
+                    f.write(transform(text) + name)
+
+        return Stage(name, run, inputs=inputs, outputs=outputs)
+
+
+def _diamond(tmp_path, recorder, **kwargs):
+    src, a, b, c = (str(tmp_path / n) for n in ("src.txt", "a.txt", "b.txt", "c.txt"))
+    stages = [
+        recorder.stage("a", [src], [a], **kwargs.get("a", {})),
+        recorder.stage("b", [src], [b], **kwargs.get("b", {})),
+        recorder.stage("c", [a, b], [c], **kwargs.get("c", {})),
+    ]
+    return Pipeline(stages, state_path=str(tmp_path / "state.json")), src, c
+
+
+def test_rerun_executes_only_stale_stages(tmp_path):
+    recorder = Recorder()
+    pipeline, src, c = _diamond(tmp_path, recorder)
+    with open(src, "w") as f:
+        f.write("x")
+
+    assert pipeline.run() == {"a": "ran", "b": "ran", "c": "ran"}
+    assert pipeline.deps == {"a": [], "b": [], "c": ["a", "b"]}
+
+    # New process, nothing changed
+    recorder.ran.clear()
+    pipeline, src, c = _diamond(tmp_path, recorder)
+    assert pipeline.run() == {"a": "fresh", "b": "fresh", "c": "fresh"}
+    assert recorder.ran == []
+
+    # Touching a file without changing its content does not rerun anything
+    with open(src, "w") as f:
+        f.write("x")
+    assert set(pipeline.run().values()) == {"fresh"}
+
+    # Changed source: everything downstream reruns
+    with open(src, "w") as f:
+        f.write("y")
+    assert pipeline.run() == {"a": "ran", "b": "ran", "c": "ran"}
+    assert open(c).read() == "YAYBc"
+
+    # A deleted output reruns its stage only; c's inputs are unchanged
+    (tmp_path / "b.txt").unlink()
+    assert pipeline.run() == {"a": "fresh", "b": "ran", "c": "fresh"}
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    recorder = Recorder()
+    pipeline, src, _ = _diamond(tmp_path, recorder, a={"delay": 0.3}, b={"delay": 0.3})
+    with open(src, "w") as f:
+        f.write("x")
+
+    start = time.perf_counter()
+    pipeline.run()
+    assert time.perf_counter() - start < 0.55
+
+
+def test_failure_blocks_dependents_only(tmp_path):
+    recorder = Recorder()
+    pipeline, src, _ = _diamond(tmp_path, recorder, a={"fail": True})
+    with open(src, "w") as f:
+        f.write("x")
+
+    assert pipeline.run() == {"a": "failed", "b": "ran", "c": "blocked"}
+    assert pipeline.state["stages"]["a"]["status"] == "failed"
+
+
+def test_target_selection(tmp_path):
+    recorder = Recorder()
+    pipeline, src, _ = _diamond(tmp_path, recorder)
+    with open(src, "w") as f:
+        f.write("x")
+
+    assert pipeline.run(["a"]) == {"a": "ran"}
+    with pytest.raises(PipelineError):
+        pipeline.run(["nope"])
+    # --only: c without (re)checking its dependencies; b never ran, so c cannot
+    assert pipeline.run(["c"], with_deps=False) == {"c": "failed"}
+    assert pipeline.run(["c"]) == {"a": "fresh", "b": "ran", "c": "ran"}
+
+
+def test_study_pipeline_graph(tmp_path):
+    config = StudyConfig(data_dir=str(tmp_path / "data"), maps_dir=str(tmp_path / "maps"), tables_dir=str(tmp_path / "tables"))
+    pipeline = build_pipeline(config, state_path=str(tmp_path / "state.json"))
+
+    assert pipeline.deps["zonal"] == ["clip", "fetch_vectors"]
+    assert pipeline.deps["render"] == ["aggregate", "fetch_vectors", "ndvi", "threshold", "timeseries"]
+    assert pipeline.select(["aggregate"]) == {"aggregate", "zonal", "clip", "export_modis", "fetch_vectors"}
+
+
+def test_force_reruns_only_the_named_targets(tmp_path):
+    recorder = Recorder()
+    pipeline, src, _ = _diamond(tmp_path, recorder)
+    with open(src, "w") as f:
+        f.write("x")
+    pipeline.run()
+
+    recorder.ran.clear()
+    assert pipeline.run(["c"], force=True) == {"a": "fresh", "b": "fresh", "c": "ran"}
+    assert recorder.ran == ["c"]
+    assert set(pipeline.run(force=True).values()) == {"ran"}
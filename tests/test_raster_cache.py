@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pytest
+from rasterio.windows import Window
+
+from src.lst_study import raster_cache
+from src.lst_study.DataCube import lst_timeseries_stats, open_lst_cube
+from src.lst_study.raster_cache import RasterCache
+from src.lst_study.raster_store import read_band
+
+from .test_datacube import _write_year
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    calls = []
+
+    def counting_read_band(path, band=1, window=None):
+        calls.append((os.path.basename(path), window))
+        return read_band(path, band, window=window)
+
+    monkeypatch.setattr(raster_cache, "read_band", counting_read_band)
+    return calls
+
+
+@pytest.fixture
+def raster(tmp_path):
+    data = np.random.default_rng(0).normal(25.0, 3.0, (30, 40))
+    data[:5, :5] = 0
+    return _write_year(tmp_path, 2020, data)
+
+
+def test_decoded_once_and_shared_read_only(tmp_path, raster, decodes):
+    cache = RasterCache(str(tmp_path / "cache"))
+    first = cache.read(raster)
+    second = cache.read(raster)
+
+    assert decodes == [("modis_lst_mean_2020.tif", None)]
+    assert isinstance(second, np.memmap) and not second.flags.writeable
+    assert second.dtype == np.float32
+    np.testing.assert_array_equal(second, read_band(raster))
+    np.testing.assert_array_equal(first, second)
+    with pytest.raises(ValueError):
+        second[0, 0] = 1
+
+    # Windows are separate entries; a new cache on the same directory reuses them
+    window = Window(10, 5, 8, 6)
+    np.testing.assert_array_equal(cache.read(raster, window=window), read_band(raster)[5:11, 10:18])
+    RasterCache(str(tmp_path / "cache")).read(raster, window=window)
+    assert len(decodes) == 2
+
+
+def test_rewritten_raster_is_decoded_again(tmp_path, raster, decodes):
+    cache = RasterCache(str(tmp_path / "cache"))
+    cache.read(raster)
+    data = np.full((30, 40), 30.0)
+    _write_year(tmp_path, 2020, data)
+    os.utime(raster, ns=(0, 10 ** 18))
+
+    np.testing.assert_allclose(cache.read(raster), data)
+    assert len(decodes) == 2
+    # The superseded entry was dropped
+    assert len(list((tmp_path / "cache").glob("*.npy"))) == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, raster, decodes):
+    one_entry = 30 * 40 * 4 + 128
+    cache = RasterCache(str(tmp_path / "cache"), max_bytes=2 * one_entry + 100)
+    full, left, right = None, Window(0, 0, 20, 30), Window(20, 0, 20, 30)
+    cache.read(raster, window=full)
+    cache.read(raster, window=left)
+    cache.read(raster, window=full)    # full is now more recent than left
+    cache.read(raster, window=right)   # over the cap: left goes
+
+    cache.read(raster, window=full)
+    assert len(decodes) == 3
+    cache.read(raster, window=left)
+    assert len(decodes) == 4
+
+
+def test_cached_cube_matches_direct_read(tmp_path):
+    rng = np.random.default_rng(0)
+    for year in (2020, 2021):
+        data = rng.normal(25.0, 3.0, (30, 40))
+        data[:5, :5] = 0
+        _write_year(tmp_path, year, data)
+
+    direct = lst_timeseries_stats(open_lst_cube(str(tmp_path), chunks={"y": 16, "x": 16}, mask_nodata=False), nodata=0)
+    cube = open_lst_cube(str(tmp_path), chunks={"y": 16, "x": 16}, mask_nodata=False, cached=True)
+    assert cube.chunks == ((1, 1), (16, 14), (16, 16, 8))
+    cached = lst_timeseries_stats(cube, nodata=0)
+    np.testing.assert_allclose(cached.to_numpy(), direct.to_numpy())
+
+
+def test_hits_do_not_rewrite_the_index_and_writers_merge(tmp_path, raster):
+    index_path = tmp_path / "cache" / "index.json"
+    first = RasterCache(str(tmp_path / "cache"))
+    second = RasterCache(str(tmp_path / "cache"))
+    first.read(raster)
+    os.utime(index_path, ns=(0, 0))
+    first.read(raster)
+    assert index_path.stat().st_mtime_ns == 0
+
+    # A second instance on the same directory keeps the first one's entry
+    window = Window(0, 0, 10, 10)
+    second.read(raster, window=window)
+    assert RasterCache(str(tmp_path / "cache"))._load_index().keys() == {
+        first.key(raster), first.key(raster, window=window)
+    }
+
+    (tmp_path / "cache" / "orphan.npy").write_bytes(b"")
+    first.clear()
+    assert os.listdir(tmp_path / "cache") == ["index.json"]
@@ -0,0 +1,152 @@
+import os
+
+import numpy as np
+import pytest
+import rasterio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from src.lst_study.DataCube import lst_timeseries_stats, open_lst_cube
+from src.lst_study.NumpyArrays import lst_ndvi_arrays_streaming
+from src.lst_study.raster_store import (
+    LST_NODATA, LST_SCALE, decode, encode_lst, encode_lst_file, is_cog, open_at_resolution,
+    overview_level, read_band, to_cog, write_lst, write_raster,
+)
+
+from .test_datacube import _write_year
+
+
+TRANSFORM = from_origin(4.7, 52.45, 0.01, 0.01)
+
+
+@pytest.fixture
+def celsius():
+    rng = np.random.default_rng(3)
+    data = rng.normal(25.0, 4.0, (300, 400)).astype(np.float32)
+    data[:10, :10] = np.nan
+    return data
+
+
+def test_encode_decode_within_sensor_precision(celsius):
+    dn = encode_lst(celsius)
+    assert dn.dtype == np.int16
+    assert (dn[:10, :10] == LST_NODATA).all()
+    assert (dn[10:] > 0).all()
+
+    decoded = decode(dn, LST_SCALE, -273.15, LST_NODATA)
+    assert decoded.dtype == np.float32
+    assert np.isnan(decoded[:10, :10]).all()
+    np.testing.assert_allclose(decoded[10:], celsius[10:], atol=LST_SCALE / 2 + 1e-4)
+
+
+def test_write_lst_is_a_compact_cog(celsius, tmp_path):
+    path = write_lst(str(tmp_path / "lst.tif"), celsius, TRANSFORM, "EPSG:4326")
+    with rasterio.open(path) as src:
+        assert src.dtypes[0] == "int16"
+        assert src.nodata == LST_NODATA
+        assert src.scales[0] == LST_SCALE
+        assert src.profile["tiled"] and src.profile["compress"] == "deflate"
+        assert src.tags(ns="IMAGE_STRUCTURE")["LAYOUT"] == "COG"
+
+        window = Window(50, 20, 64, 32)
+        np.testing.assert_allclose(read_band(src, window=window), celsius[20:52, 50:114], atol=0.011)
+
+    float_path = tmp_path / "lst_float.tif"
+    with rasterio.open(
+        float_path, "w", driver="GTiff", height=celsius.shape[0], width=celsius.shape[1], count=1,
+        dtype="float32", crs="EPSG:4326", transform=TRANSFORM, nodata=np.nan,
+    ) as dst:
+        dst.write(celsius, 1)
+    assert os.path.getsize(path) * 2 < os.path.getsize(float_path)
+
+
+def test_legacy_celsius_file_is_reencoded(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.normal(25.0, 3.0, (30, 40))
+    data[:5, :5] = 0
+    path = _write_year(tmp_path, 2020, data)
+    before = read_band(path)
+
+    encode_lst_file(str(path))
+    after = read_band(path)
+    with rasterio.open(path) as src:
+        assert src.dtypes[0] == "int16"
+    assert np.isnan(after[:5, :5]).all()
+    np.testing.assert_allclose(after, np.where(before == 0, np.nan, before), atol=0.011)
+
+
+def test_cube_decodes_scaled_layers(tmp_path):
+    rng = np.random.default_rng(0)
+    float_dir, int_dir = tmp_path / "float", tmp_path / "int"
+    float_dir.mkdir()
+    int_dir.mkdir()
+    for year in (2020, 2021):
+        data = rng.normal(25.0, 3.0, (30, 40))
+        data[:5, :5] = 0
+        _write_year(float_dir, year, data)
+        encode_lst_file(str(_write_year(int_dir, year, data)))
+
+    cube = open_lst_cube(str(int_dir))
+    assert cube.dtype == np.float32
+    expected = lst_timeseries_stats(open_lst_cube(str(float_dir)))
+    result = lst_timeseries_stats(cube)
+    assert (result["count"] == expected["count"]).all()
+    np.testing.assert_allclose(result["mean"], expected["mean"], atol=0.01)
+
+
+def test_to_cog_adds_overviews_and_keeps_scaling(tmp_path):
+    path = tmp_path / "strips.tif"
+    data = np.arange(1200 * 1000, dtype=np.int16).reshape(1200, 1000) % 5000 + 1
+    with rasterio.open(
+        path, "w", driver="GTiff", height=1200, width=1000, count=1, dtype="int16",
+        crs="EPSG:32631", transform=from_origin(600000, 5820000, 10, 10), nodata=0,
+    ) as dst:
+        dst.write(data, 1)
+        dst.scales, dst.offsets = (LST_SCALE,), (-273.15,)
+    assert not is_cog(path)
+
+    to_cog(str(path))
+    assert is_cog(path)
+    with rasterio.open(path) as src:
+        assert src.overviews(1) == [2, 4, 8]
+        assert src.scales[0] == LST_SCALE and src.nodata == 0
+        np.testing.assert_array_equal(src.read(1), data)
+        assert overview_level(src, 1000, oversample=4) == 2   # 80 m <= 250 m
+        assert overview_level(src, 50) is None
+    with open_at_resolution(str(path), 1000) as src:
+        assert src.res == (80.0, 80.0) and src.shape == (150, 125)
+
+
+def test_streaming_ndvi_reads_sentinel_overviews(tmp_path):
+    lst = np.full((60, 80), 25.0, dtype=np.float32)
+    lst_path = write_lst(str(tmp_path / "modis_lst_mean_2025.tif"), lst, from_origin(4.5, 52.6, 0.01, 0.01), "EPSG:4326")
+
+    # Smooth RED/NIR fields at 60 m in Web Mercator, stored as a COG with overviews
+    rows, cols = np.mgrid[0:2000, 0:2000].astype(np.float32)
+    red = 500 + 0.3 * rows + 0.2 * cols
+    nir = 3000 - 0.4 * rows + 0.3 * cols
+    sentinel_path = write_raster(
+        str(tmp_path / "sentinel2_mosaic.tif"), np.stack([red, nir]).astype(np.uint16),
+        from_origin(495000, 6915000, 60, 60), "EPSG:3857", nodata=0,
+    )
+    with rasterio.open(sentinel_path) as src:
+        assert src.overviews(1) == [2, 4, 8]
+
+    _, native = lst_ndvi_arrays_streaming(lst_path, sentinel_path, block_size=16)
+    _, coarse = lst_ndvi_arrays_streaming(lst_path, sentinel_path, block_size=16, oversample=4)
+    valid = ~np.isnan(native)
+    assert valid.sum() > 0 and (np.isnan(coarse) == ~valid).mean() > 0.95
+    both = valid & ~np.isnan(coarse)
+    np.testing.assert_allclose(coarse[both], native[both], atol=0.01)
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_zero_celsius_is_a_valid_decoded_value(tmp_path, cached):
+    data = np.full((20, 30), 25.0, dtype=np.float32)
+    data[:4, :4] = 0.0
+    data[-2:, -2:] = np.nan
+    write_lst(str(tmp_path / "modis_lst_mean_2020.tif"), data, TRANSFORM, "EPSG:4326")
+
+    stats = lst_timeseries_stats(open_lst_cube(str(tmp_path), cached=cached))
+    assert stats["count"].iloc[0] == data.size - 4
+    assert stats["min"].iloc[0] == pytest.approx(0.0, abs=LST_SCALE)
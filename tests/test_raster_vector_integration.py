@@ -0,0 +1,70 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+from shapely.geometry import box
+
+from src.lst_study.RasterVectorIntegration import RasterVectorIntegration, class_summary
+
+
+def _pipeline(seed=0, n=400, n_classes=15):
+    rng = np.random.default_rng(seed)
+    classes = np.array([f"class_{i:02d}" for i in range(n_classes)])
+    landuse = gpd.GeoDataFrame(
+        {
+            "landuse": classes[rng.integers(0, n_classes, n)],
+            "mean_lst": rng.normal(25, 4, n),
+            "area_m2": rng.uniform(100, 10_000, n),
+        },
+        geometry=[box(i, 0, i + 1, 1) for i in range(n)],
+        crs="EPSG:28992",
+    )
+    landuse.loc[rng.random(n) < 0.1, "mean_lst"] = np.nan
+    landuse.loc[0, "landuse"] = None
+
+    pipeline = RasterVectorIntegration(raster_path=None, ams_vector_path=None, lu_vector_path=None)
+    pipeline.landuse = landuse
+    return pipeline
+
+
+def test_select_top_classes_matches_reference():
+    pipeline = _pipeline()
+    reference = pipeline.landuse.copy()
+    pipeline.select_top_classes(top_n=5)
+
+    grouped = reference.groupby("landuse").agg(total_area_m2=("area_m2", "sum"), avg_LST_mean=("mean_lst", "mean"))
+    dominant = grouped.sort_values("total_area_m2", ascending=False).head(5).reset_index()
+    hottest = grouped.sort_values("avg_LST_mean", ascending=False).head(5).reset_index()
+    top_types = set(dominant["landuse"]) | set(hottest["landuse"])
+    expected = reference["landuse"].apply(lambda x: x if x in top_types else "Other")
+
+    pd.testing.assert_frame_equal(pipeline.dominant_classes, dominant)
+    pd.testing.assert_frame_equal(pipeline.hottest_classes, hottest)
+    labels = pipeline.landuse["Classes_of_interest"]
+    assert isinstance(labels.dtype, pd.CategoricalDtype)
+    assert list(labels.astype(str)) == list(expected)
+    assert list(labels.cat.categories) == sorted(top_types | {"Other"})
+
+
+def test_area_weighted_mean():
+    landuse = pd.DataFrame({
+        "landuse": ["a", "a", "a", "b"],
+        "mean_lst": [20.0, 30.0, np.nan, 25.0],
+        "area_m2": [3.0, 1.0, 100.0, 2.0],
+    })
+    weighted = class_summary(landuse, area_weighted=True)
+    plain = class_summary(landuse)
+
+    assert weighted.loc["a", "avg_LST_mean"] == pytest.approx(22.5)
+    assert plain.loc["a", "avg_LST_mean"] == pytest.approx(25.0)
+    assert weighted.loc["a", "total_area_m2"] == pytest.approx(104.0)
+    assert weighted.loc["b", "avg_LST_mean"] == pytest.approx(25.0)
+
+
+def test_missing_area_is_computed_in_metres():
+    pipeline = _pipeline()
+    pipeline.landuse = pipeline.landuse.drop(columns="area_m2")
+    pipeline.select_top_classes(top_n=3)
+
+    # 1 m x 1 m squares in RD New (conformal, so the equal-area areas differ slightly)
+    assert np.allclose(pipeline.landuse["area_m2"], 1.0, rtol=1e-2)
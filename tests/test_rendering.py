@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from src.lst_study.Rendering import render_batch, is_headless
+from src.lst_study.RasterandVectorDC import render_lst_timeseries
+
+
+def test_render_batch_writes_only_requested_figures(tmp_path):
+    assert is_headless()
+    stats = pd.DataFrame(
+        {"mean": [24.0, 25.5, 25.0], "max": [30.0, 31.0, 30.5], "min": [18.0, 19.0, 18.5]},
+        index=pd.date_range("2020", periods=3, freq="YS"),
+    )
+    out_path = tmp_path / "maps" / "timeseries.png"
+    written = render_batch(
+        [
+            (render_lst_timeseries, (stats,), {"output_path": str(out_path)}),
+            (render_lst_timeseries, (stats,), {"output_path": None}),
+        ],
+        workers=2,
+    )
+    assert written == [str(out_path)]
+    assert out_path.stat().st_size > 0
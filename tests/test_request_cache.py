@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import box
+
+from src.lst_study.request_cache import RequestCache, fetch_geojson, property_equals_filter, request_key
+
+
+FEATURES = [
+    {"type": "Feature", "properties": {"naam": naam}, "geometry": box(i, 0, i + 1, 1).__geo_interface__}
+    for i, naam in enumerate(["Amsterdam", "Utrecht", "Haarlem"])
+]
+
+
+@pytest.fixture
+def wfs_stub():
+    """
+    Local WFS stand-in: serves GeoJSON and honours a naam PropertyIsEqualTo filter.
+    """
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            requests_seen.append(query)
+            features = FEATURES
+            if "filter" in query:
+                features = [f for f in FEATURES if f"<fes:Literal>{f['properties']['naam']}<" in query["filter"][0]]
+            body = json.dumps({"type": "FeatureCollection", "features": features}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/wfs", requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def _frame(n=1):
+    return gpd.GeoDataFrame({"v": list(range(n))}, geometry=[box(i, 0, i + 1, 1) for i in range(n)], crs="EPSG:28992")
+
+
+def test_warm_fetch_makes_no_request(tmp_path, wfs_stub):
+    url, seen = wfs_stub
+    params = {"typeNames": "bg:Gemeentegebied", "filter": property_equals_filter("naam", "Amsterdam")}
+
+    def fetch():
+        return RequestCache(str(tmp_path)).fetch(url, params, lambda: fetch_geojson(url, params, crs="EPSG:28992"))
+
+    cold = fetch()
+    warm = fetch()
+
+    assert len(seen) == 1
+    assert list(cold["naam"]) == ["Amsterdam"]
+    assert warm.crs == cold.crs
+    assert warm.geom_equals(cold).all()
+
+
+def test_key_ignores_param_order_but_not_values():
+    assert request_key("u", {"a": 1, "b": 2}) == request_key("u", {"b": 2, "a": 1})
+    assert request_key("u", {"a": 1}) != request_key("u", {"a": 2})
+    assert request_key("u", {"a": 1}) != request_key("v", {"a": 1})
+
+
+def test_filter_literal_is_escaped():
+    from xml.etree import ElementTree
+
+    literal = ElementTree.fromstring(property_equals_filter("naam", "Bergen <NH> & Co")).find(".//{*}Literal")
+    assert literal.text == "Bergen <NH> & Co"
+
+
+def test_hit_does_not_rewrite_the_index(tmp_path):
+    cache = RequestCache(str(tmp_path))
+    cache.put("a", _frame())
+    index_path = tmp_path / "index.json"
+    os.utime(index_path, ns=(0, 0))
+    assert cache.get("a") is not None
+    assert index_path.stat().st_mtime_ns == 0
+
+
+def test_expired_entry_is_refetched(tmp_path):
+    cache = RequestCache(str(tmp_path), ttl=60)
+    key = request_key("u")
+    cache.put(key, _frame())
+    cache._index[key]["created_at"] = time.time() - 120
+
+    assert cache.get(key) is None
+    assert not os.path.exists(cache._path(key))
+
+
+def test_lru_eviction_respects_size_cap(tmp_path):
+    cache = RequestCache(str(tmp_path), max_bytes=10**9)
+    for name in ("a", "b", "c"):
+        cache.put(name, _frame(50))
+    cache.get("a")  # a becomes most recently used
+
+    cache.max_bytes = 2 * cache._index["a"]["size"]
+    cache.put("d", _frame(50))
+
+    assert set(cache._index) == {"a", "d"}
+    assert sorted(os.listdir(tmp_path)) == ["a.parquet", "d.parquet", "index.json"]
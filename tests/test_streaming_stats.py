@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from src.lst_study.StreamingStats import CorrelationAccumulator, accumulate_arrays, render_density
+
+
+def _lst_ndvi_pairs(n=200_000, seed=0):
+    rng = np.random.default_rng(seed)
+    ndvi = rng.uniform(-0.2, 0.9, n)
+    lst = 32.0 - 9.0 * ndvi + rng.normal(0.0, 1.5, n)
+    ndvi[::97] = np.nan
+    return ndvi, lst
+
+
+def test_streaming_moments_match_in_memory():
+    ndvi, lst = _lst_ndvi_pairs()
+    acc = accumulate_arrays(ndvi.reshape(400, 500), lst.reshape(400, 500), block_size=37)
+
+    valid = ~np.isnan(ndvi)
+    x, y = ndvi[valid], lst[valid]
+    slope, intercept = np.polyfit(x, y, 1)
+    assert acc.n == valid.sum()
+    assert acc.pearson() == pytest.approx(np.corrcoef(x, y)[0, 1], rel=1e-9)
+    assert acc.slope() == pytest.approx(slope, rel=1e-9)
+    assert acc.intercept() == pytest.approx(intercept, rel=1e-9)
+
+    # Binned ranks: Spearman is approximate at 200 x 200 bins
+    rx, ry = np.argsort(np.argsort(x)), np.argsort(np.argsort(y))
+    assert acc.spearman() == pytest.approx(np.corrcoef(rx, ry)[0, 1], abs=5e-3)
+    assert acc.hist.sum() == acc.n
+
+def test_merge_equals_single_pass():
+    ndvi, lst = _lst_ndvi_pairs(10_000)
+    whole = CorrelationAccumulator().update(ndvi, lst)
+    parts = CorrelationAccumulator().update(ndvi[:3000], lst[:3000])
+    parts.merge(CorrelationAccumulator().update(ndvi[3000:], lst[3000:]))
+    assert parts.result() == pytest.approx(whole.result(), rel=1e-9)
+    np.testing.assert_array_equal(parts.hist, whole.hist)
+
+
+def test_density_of_empty_accumulator_renders(tmp_path):
+    out = tmp_path / "density.png"
+    render_density(CorrelationAccumulator(), output_path=str(out))
+    assert out.exists()
@@ -0,0 +1,59 @@
+import json
+import numpy as np
+import pytest
+
+from src.lst_study.TensorBenchmark import benchmark_config, compare_results, run_benchmark_suite, write_results
+
+
+def test_benchmark_suite_writes_diffable_report(tmp_path):
+    report = run_benchmark_suite(
+        sizes=["modis_1km"],
+        backends=["numpy_loop", "numpy_direct"],
+        kernel_sizes=[5],
+        dtypes=["float32"],
+        thread_counts=[1],
+        repeats=2,
+        isolate=False,
+    )
+    rows = report["results"]
+    assert [r["backend"] for r in rows] == ["numpy_loop", "numpy_direct"]
+    assert all(r["status"] == "ok" and r["p95_sec"] >= r["min_sec"] for r in rows)
+
+    json_path, csv_path = write_results(report, str(tmp_path / "bench"))
+    with open(json_path) as f:
+        reloaded = json.load(f)
+    ratios = [r["ratio"] for r in compare_results(reloaded, report)]
+    np.testing.assert_allclose(ratios, 1.0)
+
+
+def test_float64_only_timed_for_backends_that_keep_it():
+    report = run_benchmark_suite(
+        sizes=["modis_1km"],
+        backends=["numpy_direct", "scipy"],
+        kernel_sizes=[5],
+        dtypes=["float64"],
+        thread_counts=[1],
+        repeats=1,
+        isolate=False,
+    )
+    status = {r["backend"]: r["status"] for r in report["results"]}
+    assert status["numpy_direct"] == "skipped"
+    assert status["scipy"] in ("ok", "skipped")   # skipped without scipy
+
+
+def test_torch_runs_one_convolution_per_timed_call(monkeypatch):
+    pytest.importorskip("torch")
+    import torch.nn.functional as F
+
+    calls = []
+    conv2d = F.conv2d
+
+    def counting_conv2d(*args, **kwargs):
+        calls.append(1)
+        return conv2d(*args, **kwargs)
+
+    monkeypatch.setattr(F, "conv2d", counting_conv2d)
+    row = benchmark_config("modis_1km", (30, 40), "torch_cpu", size=5, repeats=3, warmup=1)
+    assert row["status"] == "ok"
+    # warm-up + timed repeats + the separate memory run
+    assert len(calls) == 1 + 3 + 1
@@ -0,0 +1,98 @@
+import os
+
+import geopandas as gpd
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+from shapely.geometry import box
+
+from src.lst_study.vector_store import (
+    projected_cache_path, read_projected, read_vector, vector_crs, write_vector
+)
+
+
+def _landuse(n=500):
+    # Small parcels along a row in Amsterdam, EPSG:4326
+    return gpd.GeoDataFrame(
+        {
+            "landuse": ["residential", "industrial", "grass", "commercial"] * (n // 4),
+            "osm_landuse_name": [f"parcel {i}" for i in range(n)],
+            "id": range(n),
+        },
+        geometry=[box(4.80 + 0.0005 * i, 52.35, 4.8004 + 0.0005 * i, 52.3504) for i in range(n)],
+        crs="EPSG:4326",
+    )
+
+
+@pytest.mark.parametrize("ext", [".parquet", ".fgb"])
+def test_roundtrip_keeps_long_column_names(tmp_path, ext):
+    path = write_vector(_landuse(), str(tmp_path / f"landuse{ext}"))
+    gdf = read_vector(path).sort_values("id", ignore_index=True)
+
+    assert "osm_landuse_name" in gdf.columns
+    assert gdf.crs.to_epsg() == 4326
+    assert gdf.geom_equals(_landuse().geometry).all()
+
+
+@pytest.mark.parametrize("ext", [".parquet", ".fgb"])
+def test_bbox_and_column_pushdown(tmp_path, ext):
+    source = _landuse()
+    path = write_vector(source, str(tmp_path / f"landuse{ext}"))
+    bbox = (4.80, 52.34, 4.85, 52.36)
+
+    gdf = read_vector(path, bbox=bbox, columns=["landuse"])
+
+    expected = source[source.intersects(box(*bbox))]
+    assert len(gdf) == len(expected)
+    assert list(gdf.columns) == ["landuse", "geometry"]
+
+    # Same box given in RD New
+    rd_bbox = gpd.GeoSeries([box(*bbox)], crs=4326).to_crs(28992).total_bounds
+    assert len(read_vector(path, bbox=rd_bbox, bbox_crs="EPSG:28992")) >= len(expected)
+    assert len(read_vector(path, bbox=(0, 0, 1, 1))) == 0
+
+
+def test_parquet_has_bbox_covering_and_small_row_groups(tmp_path):
+    path = write_vector(_landuse(), str(tmp_path / "landuse.parquet"), row_group_size=100)
+    metadata = pq.ParquetFile(path).metadata
+
+    assert "bbox" in pq.read_schema(path).names
+    assert metadata.num_row_groups == 5
+    assert vector_crs(path).to_epsg() == 4326
+
+
+def test_read_projected_reprojects_once(tmp_path, monkeypatch):
+    path = write_vector(_landuse(), str(tmp_path / "landuse.parquet"))
+    first = read_projected(path, "EPSG:28992", columns=["landuse"])
+
+    def fail(*args, **kwargs):
+        raise AssertionError("reprojected again")
+
+    monkeypatch.setattr(gpd.GeoDataFrame, "to_crs", fail)
+    monkeypatch.setattr(gpd.GeoSeries, "to_crs", fail)
+    second = read_projected(path, "EPSG:28992", columns=["landuse"])
+
+    assert second.crs.to_epsg() == 28992
+    assert list(second.columns) == ["landuse", "area_m2", "geometry"]
+    assert second.geom_equals(first).all()
+    # Equal-area areas agree with RD New areas to well under a percent
+    assert np.allclose(second["area_m2"], second.geometry.area, rtol=1e-2)
+
+
+def test_read_projected_follows_source_changes(tmp_path):
+    path = str(tmp_path / "landuse.parquet")
+    write_vector(_landuse(), path)
+    old_cache = projected_cache_path(path, "EPSG:28992")
+    assert len(read_projected(path, "EPSG:28992")) == 500
+
+    write_vector(_landuse(100), path)
+    os.utime(path, ns=(0, os.stat(old_cache).st_mtime_ns + 1))
+    assert len(read_projected(path, "EPSG:28992")) == 100
+    assert not os.path.exists(old_cache)
+
+
+def test_read_projected_still_reads_shapefiles(tmp_path):
+    path = str(tmp_path / "boundary.shp")
+    _landuse(8)[["landuse", "geometry"]].to_file(path)
+    result = read_projected(path, "EPSG:28992")
+    assert len(result) == 8 and result.crs.to_epsg() == 28992
@@ -0,0 +1,95 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from shapely.geometry import box
+
+from src.lst_study.wfs_reader import iter_wfs_features, read_wfs
+
+
+N_FEATURES = 23
+
+# Small squares around Amsterdam in RD New (EPSG:28992)
+FEATURES = [
+    {"type": "Feature", "properties": {"id": i},
+     "geometry": box(120000 + 100 * i, 485000, 120050 + 100 * i, 485050).__geo_interface__}
+    for i in range(N_FEATURES)
+]
+
+
+def _stub(number_matched, cap=None):
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            requests_seen.append(query)
+            start = int(query["startIndex"][0])
+            count = int(query["count"][0])
+            if cap is not None:
+                count = min(count, cap)
+            body = {"type": "FeatureCollection", "features": FEATURES[start:start + count]}
+            if number_matched:
+                body["numberMatched"] = N_FEATURES
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/wfs", requests_seen
+
+
+@pytest.fixture(params=[True, False], ids=["numberMatched", "no-numberMatched"])
+def wfs_stub(request):
+    server, url, seen = _stub(request.param)
+    yield url, seen, request.param
+    server.shutdown()
+    server.server_close()
+
+
+def test_paged_read_matches_layer(wfs_stub):
+    url, seen, number_matched = wfs_stub
+    gdf = read_wfs(url, {"typeNames": "bg:Gemeentegebied"}, crs="EPSG:28992", page_size=5, workers=3)
+
+    assert list(gdf["id"]) == list(range(N_FEATURES))
+    assert gdf.crs.to_epsg() == 4326
+    assert gdf.total_bounds[0] > 4 and gdf.total_bounds[2] < 6
+    starts = sorted(int(q["startIndex"][0]) for q in seen)
+    if number_matched:
+        # No requests beyond the reported total
+        assert starts == [0, 5, 10, 15, 20]
+    else:
+        # An empty page at the end of the layer stops the read
+        assert starts[:6] == [0, 5, 10, 15, 20, 23]
+
+
+def test_chunks_are_yielded_per_page(wfs_stub):
+    url, _, _ = wfs_stub
+    chunks = list(iter_wfs_features(url, {}, crs="EPSG:28992", to_crs=None, page_size=10, workers=2))
+
+    assert [len(c) for c in chunks] == [10, 10, 3]
+    assert all(c.crs.to_epsg() == 28992 for c in chunks)
+
+
+@pytest.mark.parametrize("number_matched", [True, False], ids=["numberMatched", "no-numberMatched"])
+def test_server_page_cap_below_page_size(number_matched):
+    server, url, seen = _stub(number_matched, cap=4)
+    try:
+        gdf = read_wfs(url, {}, crs="EPSG:28992", to_crs=None, page_size=10, workers=3)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert list(gdf["id"]) == list(range(N_FEATURES))
+    # Every page after the first starts where the previous one ended
+    starts = {int(q["startIndex"][0]) for q in seen}
+    assert {0, 4, 8, 12, 16, 20} <= starts
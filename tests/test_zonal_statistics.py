@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+import geopandas as gpd
+from shapely.geometry import box, Point
+from rasterio.transform import from_origin
+from src.lst_study.ZonalStatistics import (
+    build_zone_coverage, load_or_build_coverage, zonal_statistics, zonal_stats_table
+)
+
+
+def _synthetic_case(seed=0):
+    rng = np.random.default_rng(seed)
+    transform = from_origin(0, 40, 1, 1)
+    lst = rng.normal(25.0, 3.0, (40, 50)).astype(np.float32)
+    lst[3:6, 3:6] = -9999
+    # Overlapping circles plus one polygon outside the raster
+    geoms = [Point(rng.random() * 50, rng.random() * 40).buffer(rng.random() * 5 + 0.5) for _ in range(200)]
+    geoms.append(box(100, 100, 101, 101))
+    return gpd.GeoDataFrame(geometry=geoms, index=np.arange(len(geoms)) * 10), lst, transform
+
+
+@pytest.mark.parametrize("all_touched", [False, True])
+def test_zonal_statistics_matches_rasterstats(all_touched):
+    rasterstats = pytest.importorskip("rasterstats")
+    gdf, lst, transform = _synthetic_case()
+    expected = rasterstats.zonal_stats(
+        gdf, lst, affine=transform, nodata=-9999,
+        stats=["mean", "min", "max", "count", "std"], all_touched=all_touched
+    )
+    result = zonal_statistics(gdf, lst, transform, nodata=-9999, all_touched=all_touched)
+
+    assert list(result.index) == list(gdf.index)
+    for stat in ["mean", "min", "max", "count", "std"]:
+        ref = np.array([np.nan if s[stat] is None else s[stat] for s in expected], dtype=float)
+        np.testing.assert_allclose(result[stat].to_numpy(), ref, rtol=1e-5, equal_nan=True)
+
+def test_fractional_coverage_weights_sum_to_area():
+    transform = from_origin(0, 4, 1, 1)
+    coverage = build_zone_coverage([box(0.5, 0.5, 2.5, 2.5)], transform, (4, 4), fractional=True)
+    assert coverage.weight.sum() == pytest.approx(4.0)
+    assert coverage.weight.max() == pytest.approx(1.0)
+    assert coverage.weight.min() == pytest.approx(0.25)
+
+def test_coverage_index_is_cached_and_reused(tmp_path):
+    gdf, lst, transform = _synthetic_case()
+    built = load_or_build_coverage(gdf.geometry, transform, lst.shape, crs="EPSG:28992", cache_dir=str(tmp_path))
+    cached_files = list(tmp_path.glob("coverage_*.npz"))
+    assert len(cached_files) == 1
+
+    loaded = load_or_build_coverage(gdf.geometry, transform, lst.shape, crs="EPSG:28992", cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(loaded.zone, built.zone)
+    np.testing.assert_array_equal(loaded.pixel, built.pixel)
+    np.testing.assert_array_equal(loaded.weight, built.weight)
+    assert loaded.n_zones == built.n_zones
+
+    # Another year on the same grid reuses the index; another grid does not
+    next_year = lst + 1.0
+    stats = zonal_stats_table(loaded, next_year, nodata=-9999 + 1.0)
+    np.testing.assert_allclose(stats["mean"], zonal_stats_table(built, lst, nodata=-9999)["mean"] + 1.0, rtol=1e-6)
+    load_or_build_coverage(gdf.geometry, transform, lst.shape, all_touched=True, cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("coverage_*.npz"))) == 2
+
+def test_coverage_cache_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    gdf, lst, transform = _synthetic_case()
+    built = load_or_build_coverage(gdf.geometry, transform, lst.shape, cache_dir=None)
+    reference = build_zone_coverage(gdf.geometry, transform, lst.shape)
+    np.testing.assert_array_equal(built.zone, reference.zone)
+    np.testing.assert_array_equal(built.pixel, reference.pixel)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,71 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio
+from shapely.geometry import box
+
+from src.lst_study.ZonalStatistics import zonal_statistics
+from src.lst_study.ZonalTimeseries import class_trends, polygon_zonal_cube, zonal_cube_to_parquet
+
+from .test_datacube import _write_year
+
+
+YEARS = (2020, 2021, 2022, 2023)
+
+
+@pytest.fixture
+def stack(tmp_path):
+    # Grid: x 4.70..5.10, y 52.45..52.15 at 0.01 degrees; class "warm" heats up 0.5 degrees a year
+    rng = np.random.default_rng(1)
+    base = rng.normal(25.0, 2.0, (30, 40))
+    base[:3, :3] = 0  # nodata
+    files = []
+    for k, year in enumerate(YEARS):
+        data = base.copy()
+        data[:, 20:] += 0.5 * k
+        data[:3, :3] = 0
+        files.append(_write_year(tmp_path, year, data))
+
+    landuse = gpd.GeoDataFrame(
+        {"landuse": ["cool", "cool", "warm", "warm"], "area_m2": [1.0, 3.0, 2.0, 2.0]},
+        geometry=[
+            box(4.70, 52.30, 4.80, 52.45),   # touches the nodata corner
+            box(4.80, 52.15, 4.90, 52.30),
+            box(4.95, 52.20, 5.05, 52.40),
+            box(5.00, 52.15, 5.10, 52.25),
+        ],
+        crs="EPSG:4326",
+        index=pd.Index([10, 11, 12, 13]),
+    )
+    return files, landuse, tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_cube_matches_per_year_zonal_statistics(stack, workers):
+    files, landuse, tmp_path = stack
+    cube = polygon_zonal_cube(landuse, [str(f) for f in files], workers=workers, cache_dir=str(tmp_path / "cov"))
+
+    assert dict(cube.sizes) == {"polygon": 4, "time": len(YEARS)}
+    assert list(cube["polygon"].values) == [10, 11, 12, 13]
+    assert list(cube["landuse"].values) == list(landuse["landuse"])
+    for k, f in enumerate(files):
+        with rasterio.open(f) as src:
+            expected = zonal_statistics(landuse, src.read(1), src.transform, nodata=0, stats=["mean", "min", "max", "count"])
+        for stat in ("mean", "min", "max", "count"):
+            np.testing.assert_allclose(cube[stat].isel(time=k).values, expected[stat].values)
+
+
+def test_class_trends_and_parquet(stack):
+    files, landuse, tmp_path = stack
+    cube = polygon_zonal_cube(landuse, str(tmp_path), cache_dir=str(tmp_path / "cov"))
+
+    trends = class_trends(cube)
+    assert trends.loc["warm", "trend_per_year"] == pytest.approx(0.5, abs=1e-4)
+    assert trends.loc["cool", "trend_per_year"] == pytest.approx(0.0, abs=1e-4)
+    assert list(trends.columns) == ["trend_per_year", "n_years"] + [f"mean_{y}" for y in YEARS]
+
+    path = zonal_cube_to_parquet(cube, str(tmp_path / "zonal.parquet"))
+    table = pd.read_parquet(path)
+    assert len(table) == 4 * len(YEARS)
+    assert {"polygon", "time", "landuse", "mean"} <= set(table.columns)